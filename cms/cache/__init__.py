@@ -1,18 +1,19 @@
 import re
+import time
 
 from cms.utils.conf import get_cms_setting
 
 CMS_PAGE_CACHE_VERSION_KEY = get_cms_setting("CACHE_PREFIX") + '_PAGE_CACHE_VERSION'
 
 
-def _get_cache_version():
+def _get_cache_version(bypass=False):
     """
     Returns the current page cache version, explicitly setting one if not
-    defined.
+    defined. See cms.cache.local for «bypass».
     """
-    from django.core.cache import cache
+    from cms.cache.local import get_version
 
-    version = cache.get(CMS_PAGE_CACHE_VERSION_KEY)
+    version = get_version(CMS_PAGE_CACHE_VERSION_KEY, bypass=bypass)
 
     if version:
         return version
@@ -25,18 +26,19 @@ def _set_cache_version(version):
     """
     Set the cache version to the specified value.
     """
-    from django.core.cache import cache
+    from cms.cache.local import set_version
 
-    cache.set(
+    set_version(
         CMS_PAGE_CACHE_VERSION_KEY,
         version,
         get_cms_setting('CACHE_DURATIONS')['content']
     )
 
 
-def invalidate_cms_page_cache():
+def invalidate_cms_page_cache(purge=True):
     """
-    Invalidates the CMS PAGE CACHE.
+    Invalidates the CMS PAGE CACHE. If «purge», all pages are purged from
+    the caches outside of Django as well (see cms.cache.purge).
     """
 
     #
@@ -66,9 +68,70 @@ def invalidate_cms_page_cache():
     # will have also expired, so, it'd be pointless to try to access them
     # anyway.
     #
-    version = _get_cache_version()
+    from cms.cache.purge import purge_page_cache
+
+    version = _get_cache_version(bypass=True)
     _set_cache_version(version + 1)
 
+    if purge:
+        purge_page_cache()
+
+
+def _get_page_cache_tag_key(tag):
+    return f'{get_cms_setting("CACHE_PREFIX")}|page_cache_tag|{_clean_key(tag)}'
+
+
+def get_cms_page_cache_tag_versions(tags, bypass=False):
+    """
+    Returns a dictionary mapping each of the given page cache «tags» to its
+    current version. Tags without a version are left out. See cms.cache.local
+    for «bypass».
+    """
+    from cms.cache.local import get_versions
+
+    keys = {_get_page_cache_tag_key(tag): tag for tag in tags}
+    cached = get_versions(list(keys), bypass=bypass)
+    return {keys[key]: version for key, version in cached.items()}
+
+
+def _set_cms_page_cache_tag_versions(tag_versions):
+    """
+    Sets the versions of the page cache tags in the dictionary «tag_versions».
+    """
+    from cms.cache.local import set_versions
+
+    set_versions(
+        {_get_page_cache_tag_key(tag): version for tag, version in tag_versions.items()},
+        get_cms_setting('CACHE_DURATIONS')['content']
+    )
+
+
+def invalidate_cms_page_cache_tags(tags):
+    """
+    Invalidates the CMS PAGE CACHE entries tagged with any of the given «tags».
+    """
+
+    #
+    # NOTE: Each page cache entry stores the versions of the tags (pages,
+    # placeholders and the site) it was rendered from.
+    # Replacing the version of a tag makes all entries holding the old
+    # version inaccessible, while all other entries remain valid. Like with
+    # invalidate_cms_page_cache(), the entries are left to expire naturally.
+    #
+    from cms.cache.purge import purge_page_cache_tags
+
+    version = int(time.time() * 1000000)
+    _set_cms_page_cache_tag_versions(dict.fromkeys(tags, version))
+    purge_page_cache_tags(tags)
+
+
+def get_page_cache_tag(obj_type, pk):
+    """
+    Returns the page cache tag for the object of «obj_type» with the given «pk»,
+    e.g. ``placeholder:42``.
+    """
+    return f'{obj_type}:{pk}'
+
 
 CLEAN_KEY_PATTERN = re.compile(r'[^a-zA-Z0-9_-]')
 
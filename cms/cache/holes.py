@@ -0,0 +1,226 @@
+"""
+This module manages "holes" in cached content. If
+:setting:`CMS_PAGE_CACHE_HOLE_PUNCHING` is enabled, plugins which cannot be
+cached are rendered as a marker instead of disabling the placeholder and page
+caches. The cached content keeps the markers, which are replaced by the
+plugin's content for each request:
+
+* When the content is rendered, the plugin's content is remembered on the
+  request and put in place of the marker before the response is returned.
+* When the content is served from the placeholder or page cache, only the
+  plugins behind the markers are rendered again.
+
+The markers are HTML comments holding the plugin's primary key. The primary
+keys of the holes are stored alongside the cached content, only the markers
+of these plugins are replaced. Markers in the content of plugins which did
+not come from their children (e.g. in user-entered HTML) are removed.
+"""
+import re
+from collections import defaultdict
+
+from django.template import Context, Engine
+
+from cms.constants import EXPIRE_NOW
+from cms.utils.conf import get_cms_setting
+
+HOLE_MARKER_PREFIX = '<!--cms-cache-hole:'
+
+_hole_marker_re = re.compile(re.escape(HOLE_MARKER_PREFIX) + r'(\d+)-->')
+
+# The maximum nesting of hole-punched plugins filled by fill_cache_holes()
+MAX_HOLE_DEPTH = 10
+
+
+def is_hole_punching_enabled():
+    return get_cms_setting('PAGE_CACHE_HOLE_PUNCHING')
+
+
+def is_cache_hole(plugin, expiration):
+    """
+    Returns True if «plugin» (a plugin class instance) cannot be cached given
+    its cache «expiration» (as returned by its ``get_cache_expiration()``).
+    """
+    if not plugin.cache and not expiration:
+        return True
+    return expiration == EXPIRE_NOW
+
+
+def get_hole_marker(plugin_pk):
+    return f'{HOLE_MARKER_PREFIX}{plugin_pk}-->'
+
+
+def has_cache_holes(content):
+    """
+    Returns True if «content» (str or bytes) contains hole markers.
+    """
+    if isinstance(content, bytes):
+        return HOLE_MARKER_PREFIX.encode() in content
+    return HOLE_MARKER_PREFIX in content
+
+
+def get_cache_hole_pks(request):
+    """
+    Returns the primary keys of the plugins whose markers may be replaced
+    in the content rendered for «request», in the order they were allowed.
+    """
+    if not hasattr(request, '_cms_cache_hole_pks'):
+        request._cms_cache_hole_pks = []
+    return request._cms_cache_hole_pks
+
+
+def allow_cache_holes(request, plugin_pks):
+    """
+    Allows the markers of «plugin_pks» to be replaced in the content rendered
+    for «request». Called with the holes stored alongside cached content.
+    """
+    get_cache_hole_pks(request).extend(plugin_pks)
+
+
+def get_cache_holes(request, content):
+    """
+    Returns the sorted primary keys of the plugins whose markers are in
+    «content» and were allowed for «request». These are stored alongside
+    the cached content.
+    """
+    if not has_cache_holes(content):
+        return []
+    allowed = set(get_cache_hole_pks(request))
+    return sorted({int(pk) for pk in _hole_marker_re.findall(content)} & allowed)
+
+
+def strip_cache_hole_markers(content, allowed=()):
+    """
+    Removes the markers of plugins not in «allowed» from «content», so that
+    markers in e.g. user-entered HTML are never replaced.
+    """
+    if not has_cache_holes(content):
+        return content
+    allowed = set(allowed)
+    return _hole_marker_re.sub(
+        lambda match: match.group(0) if int(match.group(1)) in allowed else '',
+        content,
+    )
+
+
+def punch_cache_hole(request, plugin, content):
+    """
+    Remembers the rendered «content» of «plugin» for «request» and
+    returns the marker to render in its place.
+    """
+    if not hasattr(request, '_cms_cache_holes'):
+        request._cms_cache_holes = {}
+    request._cms_cache_holes[plugin.pk] = content
+    allow_cache_holes(request, [plugin.pk])
+    return get_hole_marker(plugin.pk)
+
+
+def defer_cache_holes(request):
+    """
+    Keeps the markers in all content rendered for «request» until
+    fill_response_cache_holes() is called, so that the markers can be
+    stored in the page cache.
+    """
+    request._cms_defer_cache_holes = True
+
+
+def cache_holes_are_deferred(request):
+    return getattr(request, '_cms_defer_cache_holes', False)
+
+
+def _render_cache_holes(request, plugin_pks):
+    """
+    Returns a dictionary mapping the primary keys in «plugin_pks» to the
+    plugins' rendered content. Plugins which no longer exist map to ''.
+    """
+    from cms.models import CMSPlugin
+    from cms.toolbar.utils import get_toolbar_from_request
+    from cms.utils.plugins import assign_plugins
+
+    renderer = get_toolbar_from_request(request).get_content_renderer()
+    plugins = CMSPlugin.objects.filter(pk__in=plugin_pks).select_related('placeholder')
+    rendered = dict.fromkeys(plugin_pks, '')
+    # The context the plugin was originally rendered in is not
+    # available anymore, build one from the request.
+    context = Context({'request': request})
+
+    for processor in Engine.get_default().template_context_processors:
+        context.update(processor(request))
+
+    placeholders_by_language = defaultdict(dict)
+
+    for plugin in plugins:
+        placeholders_by_language[plugin.language].setdefault(plugin.placeholder_id, plugin.placeholder)
+
+    instances = {}
+
+    for language, placeholders in placeholders_by_language.items():
+        # Loads the whole tree of the plugins' placeholders,
+        # since the plugins might have children.
+        assign_plugins(request, list(placeholders.values()), lang=language)
+
+        for placeholder in placeholders.values():
+            for instance in placeholder._all_plugins_cache:
+                instances[instance.pk] = (instance, placeholder)
+
+    for plugin_pk in plugin_pks:
+        if plugin_pk in instances:
+            instance, placeholder = instances[plugin_pk]
+            content = renderer.render_plugin(
+                instance,
+                context,
+                placeholder=placeholder,
+                editable=False,
+            )
+            # Plugins which still cannot be cached punch a hole for
+            # themselves, the hole has their content.
+            rendered[plugin_pk] = getattr(request, '_cms_cache_holes', {}).get(plugin_pk, content)
+    return rendered
+
+
+def fill_cache_holes(request, content):
+    """
+    Replaces the markers in «content» with the content of their plugins.
+    Only the markers of plugins allowed for «request» are replaced (see
+    allow_cache_holes()), each plugin at most once. Other markers are removed.
+    """
+    filled = set()
+
+    # The content of a plugin can have markers of its child plugins
+    for _ in range(MAX_HOLE_DEPTH):
+        if not has_cache_holes(content) or not _hole_marker_re.search(content):
+            return content
+
+        holes = getattr(request, '_cms_cache_holes', {})
+        allowed = set(get_cache_hole_pks(request)) - filled
+        plugin_pks = {int(pk) for pk in _hole_marker_re.findall(content)} & allowed
+        # Plugins whose markers come from the cache need rendering
+        missing = [pk for pk in plugin_pks if pk not in holes]
+
+        if missing:
+            holes = {**holes, **_render_cache_holes(request, missing)}
+        content = _hole_marker_re.sub(
+            lambda match, holes=holes, plugin_pks=plugin_pks: (
+                holes[int(match.group(1))] if int(match.group(1)) in plugin_pks else ''
+            ),
+            content,
+        )
+        filled |= plugin_pks
+    # Holes nested deeper than MAX_HOLE_DEPTH are left empty
+    return strip_cache_hole_markers(content)
+
+
+def fill_response_cache_holes(response, request=None):
+    """
+    Replaces the markers in the content of «response» with the content of
+    their plugins. Can be used as a post-render callback.
+    """
+    request = request or response._request
+
+    if not response.streaming and has_cache_holes(response.content):
+        content = response.content.decode(response.charset)
+        response.content = fill_cache_holes(request, content)
+
+        if response.has_header('Content-Length'):
+            response['Content-Length'] = str(len(response.content))
+    request._cms_defer_cache_holes = False
+    return response
@@ -0,0 +1,181 @@
+"""
+This module keeps the version keys of the CMS caches (the page cache version,
+the page cache tag versions, the placeholder cache versions and the permission
+cache version) in a small in-process cache in front of Django's cache. These
+keys are tiny, but read several times for most requests.
+
+If :setting:`CMS_CACHE_LOCAL_TTL` is set, a version read from the shared
+cache is kept for that many seconds, so changes made by other processes
+become visible with that delay. Changes made by this process are written
+through and visible immediately.
+
+Code which writes a value derived from a version back to the cache must read
+the version with «bypass», otherwise it might restore a version another
+process has replaced in the meantime.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from cms.utils.conf import get_cms_setting
+
+
+class LocalCache:
+    """
+    A thread-safe LRU cache whose entries expire after some seconds.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys):
+        """
+        Returns a dictionary with the values of the «keys» which have not
+        expired yet.
+        """
+        values = {}
+        timestamp = time.monotonic()
+
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+
+                if entry and entry[1] > timestamp:
+                    self._entries.move_to_end(key)
+                    values[key] = entry[0]
+                    self.hits += 1
+                else:
+                    self._entries.pop(key, None)
+                    self.misses += 1
+        return values
+
+    def set_many(self, data, ttl, max_entries):
+        expires = time.monotonic() + ttl
+
+        with self._lock:
+            for key, value in data.items():
+                self._entries[key] = (value, expires)
+                self._entries.move_to_end(key)
+
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_local_cache = LocalCache()
+
+
+def _get_local_cache_ttl():
+    return get_cms_setting('CACHE_LOCAL_TTL')
+
+
+def _set_local_versions(data):
+    ttl = _get_local_cache_ttl()
+
+    if ttl:
+        _local_cache.set_many(data, ttl, get_cms_setting('CACHE_LOCAL_MAX_ENTRIES'))
+
+
+def get_version(key, bypass=False):
+    """
+    Returns the value of the version «key» or ``None`` if there is none.
+    """
+    from django.core.cache import cache
+
+    if not _get_local_cache_ttl():
+        return cache.get(key)
+    return get_versions([key], bypass=bypass).get(key)
+
+
+def get_versions(keys, bypass=False):
+    """
+    Returns a dictionary with the values of the version «keys». Keys
+    without a value are left out.
+    """
+    from django.core.cache import cache
+
+    if not _get_local_cache_ttl():
+        return cache.get_many(keys)
+
+    values = {} if bypass else _local_cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+
+    if missing:
+        cached = cache.get_many(missing)
+        _set_local_versions(cached)
+        values.update(cached)
+    return values
+
+
+def get_many_with_versions(version_keys, keys):
+    """
+    Returns a dictionary with the values of the version «version_keys» and of
+    the other «keys», fetching all values missing from the local cache with a
+    single cache lookup. Keys without a value are left out.
+    """
+    from django.core.cache import cache
+
+    ttl = _get_local_cache_ttl()
+    values = _local_cache.get_many(version_keys) if ttl else {}
+    missing = [key for key in version_keys if key not in values]
+    cached = cache.get_many(missing + list(keys))
+
+    if ttl:
+        _set_local_versions({key: cached[key] for key in missing if key in cached})
+    values.update(cached)
+    return values
+
+
+def set_version(key, value, timeout):
+    from django.core.cache import cache
+
+    cache.set(key, value, timeout)
+    _set_local_versions({key: value})
+
+
+def set_versions(data, timeout):
+    from django.core.cache import cache
+
+    cache.set_many(data, timeout)
+    _set_local_versions(data)
+
+
+def forget_version(key):
+    """
+    Drops the version «key» from the local cache, for code changing the
+    version in the shared cache directly, e.g. with ``cache.incr()``.
+    """
+    _local_cache.delete_many([key])
+
+
+def clear_local_cache():
+    _local_cache.clear()
+
+
+def get_local_cache_stats():
+    """
+    Returns a dictionary with the number of versions read from the local
+    cache (``hits``), read from the shared cache (``misses``) and the
+    number of versions in the local cache (``entries``).
+    """
+    return {
+        'hits': _local_cache.hits,
+        'misses': _local_cache.misses,
+        'entries': len(_local_cache),
+    }
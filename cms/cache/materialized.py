@@ -0,0 +1,155 @@
+"""
+This module manages the placeholder snapshots stored in the database if
+:setting:`CMS_PLACEHOLDER_CACHE_MATERIALIZED` is enabled. A snapshot holds the
+content of a placeholder in the format of the placeholder cache, as rendered
+for an anonymous visitor.
+
+Snapshots are written when the placeholder's cache is cleared (see
+``Placeholder.clear_cache()``), which happens whenever its plugins are changed
+or its page is published: the old snapshot is deleted right away, and the
+placeholder is rendered again for the new snapshot once the transaction is
+committed. Snapshots are never written while serving requests. They expire
+after :setting:`CMS_PLACEHOLDER_CACHE_MATERIALIZED_DURATION`, independently
+of the placeholder cache.
+
+When the placeholder cache has no content for a placeholder, its snapshot is
+used instead of rendering the plugins, and put back into the placeholder
+cache. This way an empty cache (e.g. after restarting the cache server) does
+not require rendering all placeholders again.
+
+Only placeholders whose content does not vary by request headers and has no
+cache holes are stored.
+"""
+import json
+import logging
+from datetime import timedelta
+from functools import partial
+
+from django.contrib.auth.models import AnonymousUser
+from django.db import transaction
+from django.test import RequestFactory
+from django.utils import timezone
+from django.utils.timezone import now
+
+from cms.utils.conf import get_cms_setting
+from cms.utils.helpers import get_timezone_name
+
+logger = logging.getLogger(__name__)
+
+
+def is_materialization_enabled():
+    return get_cms_setting('PLACEHOLDER_CACHE_MATERIALIZED')
+
+
+def get_materialized_placeholders(placeholders, lang, site_id):
+    """
+    Returns a dictionary mapping the primary keys of «placeholders» to the
+    ``(content, duration)`` tuple of their snapshots. «content» is in the
+    format of the placeholder cache, «duration» the number of seconds the
+    snapshot is still valid for. Placeholders without a valid snapshot are
+    left out.
+    """
+    from cms.models import PlaceholderSnapshot
+
+    timestamp = now()
+    snapshots = PlaceholderSnapshot.objects.filter(
+        placeholder__in=[placeholder.pk for placeholder in placeholders],
+        language=lang,
+        site=site_id,
+        timezone=get_timezone_name(),
+        expires__gt=timestamp,
+    )
+    return {
+        snapshot.placeholder_id: (
+            {'content': snapshot.content, 'sekizai': json.loads(snapshot.sekizai)},
+            int((snapshot.expires - timestamp).total_seconds()),
+        )
+        for snapshot in snapshots
+    }
+
+
+def set_materialized_placeholder(placeholder, lang, site_id, content, duration):
+    """
+    Stores the «content» (in the format of the placeholder cache) of
+    «placeholder», valid for «duration» seconds.
+    """
+    from cms.models import PlaceholderSnapshot
+
+    PlaceholderSnapshot.objects.update_or_create(
+        placeholder=placeholder,
+        language=lang,
+        site_id=site_id,
+        timezone=get_timezone_name(),
+        defaults={
+            'content': content['content'],
+            'sekizai': json.dumps(content['sekizai']),
+            'expires': now() + timedelta(seconds=duration),
+        },
+    )
+
+
+def _get_snapshot_request(placeholder, lang, site):
+    # The request of an anonymous visitor of the placeholder's page
+    page = placeholder.page
+    path = (page.get_absolute_url(lang, fallback=False) or '/') if page else '/'
+    request = RequestFactory().get(path, HTTP_HOST=site.domain)
+    request.user = AnonymousUser()
+    request.session = {}
+    request.current_page = page
+    request.LANGUAGE_CODE = lang
+    return request
+
+
+def render_materialized_placeholder(placeholder, lang, site_id):
+    """
+    Renders «placeholder» for an anonymous visitor and stores the content
+    as its snapshot. Placeholders of another site than the current one and
+    placeholders which cannot be stored are left without a snapshot.
+    """
+    from django.contrib.sites.models import Site
+    from sekizai.context import SekizaiContext
+    from sekizai.helpers import Watcher
+
+    from cms.cache.holes import defer_cache_holes, get_cache_holes
+    from cms.plugin_rendering import ContentRenderer
+    from cms.utils.i18n import force_language
+
+    site = Site.objects.get_current()
+
+    if site.pk != site_id or not placeholder.cache_placeholder:
+        return
+
+    request = _get_snapshot_request(placeholder, lang, site)
+    # The cache hole markers are kept in the content
+    defer_cache_holes(request)
+    renderer = ContentRenderer(request)
+    context = SekizaiContext({'request': request})
+    watcher = Watcher(context)
+
+    with timezone.override(None), force_language(lang):
+        content = renderer.render_placeholder(placeholder, context, language=lang, page=placeholder.page)
+        ttl, vary_on_list = renderer.get_placeholder_cache_metadata(placeholder)
+        duration = min(get_cms_setting('PLACEHOLDER_CACHE_MATERIALIZED_DURATION'), ttl)
+
+        if duration > 0 and not vary_on_list and not get_cache_holes(request, content):
+            content = {'content': content, 'sekizai': watcher.get_changes()}
+            set_materialized_placeholder(placeholder, lang, site_id, content, duration)
+
+
+def _refresh_materialized_placeholder(placeholder, lang, site_id):
+    try:
+        render_materialized_placeholder(placeholder, lang, site_id)
+    except Exception:
+        # The content is rendered from the plugins until the next change
+        logger.exception('Storing the snapshot of placeholder %s (%s) failed', placeholder.pk, lang)
+
+
+def clear_materialized_placeholder(placeholder, lang, site_id):
+    """
+    Deletes the snapshots of «placeholder» and stores a new one once the
+    current transaction is committed.
+    """
+    from cms.models import PlaceholderSnapshot
+
+    PlaceholderSnapshot.objects.filter(placeholder=placeholder, language=lang).delete()
+    transaction.on_commit(partial(_refresh_materialized_placeholder, placeholder, lang, site_id))
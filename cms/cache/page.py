@@ -1,35 +1,149 @@
+import gzip
 import hashlib
+import re
+import time
 from datetime import timedelta
+from fnmatch import fnmatchcase
+from operator import itemgetter
 
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
 from django.utils.cache import (
     add_never_cache_headers,
+    get_conditional_response,
+    patch_cache_control,
     patch_response_headers,
     patch_vary_headers,
+    set_response_etag,
 )
 from django.utils.encoding import iri_to_uri
+from django.utils.http import http_date, parse_http_date_safe, urlencode
+from django.utils.text import compress_string
 from django.utils.timezone import now
 
-from cms.cache import _get_cache_key, _get_cache_version, _set_cache_version
+from cms.cache import (
+    _get_cache_key,
+    _get_cache_version,
+    _set_cache_version,
+    _set_cms_page_cache_tag_versions,
+    get_cms_page_cache_tag_versions,
+    get_page_cache_tag,
+)
+from cms.cache.holes import (
+    allow_cache_holes,
+    fill_response_cache_holes,
+    get_cache_hole_pks,
+    get_cache_holes,
+    is_hole_punching_enabled,
+)
+from cms.cache.purge import get_surrogate_key_header_value
 from cms.constants import EXPIRE_NOW, MAX_EXPIRATION_TTL
 from cms.toolbar.utils import get_toolbar_from_request
 from cms.utils.compat.response import get_response_headers
 from cms.utils.conf import get_cms_setting
 from cms.utils.helpers import get_timezone_name
 
+try:
+    # brotli is optional, it's only needed for CMS_PAGE_CACHE_COMPRESSION = "br"
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _is_page_cache_query_parameter(name):
+    """
+    Returns True if the query parameter «name» is part of the page cache key.
+    """
+    allowed = get_cms_setting('PAGE_CACHE_ALLOWED_QUERY_PARAMETERS')
+    ignored = get_cms_setting('PAGE_CACHE_IGNORED_QUERY_PARAMETERS')
+
+    if allowed is not None and not any(fnmatchcase(name, pattern) for pattern in allowed):
+        return False
+    return not any(fnmatchcase(name, pattern) for pattern in ignored)
+
+
+def _get_page_cache_path(request):
+    """
+    Returns the path of «request» with the query parameters which are part of
+    the page cache key, sorted by name. This way, tracking parameters and the
+    parameters' order don't create separate cache entries.
+    """
+    path = request.path
+    parameters = [
+        (name, value)
+        for name, values in request.GET.lists() if _is_page_cache_query_parameter(name)
+        for value in values
+    ]
+
+    if parameters:
+        # The sort is stable, values of the same parameter keep their order
+        path += '?' + urlencode(sorted(parameters, key=itemgetter(0)))
+    return path
+
 
 def _page_cache_key(request):
     # sha1 key of current path
     cache_key = "%s:%d:%s" % (
         get_cms_setting("CACHE_PREFIX"),
         settings.SITE_ID,
-        hashlib.sha1(iri_to_uri(request.get_full_path()).encode('utf-8')).hexdigest()
+        hashlib.sha1(iri_to_uri(_get_page_cache_path(request)).encode('utf-8')).hexdigest()
     )
     if settings.USE_TZ:
         cache_key += '.%s' % get_timezone_name()
     return cache_key
 
 
+def _compress_content(content, encoding):
+    if not encoding:
+        return content
+    elif encoding == 'gzip':
+        return compress_string(content)
+    elif encoding == 'br':
+        if brotli is None:
+            raise ImproperlyConfigured(
+                'CMS_PAGE_CACHE_COMPRESSION "br" requires the brotli package to be installed.'
+            )
+        return brotli.compress(content)
+    raise ImproperlyConfigured(
+        f'CMS_PAGE_CACHE_COMPRESSION must be None, "gzip" or "br", not "{encoding}".'
+    )
+
+
+def _decompress_content(content, encoding):
+    if not encoding:
+        return content
+    elif encoding == 'gzip':
+        return gzip.decompress(content)
+    return brotli.decompress(content)
+
+
+def _accepts_encoding(request, encoding):
+    accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    return re.search(rf'\b{encoding}\b', accept_encoding) is not None
+
+
+def _get_page_cache_tags(request, toolbar):
+    """
+    Returns the tags of all objects the response to «request» was built from.
+    """
+    content_renderer = toolbar.content_renderer
+    tags = [get_page_cache_tag('site', content_renderer.current_site.pk)]
+    page = getattr(request, 'current_page', None)
+
+    if page:
+        tags.append(get_page_cache_tag('page', page.pk))
+
+    # Includes the placeholders of static placeholders, which are
+    # invalidated whenever their plugins change, and the placeholders
+    # taken from the placeholder cache.
+    placeholders = content_renderer.get_rendered_placeholders() + content_renderer.get_cached_placeholders()
+
+    for placeholder_pk in dict.fromkeys(placeholder.pk for placeholder in placeholders):
+        tags.append(get_page_cache_tag('placeholder', placeholder_pk))
+    return tags
+
+
 def set_page_cache(response):
     from django.core.cache import cache
 
@@ -39,20 +153,21 @@ def set_page_cache(response):
 
     if is_authenticated or toolbar._cache_disabled or not get_cms_setting("PAGE_CACHE"):
         add_never_cache_headers(response)
+        _release_page_cache_lock(request)
         return response
 
     # This *must* be TZ-aware
     timestamp = now()
 
-    placeholders = toolbar.content_renderer.get_rendered_placeholders()
+    content_renderer = toolbar.content_renderer
+    placeholders = content_renderer.get_rendered_placeholders()
     # Checks if there's a plugin using the legacy "cache = False"
     placeholder_ttl_list = []
     vary_cache_on_set = set()
     for ph in placeholders:
-        # get_cache_expiration() always returns:
+        # The expiration always is:
         #     EXPIRE_NOW <= int <= MAX_EXPIRATION_IN_SECONDS
-        ttl = ph.get_cache_expiration(request, timestamp)
-        vary_cache_on = ph.get_vary_cache_on(request)
+        ttl, vary_cache_on = content_renderer.get_placeholder_cache_metadata(ph, timestamp)
 
         placeholder_ttl_list.append(ttl)
         if ttl and vary_cache_on:
@@ -75,30 +190,254 @@ def set_page_cache(response):
             # Adds expiration, etc. to headers
             patch_response_headers(response, cache_timeout=ttl)
             patch_vary_headers(response, sorted(vary_cache_on_set))
+            # Pages with holes are different for each request,
+            # the plugins behind the holes are stored with the content.
+            if is_hole_punching_enabled() and get_cache_hole_pks(request):
+                holes = get_cache_holes(request, response.content.decode(response.charset))
+            else:
+                holes = []
+            # Adds the validators needed to answer conditional requests
+            # for the cached page (see get_page_cache_response()). The
+            # page is known to be unchanged since it has been rendered.
+            if not response.has_header('ETag') and not holes:
+                set_response_etag(response)
+            if not response.has_header('Last-Modified') and not holes:
+                response['Last-Modified'] = http_date(timestamp.timestamp())
 
-            version = _get_cache_version()
+            # The versions are written back below
+            version = _get_cache_version(bypass=True)
+            # Tags which have not been invalidated yet get their first version
+            tags = _get_page_cache_tags(request, toolbar)
+            for header in get_cms_setting('PAGE_CACHE_SURROGATE_KEY_HEADERS'):
+                response[header] = get_surrogate_key_header_value(header, tags)
+            tag_versions = dict.fromkeys(tags, int(time.time() * 1000000))
+            tag_versions.update(get_cms_page_cache_tag_versions(tags, bypass=True))
             # We also store the absolute expiration timestamp to avoid
             # recomputing it on cache-reads.
             expires_datetime = timestamp + timedelta(seconds=ttl)
             response_headers = get_response_headers(response)
+            encoding = get_cms_setting('PAGE_CACHE_COMPRESSION')
+            # The cache version is stored with the content instead of being
+            # part of the key, so that outdated entries can still be served
+            # during the grace period (see get_page_cache()).
             cache.set(
                 _page_cache_key(request),
                 (
-                    response.content,
+                    _compress_content(response.content, encoding),
                     response_headers,
                     expires_datetime,
+                    version,
+                    tag_versions,
+                    encoding,
+                    holes,
                 ),
-                ttl,
-                version=version
+                ttl + get_cms_setting('PAGE_CACHE_GRACE_PERIOD'),
             )
             # See note in invalidate_cms_page_cache()
             _set_cache_version(version)
+            _set_cms_page_cache_tag_versions(tag_versions)
+    _release_page_cache_lock(request)
     return response
 
 
+def _get_page_cache_entry(request, allow_holes=True):
+    """
+    Returns the ``(content, headers, expires_datetime, encoding, holes)``
+    tuple cached for «request» or ``None`` if there is none or it has been
+    invalidated. «content» is compressed with «encoding», unless it is
+    ``None``, and has the markers of the hole-punched plugins whose primary
+    keys are in «holes» (see cms.cache.holes). Entries with holes are skipped
+    unless «allow_holes».
+
+    If :setting:`CMS_PAGE_CACHE_GRACE_PERIOD` is set, an expired or invalidated
+    entry is still returned while another request re-renders the page.
+    """
+    from django.core.cache import cache
+
+    if getattr(request, '_page_cache_lock_key', None):
+        # This request already took the lock to re-render the page
+        return None
+
+    cache_key = _page_cache_key(request)
+    cached = cache.get(cache_key)
+    if not isinstance(cached, tuple) or len(cached) != 7 or not isinstance(cached[6], list):
+        # Either nothing is cached, or the entry has been written by
+        # another version of django CMS (e.g. during a deployment).
+        return None
+
+    content, headers, expires_datetime, version, tag_versions, encoding, holes = cached
+
+    if holes and not allow_holes:
+        return None
+
+    if encoding == 'br' and brotli is None:
+        # Written by a process with brotli, which this one cannot decompress
+        return None
+
+    is_valid = (
+        version == _get_cache_version()
+        # See note in invalidate_cms_page_cache_tags()
+        and get_cms_page_cache_tag_versions(tag_versions) == tag_versions
+    )
+    grace_period = get_cms_setting('PAGE_CACHE_GRACE_PERIOD')
+
+    if is_valid and (not grace_period or expires_datetime > now()):
+        return content, headers, expires_datetime, encoding, holes
+
+    if not grace_period or _acquire_page_cache_lock(request, cache_key):
+        # Either there's no grace period, or this request is
+        # the one to re-render the page.
+        return None
+
+    # Another request is re-rendering the page, serve the stale content
+    # but make sure nobody else caches it any longer.
+    _incr_page_cache_stat('stale')
+    return content, headers, min(expires_datetime, now()), encoding, holes
+
+
 def get_page_cache(request):
+    """
+    Returns the ``(content, headers, expires_datetime)`` tuple cached for
+    «request» or ``None`` if there is none or it has been invalidated.
+    «content» still has the markers of hole-punched plugins.
+    """
+    entry = _get_page_cache_entry(request)
+    if entry is None:
+        return None
+
+    content, headers, expires_datetime, encoding, holes = entry
+    return _decompress_content(content, encoding), headers, expires_datetime
+
+
+def _page_cache_lock_key(cache_key):
+    return f'{cache_key}|lock'
+
+
+def _acquire_page_cache_lock(request, cache_key):
+    """
+    Returns True if the lock to re-render the page for «request» was acquired.
+    The lock is released by set_page_cache() or expires after
+    :setting:`CMS_PAGE_CACHE_LOCK_TIMEOUT` seconds.
+    """
+    from django.core.cache import cache
+
+    # cache.add() only sets the key if it does not exist yet,
+    # which makes it usable as a lock on all cache backends.
+    acquired = cache.add(
+        _page_cache_lock_key(cache_key),
+        True,
+        get_cms_setting('PAGE_CACHE_LOCK_TIMEOUT'),
+    )
+
+    if acquired:
+        request._page_cache_lock_key = _page_cache_lock_key(cache_key)
+        _incr_page_cache_stat('revalidations')
+    return acquired
+
+
+def _release_page_cache_lock(request):
+    from django.core.cache import cache
+
+    lock_key = getattr(request, '_page_cache_lock_key', None)
+
+    if lock_key:
+        cache.delete(lock_key)
+        del request._page_cache_lock_key
+
+
+def _page_cache_stat_key(name):
+    return f'{get_cms_setting("CACHE_PREFIX")}|page_cache_stats|{name}'
+
+
+def _incr_page_cache_stat(name):
+    from django.core.cache import cache
+
+    key = _page_cache_stat_key(name)
+
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            # The key expired between add() and incr()
+            cache.set(key, 1, None)
+
+
+def get_page_cache_stats():
+    """
+    Returns a dictionary with the number of stale page cache entries served
+    (``stale``) and the number of times a request took the lock to re-render
+    a stale page (``revalidations``).
+    """
     from django.core.cache import cache
-    return cache.get(_page_cache_key(request), version=_get_cache_version())
+
+    names = ('stale', 'revalidations')
+    keys = {_page_cache_stat_key(name): name for name in names}
+    cached = cache.get_many(list(keys))
+    stats = dict.fromkeys(names, 0)
+    stats.update({keys[key]: value for key, value in cached.items()})
+    return stats
+
+
+def get_page_cache_response(request, allow_holes=True):
+    """
+    Returns an ``HttpResponse`` built from the page cache entry for «request»
+    or ``None`` if there is no such entry. If the request's ``If-None-Match``
+    or ``If-Modified-Since`` header matches the entry, the response is a
+    ``304 Not Modified``.
+
+    The plugins behind the holes of the entry are rendered for «request»,
+    pages with holes are skipped unless «allow_holes».
+    """
+    entry = _get_page_cache_entry(request, allow_holes=allow_holes)
+    if entry is None:
+        return None
+
+    content, headers, expires_datetime, encoding, holes = entry
+    # The body is only set once it's clear the client
+    # does not have an up-to-date copy of the page.
+    response = HttpResponse()
+    response.headers = headers
+    response.xframe_options_exempt = True
+    # Recalculate the max-age header for this cached response,
+    # stale responses must not be cached any longer.
+    max_age = max(int((expires_datetime - now()).total_seconds() + 0.5), 0)
+    patch_cache_control(response, max_age=max_age)
+
+    if encoding:
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+    serve_compressed = encoding and not holes and _accepts_encoding(request, encoding)
+    etag = response.get('ETag')
+
+    if serve_compressed and etag and not etag.startswith('W/'):
+        # Like GZipMiddleware, a strong ETag must be
+        # weakened for the compressed representation.
+        etag = response['ETag'] = 'W/' + etag
+
+    last_modified = response.get('Last-Modified')
+    conditional_response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified and parse_http_date_safe(last_modified),
+        response=response,
+    )
+
+    if conditional_response is not response:
+        # 304 Not Modified or 412 Precondition Failed
+        return conditional_response
+
+    if serve_compressed:
+        # Serve the compressed content as is
+        response.content = content
+        response['Content-Encoding'] = encoding
+        response['Content-Length'] = str(len(content))
+    else:
+        response.content = _decompress_content(content, encoding)
+
+    if holes:
+        allow_cache_holes(request, holes)
+        fill_response_cache_holes(response, request)
+    return response
 
 
 def get_xframe_cache(page):
@@ -111,7 +450,7 @@ def set_xframe_cache(page, xframe_options):
     cache.set('cms:xframe_options:%s' % page.pk,
               xframe_options,
               version=_get_cache_version())
-    _set_cache_version(_get_cache_version())
+    _set_cache_version(_get_cache_version(bypass=True))
 
 
 def _page_url_key(page_lookup, lang, site_id):
@@ -123,7 +462,7 @@ def set_page_url_cache(page_lookup, lang, site_id, url):
     cache.set(_page_url_key(page_lookup, lang, site_id),
               url,
               get_cms_setting('CACHE_DURATIONS')['content'], version=_get_cache_version())
-    _set_cache_version(_get_cache_version())
+    _set_cache_version(_get_cache_version(bypass=True))
 
 
 def get_page_url_cache(page_lookup, lang, site_id):
@@ -16,10 +16,10 @@ def get_cache_permission_version_key():
     return "{}:permission:version".format(get_cms_setting('CACHE_PREFIX'))
 
 
-def get_cache_permission_version():
-    from django.core.cache import cache
+def get_cache_permission_version(bypass=False):
+    from cms.cache.local import get_version
     try:
-        version = int(cache.get(get_cache_permission_version_key()))
+        version = int(get_version(get_cache_permission_version_key(), bypass=bypass))
     except Exception:
         version = 1
     return int(version)
@@ -58,9 +58,12 @@ def clear_user_permission_cache(user):
 
 def clear_permission_cache():
     from django.core.cache import cache
-    version = get_cache_permission_version()
+
+    from cms.cache.local import forget_version, set_version
+    version = get_cache_permission_version(bypass=True)
     if version > 1:
         cache.incr(get_cache_permission_version_key())
+        forget_version(get_cache_permission_version_key())
     else:
-        cache.set(get_cache_permission_version_key(), 2,
-                  get_cms_setting('CACHE_DURATIONS')['permissions'])
+        set_version(get_cache_permission_version_key(), 2,
+                    get_cms_setting('CACHE_DURATIONS')['permissions'])
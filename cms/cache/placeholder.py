@@ -15,6 +15,14 @@ the current HTTPRequest object.
 
 The vary-on header-names are also stored with the version. This enables us to
 check for cache hits without re-computing placeholder.get_vary_cache_on().
+When writing, the content renderer passes the duration and vary-on
+header-names it has computed while rendering the placeholder.
+
+If :setting:`CMS_PLACEHOLDER_CACHE_SELF_VALIDATING` is set, the content is
+instead stored in an entry whose key does not depend on the version. The entry
+holds the version it was rendered for, and is read together with the version
+in a single cache lookup. Placeholders whose content varies store the vary-on
+header-names in this entry, and their content under the usual key.
 """
 import hashlib
 import time
@@ -50,15 +58,16 @@ def _get_placeholder_cache_version_key(placeholder, lang, site_id):
     return key
 
 
-def _get_placeholder_cache_version(placeholder, lang, site_id):
+def _get_placeholder_cache_version(placeholder, lang, site_id, bypass=False):
     """
     Gets the (placeholder x lang)'s current version and vary-on header-names
-    list, if present, otherwise resets to («timestamp», []).
+    list, if present, otherwise resets to («timestamp», []). See
+    cms.cache.local for «bypass».
     """
-    from django.core.cache import cache
+    from cms.cache.local import get_version
 
     key = _get_placeholder_cache_version_key(placeholder, lang, site_id)
-    cached = cache.get(key)
+    cached = get_version(key, bypass=bypass)
     if cached:
         version, vary_on_list = cached
     else:
@@ -72,7 +81,7 @@ def _set_placeholder_cache_version(placeholder, lang, site_id, version, vary_on_
     """
     Sets the (placeholder x lang)'s version and vary-on header-names list.
     """
-    from django.core.cache import cache
+    from cms.cache.local import set_version
 
     key = _get_placeholder_cache_version_key(placeholder, lang, site_id)
 
@@ -82,7 +91,7 @@ def _set_placeholder_cache_version(placeholder, lang, site_id, version, vary_on_
     if vary_on_list is None:
         vary_on_list = []
 
-    cache.set(key, (version, vary_on_list), duration)
+    set_version(key, (version, vary_on_list), duration)
 
 
 def _get_placeholder_cache_key(placeholder, lang, site_id, request, soft=False):
@@ -94,10 +103,7 @@ def _get_placeholder_cache_key(placeholder, lang, site_id, request, soft=False):
     read from the cache. If instead the key retrieval is to support a cache
     write, let «soft» be False.
     """
-    prefix = get_cms_setting('CACHE_PREFIX')
-    version, vary_on_list = _get_placeholder_cache_version(placeholder, lang, site_id)
-    tz = get_timezone_name()
-    main_key = f"{prefix}|render_placeholder|id:{placeholder.pk}|lang:{lang}|site:{site_id}|tz:{tz}|v:{version}"
+    version, vary_on_list = _get_placeholder_cache_version(placeholder, lang, site_id, bypass=not soft)
 
     if not soft:
         # We are about to write to the cache, so we want to get the latest
@@ -105,11 +111,23 @@ def _get_placeholder_cache_key(placeholder, lang, site_id, request, soft=False):
         # we already have. If the placeholder has already been rendered, this
         # will be very efficient (zero-additional queries) due to the caching
         # of all its plugins during the rendering process anyway.
-        vary_on_list = placeholder.get_vary_cache_on(request)
-        duration = placeholder.get_cache_expiration(request, now())
+        duration, vary_on_list = placeholder.get_cache_metadata(request, now())
         # Update the main placeholder cache version
         _set_placeholder_cache_version(
             placeholder, lang, site_id, version, vary_on_list, duration)
+    return _get_placeholder_cache_versioned_key(
+        placeholder, lang, site_id, request, version=version, vary_on_list=vary_on_list,
+    )
+
+
+def _get_placeholder_cache_versioned_key(placeholder, lang, site_id, request, *, version, vary_on_list):
+    """
+    Returns the fully-addressed cache key for the given placeholder, the
+    request and the placeholder's cache «version» and «vary_on_list».
+    """
+    prefix = get_cms_setting('CACHE_PREFIX')
+    tz = get_timezone_name()
+    main_key = f"{prefix}|render_placeholder|id:{placeholder.pk}|lang:{lang}|site:{site_id}|tz:{tz}|v:{version}"
 
     sub_key_list = []
     for key in vary_on_list:
@@ -135,21 +153,125 @@ def _get_placeholder_cache_key(placeholder, lang, site_id, request, soft=False):
     return cache_key
 
 
-def set_placeholder_cache(placeholder, lang, site_id, content, request):
+def _get_placeholder_cache_entry_key(placeholder, lang, site_id):
+    """
+    Returns the key of the self-validating cache entry for the given
+    «placeholder», «lang», «site_id» and the current time zone.
+    """
+    prefix = get_cms_setting('CACHE_PREFIX')
+    tz = get_timezone_name()
+    key = f'{prefix}|placeholder_cache_entry|id:{placeholder.pk}|lang:{lang}|site:{site_id}|tz:{tz}'
+    # See _get_placeholder_cache_version_key()
+    if len(key) > 200:
+        key = '{prefix}|{hash}'.format(
+            prefix=prefix,
+            hash=hashlib.sha1(key.encode('utf-8')).hexdigest(),
+        )
+    return key
+
+
+def _set_placeholder_cache_entry(placeholder, lang, site_id, content, request, *, duration, vary_on_list):
+    """
+    Stores the self-validating cache entry ``(version, vary_on_list, content)``
+    for the placeholder. The entry is checked against the current version when
+    read, so the version does not need to be touched.
+    """
+    from django.core.cache import cache
+
+    version, _ = _get_placeholder_cache_version(placeholder, lang, site_id, bypass=True)
+    entry_key = _get_placeholder_cache_entry_key(placeholder, lang, site_id)
+
+    if vary_on_list:
+        content_key = _get_placeholder_cache_versioned_key(
+            placeholder, lang, site_id, request, version=version, vary_on_list=vary_on_list,
+        )
+        cache.set_many({entry_key: (version, vary_on_list, None), content_key: content}, duration)
+    else:
+        cache.set(entry_key, (version, [], content), duration)
+
+
+def _get_placeholder_cache_entries(placeholders, lang, site_id, request):
+    """
+    Like get_placeholder_caches(), but for the self-validating cache entries.
+    Only placeholders whose content varies need a second cache lookup.
+    """
+    from django.core.cache import cache
+
+    from cms.cache.local import get_many_with_versions, set_versions
+
+    keys = [
+        (
+            placeholder,
+            _get_placeholder_cache_version_key(placeholder, lang, site_id),
+            _get_placeholder_cache_entry_key(placeholder, lang, site_id),
+        )
+        for placeholder in placeholders
+    ]
+    cached = get_many_with_versions(
+        [version_key for _, version_key, _ in keys],
+        [entry_key for _, _, entry_key in keys],
+    )
+    new_version = int(time.time() * 1000000)
+    missing_versions = {}
+    contents = {}
+    content_keys = {}
+
+    for placeholder, version_key, entry_key in keys:
+        current = cached.get(version_key)
+        entry = cached.get(entry_key)
+
+        if not current:
+            # See get_placeholder_caches()
+            missing_versions[version_key] = (new_version, [])
+        elif entry and entry[0] == current[0]:
+            version, vary_on_list, content = entry
+
+            if vary_on_list:
+                content_key = _get_placeholder_cache_versioned_key(
+                    placeholder, lang, site_id, request, version=version, vary_on_list=vary_on_list,
+                )
+                content_keys[content_key] = placeholder.pk
+            else:
+                contents[placeholder.pk] = content
+
+    if missing_versions:
+        set_versions(missing_versions, None)
+
+    if content_keys:
+        cached_contents = cache.get_many(list(content_keys))
+        contents.update({content_keys[key]: content for key, content in cached_contents.items()})
+    return contents
+
+
+def set_placeholder_cache(placeholder, lang, site_id, content, request, *, duration=None, vary_on_list=None):
     """
     Sets the (correct) placeholder cache with the rendered placeholder.
+    Unless given, the «duration» and «vary_on_list» are derived from the
+    placeholder's plugins.
     """
     from django.core.cache import cache
 
-    key = _get_placeholder_cache_key(placeholder, lang, site_id, request)
+    if duration is None or vary_on_list is None:
+        ttl, placeholder_vary_on_list = placeholder.get_cache_metadata(request, now())
+
+        if duration is None:
+            duration = min(get_cms_setting('CACHE_DURATIONS')['content'], ttl)
+
+        if vary_on_list is None:
+            vary_on_list = placeholder_vary_on_list
 
-    duration = min(
-        get_cms_setting('CACHE_DURATIONS')['content'],
-        placeholder.get_cache_expiration(request, now())
+    if get_cms_setting('PLACEHOLDER_CACHE_SELF_VALIDATING'):
+        _set_placeholder_cache_entry(
+            placeholder, lang, site_id, content, request, duration=duration, vary_on_list=vary_on_list,
+        )
+        return
+
+    version, _ = _get_placeholder_cache_version(placeholder, lang, site_id, bypass=True)
+    key = _get_placeholder_cache_versioned_key(
+        placeholder, lang, site_id, request, version=version, vary_on_list=vary_on_list,
     )
     cache.set(key, content, duration)
     # "touch" the cache-version, so that it stays as fresh as this content.
-    version, vary_on_list = _get_placeholder_cache_version(placeholder, lang, site_id)
     _set_placeholder_cache_version(
         placeholder, lang, site_id, version, vary_on_list, duration=duration
     )
@@ -162,11 +284,58 @@ def get_placeholder_cache(placeholder, lang, site_id, request):
     """
     from django.core.cache import cache
 
+    if get_cms_setting('PLACEHOLDER_CACHE_SELF_VALIDATING'):
+        return _get_placeholder_cache_entries([placeholder], lang, site_id, request).get(placeholder.pk)
+
     key = _get_placeholder_cache_key(placeholder, lang, site_id, request, soft=True)
     content = cache.get(key)
     return content
 
 
+def get_placeholder_caches(placeholders, lang, site_id, request):
+    """
+    Returns a dictionary mapping the primary keys of «placeholders» to their
+    cached content, like get_placeholder_cache() but with two cache round
+    trips for all placeholders. Placeholders without cached content are
+    left out.
+    """
+    from django.core.cache import cache
+
+    from cms.cache.local import get_versions, set_versions
+
+    if get_cms_setting('PLACEHOLDER_CACHE_SELF_VALIDATING'):
+        return _get_placeholder_cache_entries(placeholders, lang, site_id, request)
+
+    version_keys = {
+        _get_placeholder_cache_version_key(placeholder, lang, site_id): placeholder
+        for placeholder in placeholders
+    }
+    versions = get_versions(list(version_keys))
+    # Like _get_placeholder_cache_version(), set the missing versions.
+    # There's no content for these placeholders.
+    new_version = int(time.time() * 1000000)
+    missing_versions = {key: (new_version, []) for key in version_keys if not versions.get(key)}
+
+    if missing_versions:
+        set_versions(missing_versions, None)
+
+    content_keys = {}
+
+    for key, cached in versions.items():
+        if cached:
+            placeholder = version_keys[key]
+            version, vary_on_list = cached
+            content_key = _get_placeholder_cache_versioned_key(
+                placeholder, lang, site_id, request, version=version, vary_on_list=vary_on_list,
+            )
+            content_keys[content_key] = placeholder.pk
+
+    if not content_keys:
+        return {}
+    cached_contents = cache.get_many(list(content_keys))
+    return {content_keys[key]: content for key, content in cached_contents.items()}
+
+
 def clear_placeholder_cache(placeholder, lang, site_id):
     """
     Invalidates all existing cache entries for (placeholder x lang x site_id).
@@ -0,0 +1,152 @@
+"""
+This module manages the plugin fragment cache (see
+:setting:`CMS_PLUGIN_FRAGMENT_CACHE`). It keeps the rendered content of single
+plugins, so that plugins which can be cached are not rendered again when their
+placeholder cannot be cached as a whole.
+
+The content of a plugin includes the content of its children. The cache key
+is derived from the primary keys, positions and ``changed_date`` of the whole
+plugin tree, so changing any of these plugins makes the entry inaccessible.
+Entries are not invalidated otherwise, they expire.
+"""
+import hashlib
+import warnings
+from datetime import datetime, timedelta
+
+from django.utils.encoding import force_str
+
+from cms.cache.holes import is_cache_hole
+from cms.utils.conf import get_cms_setting
+from cms.utils.helpers import get_header_name, get_timezone_name
+
+
+def get_plugin_cache_ttl(plugin, instance, expiration, response_timestamp):
+    """
+    Returns the number of seconds (from «response_timestamp») the «expiration»
+    returned by the ``get_cache_expiration()`` of «plugin» allows caching
+    «instance», or ``None`` if it does not restrict caching.
+    """
+    # The expiration should only ever be either: None, a TZ-
+    # aware datetime, a timedelta, or an integer.
+    if expiration is None:
+        # Do not consider plugins that return None
+        return None
+    if isinstance(expiration, (datetime, timedelta)):
+        if isinstance(expiration, datetime):
+            # We need to convert this to a TTL against the
+            # response timestamp.
+            try:
+                delta = expiration - response_timestamp
+            except TypeError:
+                # Attempting to take the difference of a naive datetime
+                # and a TZ-aware one results in a TypeError. Ignore
+                # this plugin.
+                warnings.warn(
+                    'Plugin %(plugin_class)s (%(pk)d) returned a naive '
+                    'datetime : %(value)s for get_cache_expiration(), '
+                    'ignoring.' % {
+                        'plugin_class': plugin.__class__.__name__,
+                        'pk': instance.pk,
+                        'value': force_str(expiration),
+                    })
+                return None
+        else:
+            # Its already a timedelta instance...
+            delta = expiration
+        return int(delta.total_seconds() + 0.5)
+
+    try:  # must be an int-like value
+        return int(expiration)
+    except ValueError:
+        # Looks like it was not very int-ish. Ignore this plugin.
+        warnings.warn(
+            'Plugin %(plugin_class)s (%(pk)d) returned '
+            'unexpected value %(value)s for '
+            'get_cache_expiration(), ignoring.' % {
+                'plugin_class': plugin.__class__.__name__,
+                'pk': instance.pk,
+                'value': force_str(expiration),
+            })
+        return None
+
+
+def _get_plugin_tree(instance):
+    plugins = [instance]
+
+    for child in instance.child_plugin_instances or []:
+        plugins.extend(_get_plugin_tree(child))
+    return plugins
+
+
+def get_plugin_cache_policy(instance, placeholder, request, response_timestamp):
+    """
+    Returns the ``(ttl, vary_on_list)`` tuple for caching the content of
+    «instance» and its children, or ``None`` if it cannot be cached.
+    """
+    ttl = get_cms_setting('CACHE_DURATIONS')['content']
+    vary_on_list = set()
+
+    for tree_instance in _get_plugin_tree(instance):
+        plugin = tree_instance.get_plugin_class_instance()
+        expiration = plugin.get_cache_expiration(request, tree_instance, placeholder)
+
+        if is_cache_hole(plugin, expiration):
+            return None
+
+        plugin_ttl = get_plugin_cache_ttl(plugin, tree_instance, expiration, response_timestamp)
+
+        if plugin_ttl is not None:
+            ttl = min(ttl, plugin_ttl)
+
+        vary_on = plugin.get_vary_cache_on(request, tree_instance, placeholder)
+
+        if isinstance(vary_on, str):
+            vary_on_list.add(vary_on.lower())
+        elif vary_on:
+            vary_on_list.update(header.lower() for header in vary_on)
+
+    if ttl <= 0:
+        return None
+    return ttl, sorted(vary_on_list)
+
+
+def _get_plugin_cache_key(instance, site_id, request, vary_on_list):
+    prefix = get_cms_setting('CACHE_PREFIX')
+    tz = get_timezone_name()
+    tree = ';'.join(
+        f'{plugin.pk}:{plugin.position}:{plugin.changed_date.timestamp()}'
+        for plugin in _get_plugin_tree(instance)
+    )
+    tree_hash = hashlib.sha1(tree.encode('utf-8')).hexdigest()
+    key = (
+        f'{prefix}|render_plugin|id:{instance.pk}|lang:{instance.language}|site:{site_id}|tz:{tz}'
+        f'|tree:{tree_hash}'
+    )
+
+    for header in vary_on_list:
+        value = request.META.get(get_header_name(header)) or '_'
+        key += f'|{header}:{value}'
+
+    # See cms.cache.placeholder._get_placeholder_cache_version_key()
+    if len(key) > 200:
+        key = '{prefix}|{hash}'.format(
+            prefix=prefix,
+            hash=hashlib.sha1(key.encode('utf-8')).hexdigest(),
+        )
+    return key
+
+
+def get_plugin_cache(instance, site_id, request, vary_on_list):
+    """
+    Returns a dictionary with the cached content and sekizai data of «instance»,
+    or ``None`` if there is none.
+    """
+    from django.core.cache import cache
+
+    return cache.get(_get_plugin_cache_key(instance, site_id, request, vary_on_list))
+
+
+def set_plugin_cache(instance, site_id, request, content, *, ttl, vary_on_list):
+    from django.core.cache import cache
+
+    cache.set(_get_plugin_cache_key(instance, site_id, request, vary_on_list), content, ttl)
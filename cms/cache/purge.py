@@ -0,0 +1,102 @@
+"""
+This module forwards page cache invalidations to caches outside of Django,
+such as a CDN. Pages carry their page cache tags in the headers listed in
+:setting:`CMS_PAGE_CACHE_SURROGATE_KEY_HEADERS`, and whenever these tags are
+invalidated the backend configured in :setting:`CMS_PAGE_CACHE_PURGE_BACKEND`
+is asked to purge all pages tagged with them.
+"""
+import logging
+from functools import lru_cache
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from cms.utils.conf import get_cms_setting
+
+logger = logging.getLogger(__name__)
+
+
+class BasePurgeBackend:
+    """
+    Base class of the purge backends. Subclasses implement ``purge()`` and
+    ``purge_all()``, e.g. by calling the purge API of a CDN.
+    """
+
+    def purge(self, tags):
+        """
+        Purges all pages tagged with any of the page cache «tags».
+        """
+        raise NotImplementedError
+
+    def purge_all(self):
+        """
+        Purges all pages.
+        """
+        raise NotImplementedError
+
+
+class LoggingPurgeBackend(BasePurgeBackend):
+    """
+    Logs the purges to the ``cms.cache.purge`` logger instead of purging
+    anything. Meant for development and testing, configure a file handler
+    for the logger to get a purge log.
+    """
+
+    def purge(self, tags):
+        logger.info('Purging page cache tags: %s', ' '.join(tags))
+
+    def purge_all(self):
+        logger.info('Purging all pages')
+
+
+@lru_cache
+def _load_purge_backend(path):
+    try:
+        backend_class = import_string(path)
+    except ImportError as err:
+        raise ImproperlyConfigured(
+            f'Unable to import the CMS_PAGE_CACHE_PURGE_BACKEND "{path}".'
+        ) from err
+    return backend_class()
+
+
+def get_purge_backend():
+    """
+    Returns the configured purge backend instance or ``None``.
+    """
+    path = get_cms_setting('PAGE_CACHE_PURGE_BACKEND')
+    return _load_purge_backend(path) if path else None
+
+
+def purge_page_cache_tags(tags):
+    """
+    Purges all pages tagged with any of the page cache «tags» once the
+    current transaction is committed, so that the pages are not cached
+    again before the changes are visible.
+    """
+    backend = get_purge_backend()
+
+    if backend and tags:
+        tags = list(tags)
+        transaction.on_commit(lambda: backend.purge(tags))
+
+
+def purge_page_cache():
+    """
+    Purges all pages once the current transaction is committed.
+    """
+    backend = get_purge_backend()
+
+    if backend:
+        transaction.on_commit(backend.purge_all)
+
+
+def get_surrogate_key_header_value(header, tags):
+    """
+    Returns the value of the response «header» listing the page cache «tags».
+    Fastly's ``Surrogate-Key`` header separates them by spaces, others (like
+    Cloudflare's ``Cache-Tag``) by commas.
+    """
+    separator = ' ' if header.lower() == 'surrogate-key' else ','
+    return separator.join(tags)
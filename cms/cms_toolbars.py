@@ -25,6 +25,7 @@ from cms.utils.compat import DJANGO_4_2
 from cms.utils.compat.warnings import RemovedInDjangoCMS43Warning
 from cms.utils.conf import get_cms_setting
 from cms.utils.i18n import get_language_dict, get_language_tuple
+from cms.utils.instrumentation import format_summary_entry, get_render_metrics
 from cms.utils.page_permissions import (
     user_can_change_page,
     user_can_delete_page,
@@ -67,6 +68,7 @@ REMOVE_PAGE_LANGUAGE_BREAK = "Remove page language Break"
 COPY_PAGE_LANGUAGE_BREAK = "Copy page language Break"
 TOOLBAR_DISABLE_BREAK = 'Toolbar disable Break'
 SHORTCUTS_BREAK = 'Shortcuts Break'
+RENDER_METRICS_MENU_IDENTIFIER = 'render-metrics'
 
 
 @toolbar_pool.register
@@ -221,6 +223,29 @@ class PlaceholderToolbar(CMSToolbar):
         )
 
 
+@toolbar_pool.register
+class RenderMetricsToolbar(CMSToolbar):
+    """
+    Shows the render metrics (see :setting:`CMS_RENDER_INSTRUMENTATION`) of the
+    content rendered below the toolbar.
+    """
+
+    def post_template_populate(self):
+        metrics = get_render_metrics(self.request, create=False)
+
+        if not metrics or not metrics.metrics:
+            return
+
+        menu = self.toolbar.get_or_create_menu(
+            RENDER_METRICS_MENU_IDENTIFIER,
+            _('Render metrics'),
+            side=self.toolbar.RIGHT,
+        )
+
+        for entry in metrics.get_summary():
+            menu.add_link_item(format_summary_entry(entry), url='#', disabled=True)
+
+
 @toolbar_pool.register
 class AppearanceToolbar(CMSToolbar):
     """
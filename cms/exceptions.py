@@ -12,6 +12,15 @@ class PluginLimitReached(Exception):
     pass
 
 
+class PluginTreePathOverflow(Exception):
+    """
+    Gets triggered when the tree path of a plugin does not fit into its field, i.e. the plugin
+    is nested too deep or the id of one of its ancestors has too many digits.
+    """
+
+    pass
+
+
 class AppAlreadyRegistered(Exception):
     pass
 
@@ -2,6 +2,7 @@ from collections import OrderedDict
 
 import cms
 
+from .subcommands.bake import BakeCommand
 from .subcommands.base import SubcommandsCommand
 from .subcommands.check import CheckInstallation
 from .subcommands.copy import CopyCommand
@@ -9,17 +10,20 @@ from .subcommands.delete_orphaned_plugins import DeleteOrphanedPluginsCommand
 from .subcommands.list import ListCommand
 from .subcommands.tree import FixTreeCommand
 from .subcommands.uninstall import UninstallCommand
+from .subcommands.warm_cache import WarmCacheCommand
 
 
 class Command(SubcommandsCommand):
     command_name = 'cms'
     subcommands = OrderedDict((
+        ('bake', BakeCommand),
         ('check', CheckInstallation),
         ('copy', CopyCommand),
         ('delete-orphaned-plugins', DeleteOrphanedPluginsCommand),
         ('fix-tree', FixTreeCommand),
         ('list', ListCommand),
         ('uninstall', UninstallCommand),
+        ('warm-cache', WarmCacheCommand),
     ))
     missing_args_message = 'one of the available sub commands must be provided'
 
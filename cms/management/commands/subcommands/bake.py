@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+from urllib.parse import unquote
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import CommandError
+from django.db.models import Count, Max
+from django.test import Client
+
+from cms.models import CMSPlugin, Page, PageContent, Placeholder
+from cms.sitemaps import CMSSitemap
+from cms.utils import get_current_site
+from cms.utils.placeholder import get_declared_placeholders_for_obj
+
+from .base import SubcommandsCommand
+from .warm_cache import get_public_page_urls
+
+MANIFEST_NAME = '.cms-bake.json'
+
+
+def _plugins_fingerprint(plugins):
+    # Deleting a plugin does not leave a changed date behind, and moving
+    # plugins updates the positions and parents of other plugins without
+    # changing theirs, so the whole tree of each placeholder is hashed.
+    rows = plugins.order_by('placeholder_id', 'language', 'position').values_list(
+        'placeholder_id', 'language', 'pk', 'position', 'parent_id', 'changed_date',
+    )
+    digest = hashlib.sha256()
+    for row in rows.iterator():
+        digest.update(repr(row).encode())
+    return [digest.hexdigest()]
+
+
+def get_site_fingerprint(site):
+    """
+    Returns a fingerprint of the content shared by all pages of «site»:
+    the page tree and titles (menus) and the static placeholders.
+    """
+    pages = Page.objects.on_site(site).aggregate(count=Count('pk'), changed=Max('changed_date'))
+    contents = PageContent.objects.filter(page__site=site).aggregate(
+        count=Count('pk'), changed=Max('changed_date'),
+    )
+    static_plugins = CMSPlugin.objects.filter(placeholder__static_public__isnull=False)
+    return [
+        pages['count'], str(pages['changed']),
+        contents['count'], str(contents['changed']),
+        *_plugins_fingerprint(static_plugins),
+    ]
+
+
+def get_page_fingerprint(page_url):
+    """
+    Returns a fingerprint of the content of the page behind «page_url»:
+    the page, its content object and the plugins in its placeholders,
+    including the placeholders of its ancestors it inherits.
+    """
+    page_content = PageContent.objects.get(pk=page_url.content_pk)
+    placeholders = Placeholder.objects.get_for_obj(page_content)
+    inherited_slots = [
+        placeholder.slot for placeholder in get_declared_placeholders_for_obj(page_content)
+        if placeholder.inherit
+    ]
+
+    if inherited_slots:
+        ancestor_placeholders = Placeholder.objects.filter(
+            content_type=ContentType.objects.get_for_model(PageContent),
+            object_id__in=PageContent.admin_manager.filter(
+                page__in=page_url.page.get_ancestor_pages(),
+                language=page_url.language,
+            ).values('pk'),
+            slot__in=inherited_slots,
+        )
+        placeholders = placeholders | ancestor_placeholders
+    plugins = CMSPlugin.objects.filter(placeholder__in=placeholders, language=page_url.language)
+    return [
+        page_url.language,
+        str(page_url.page.changed_date),
+        str(page_content.changed_date),
+        *_plugins_fingerprint(plugins),
+    ]
+
+
+class BakeCommand(SubcommandsCommand):
+    help_string = ('Render all public pages of the current site into a directory tree '
+                   'of static html files')
+    command_name = 'bake'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output_dir', help='Directory the html files are written to.')
+        parser.add_argument('--manifest', action='store', dest='manifest', default=None,
+                            help='File the state of the last run is kept in. Defaults to a '
+                                 f'{MANIFEST_NAME} file next to the output directory.')
+        parser.add_argument('--language', action='append', dest='languages', default=[],
+                            help='Only bake pages in this language; may be given multiple times.')
+        parser.add_argument('--incremental', action='store_true', dest='incremental', default=False,
+                            help='Only bake pages whose content changed since the last run.')
+        parser.add_argument('--host', action='store', dest='host', default=None,
+                            help='Host header sent with each request. Defaults to the domain of '
+                                 'the current site.')
+        parser.add_argument('--secure', action='store_true', dest='secure', default=False,
+                            help='Render the pages as if requested over HTTPS.')
+
+    def get_file_path(self, output_dir, location):
+        path = unquote(location).strip('/')
+        file_path = os.path.normpath(os.path.join(output_dir, path, 'index.html'))
+        if not file_path.startswith(os.path.join(output_dir, '')):
+            raise CommandError(f'Refusing to write {location} outside of {output_dir}')
+        return file_path
+
+    def get_manifest_path(self, output_dir, manifest=None):
+        # The manifest is kept out of the output directory, which is public
+        if manifest:
+            return os.path.abspath(manifest)
+        return f'{output_dir}{MANIFEST_NAME}'
+
+    def load_manifest(self, manifest_path):
+        try:
+            with open(manifest_path) as manifest:
+                return json.load(manifest)
+        except (OSError, ValueError):
+            return {}
+
+    def save_manifest(self, manifest_path, manifest):
+        with open(manifest_path, 'w') as manifest_file:
+            json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+
+    def handle(self, *args, **options):
+        verbose = options.get('verbosity') > 1
+        output_dir = os.path.abspath(options.get('output_dir'))
+        site = get_current_site()
+        client = Client(raise_request_exception=False, HTTP_HOST=options.get('host') or site.domain)
+        secure = options.get('secure')
+
+        os.makedirs(output_dir, exist_ok=True)
+        manifest_path = self.get_manifest_path(output_dir, options.get('manifest'))
+        previous = self.load_manifest(manifest_path)
+        previous_pages = previous.get('pages', {})
+        site_fingerprint = get_site_fingerprint(site)
+        # Without a matching site fingerprint (menus or static placeholders
+        # changed) every page needs baking
+        site_unchanged = previous.get('site') == site_fingerprint
+        incremental = options.get('incremental') and site_unchanged
+
+        languages = options.get('languages')
+        sitemap = CMSSitemap()
+        # Pages in languages not baked this time are kept as they are,
+        # marked as outdated if the site fingerprint changed
+        pages = {
+            location: fingerprint if site_unchanged else fingerprint[:1]
+            for location, fingerprint in previous_pages.items()
+            if languages and fingerprint[0] not in languages
+        }
+        baked = unchanged = 0
+        failures = []
+        for page_url in get_public_page_urls(languages):
+            location = sitemap.location(page_url)
+            if not location:
+                continue
+            fingerprint = get_page_fingerprint(page_url)
+            file_path = self.get_file_path(output_dir, location)
+            if incremental and previous_pages.get(location) == fingerprint and os.path.exists(file_path):
+                pages[location] = fingerprint
+                unchanged += 1
+                continue
+
+            response = client.get(location, secure=secure)
+            if response.status_code != 200:
+                failures.append((location, response.status_code))
+                if location in previous_pages:
+                    # Keep the previous file, and bake it again next time
+                    pages[location] = [page_url.language]
+                continue
+
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, 'wb') as html_file:
+                html_file.write(response.content)
+            pages[location] = fingerprint
+            baked += 1
+            if verbose:
+                self.stdout.write(f'baked {location}\n')
+
+        # Remove the files of pages which are no longer public
+        for location in set(previous_pages) - set(pages):
+            file_path = self.get_file_path(output_dir, location)
+            if os.path.exists(file_path):
+                os.remove(file_path)
+                if verbose:
+                    self.stdout.write(f'removed {location}\n')
+
+        self.save_manifest(manifest_path, {'site': site_fingerprint, 'pages': pages})
+        self.stdout.write(f'baked {baked} pages, {unchanged} unchanged\n')
+        for location, status in failures:
+            self.stderr.write(f'failed: {location} ({status})\n')
+        if failures:
+            raise CommandError(f'{len(failures)} pages failed to render')
@@ -1,6 +1,7 @@
 from collections import OrderedDict
 
 from cms.models.pagemodel import Page
+from cms.models.pluginmodel import CMSPlugin
 
 from .base import SubcommandsCommand
 
@@ -21,7 +22,7 @@ def get_descendants(root):
 
 
 class FixTreeCommand(SubcommandsCommand):
-    help_string = 'Repairing Materialized Path Tree for Pages'
+    help_string = 'Repairing Materialized Path Tree for Pages and the tree paths of plugins'
     command_name = 'fix-tree'
 
     def handle(self, *args, **options):
@@ -51,6 +52,10 @@ class FixTreeCommand(SubcommandsCommand):
 
         for root in root_pages.order_by('site__pk', 'path'):
             self._update_descendants_tree(root)
+
+        self.stdout.write('fixing plugin tree paths')
+        fixed = CMSPlugin.fix_tree_paths()
+        self.stdout.write(f'fixed the tree paths of {fixed} plugins')
         self.stdout.write('all done')
 
     def _update_descendants_tree(self, root):
@@ -0,0 +1,110 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management import CommandError
+from django.db import connections
+from django.test import Client
+
+from cms.sitemaps import CMSSitemap
+from cms.utils import get_current_site
+
+from .base import SubcommandsCommand
+
+
+def percentile(timings, percent):
+    """
+    Returns the «percent» percentile of the sorted list «timings»
+    (nearest-rank method).
+    """
+    if not timings:
+        return 0
+    index = max(int(round(percent / 100 * len(timings))) - 1, 0)
+    return timings[index]
+
+
+def get_public_page_urls(languages=None):
+    """
+    Returns the ``PageUrl`` objects of all public pages of the current site,
+    optionally limited to «languages».
+    """
+    page_urls = CMSSitemap().items()
+    if languages:
+        page_urls = [page_url for page_url in page_urls if page_url.language in languages]
+    return page_urls
+
+
+class WarmCacheCommand(SubcommandsCommand):
+    help_string = ('Render all public pages of the current site to populate the page, '
+                   'placeholder and menu caches')
+    command_name = 'warm-cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--language', action='append', dest='languages', default=[],
+                            help='Only warm pages in this language; may be given multiple times.')
+        parser.add_argument('--concurrency', action='store', dest='concurrency', type=int, default=1,
+                            help='Number of pages rendered at the same time.')
+        parser.add_argument('--host', action='store', dest='host', default=None,
+                            help='Host header sent with each request. Defaults to the domain of '
+                                 'the current site.')
+        parser.add_argument('--secure', action='store_true', dest='secure', default=False,
+                            help='Render the pages as if requested over HTTPS.')
+
+    def get_urls(self, languages):
+        sitemap = CMSSitemap()
+        locations = (sitemap.location(page_url) for page_url in get_public_page_urls(languages))
+        return [location for location in locations if location]
+
+    def warm_url(self, url, host, secure):
+        client = Client(raise_request_exception=False, HTTP_HOST=host)
+        start = time.monotonic()
+        try:
+            response = client.get(url, secure=secure)
+        except Exception as e:
+            status, error = None, str(e)
+        else:
+            status, error = response.status_code, None
+        finally:
+            if self.concurrency > 1:
+                # Worker threads hold their own database connections
+                connections.close_all()
+        return url, status, error, time.monotonic() - start
+
+    def collect_results(self, results, total, verbose):
+        timings = []
+        failures = []
+        for count, (url, status, error, duration) in enumerate(results, start=1):
+            timings.append(duration)
+            if error or status >= 400:
+                failures.append((url, error or status))
+            if verbose:
+                self.stdout.write(f'[{count}/{total}] {url} {status} {duration * 1000:.0f}ms\n')
+        return timings, failures
+
+    def handle(self, *args, **options):
+        verbose = options.get('verbosity') > 1
+        self.concurrency = max(options.get('concurrency'), 1)
+        host = options.get('host') or get_current_site().domain
+        secure = options.get('secure')
+        urls = self.get_urls(options.get('languages'))
+
+        self.stdout.write(f'warming {len(urls)} pages\n')
+        start = time.monotonic()
+
+        if self.concurrency > 1:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                results = executor.map(lambda url: self.warm_url(url, host, secure), urls)
+                timings, failures = self.collect_results(results, len(urls), verbose)
+        else:
+            results = (self.warm_url(url, host, secure) for url in urls)
+            timings, failures = self.collect_results(results, len(urls), verbose)
+
+        timings.sort()
+        p50, p90, p99 = (percentile(timings, percent) * 1000 for percent in (50, 90, 99))
+        self.stdout.write(
+            f'warmed {len(urls) - len(failures)} pages in {time.monotonic() - start:.2f}s '
+            f'(p50 {p50:.0f}ms, p90 {p90:.0f}ms, p99 {p99:.0f}ms)\n'
+        )
+        for url, reason in failures:
+            self.stderr.write(f'failed: {url} ({reason})\n')
+        if failures:
+            raise CommandError(f'{len(failures)} of {len(urls)} pages failed to render')
@@ -0,0 +1,44 @@
+"""
+Page cache middleware
+"""
+from django.conf import settings
+from django.utils.deprecation import MiddlewareMixin
+
+from cms.cache.page import get_page_cache_response
+from cms.utils.conf import get_cms_setting
+
+
+class PageCacheMiddleware(MiddlewareMixin):
+    """
+    Serves anonymous requests straight from the CMS page cache.
+
+    Should be placed near the top of ``MIDDLEWARE``, above the session,
+    authentication and toolbar middleware. On a cache hit the response is
+    returned right away and none of the remaining middleware, nor the
+    ``details`` view, run for the request.
+    """
+
+    def is_cacheable_request(self, request):
+        if not get_cms_setting('PAGE_CACHE'):
+            return False
+
+        if request.method not in ('GET', 'HEAD'):
+            return False
+
+        if settings.SESSION_COOKIE_NAME in request.COOKIES:
+            # The request might belong to a logged-in user or
+            # to a user with the toolbar enabled.
+            return False
+
+        toolbar_params = (
+            get_cms_setting('CMS_TOOLBAR_URL__ENABLE'),
+            get_cms_setting('CMS_TOOLBAR_URL__DISABLE'),
+        )
+        return not any(param in request.GET for param in toolbar_params)
+
+    def process_request(self, request):
+        if not self.is_cacheable_request(request):
+            return None
+        # Hole-punched plugins are rendered by the details view,
+        # they might need the session or the current user.
+        return get_page_cache_response(request, allow_holes=False)
@@ -11,6 +11,7 @@ from django.utils.functional import SimpleLazyObject
 from cms.toolbar.toolbar import CMSToolbar
 from cms.toolbar.utils import get_toolbar_from_request
 from cms.utils.conf import get_cms_setting
+from cms.utils.instrumentation import record_render_metrics
 from cms.utils.request_ip_resolvers import get_request_ip_resolver
 
 get_request_ip = get_request_ip_resolver()
@@ -77,6 +78,8 @@ class ToolbarMiddleware(MiddlewareMixin):
         request.toolbar = SimpleLazyObject(lambda: CMSToolbar(request))
 
     def process_response(self, request, response):
+        record_render_metrics(request, response)
+
         if not self.is_cms_request(request):
             return response
 
@@ -0,0 +1,32 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sites', '0002_alter_domain_unique'),
+        ('cms', '0038_alter_page_site'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlaceholderSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language', models.CharField(editable=False, max_length=15, verbose_name='language')),
+                ('timezone', models.CharField(editable=False, max_length=64, verbose_name='time zone')),
+                ('content', models.TextField(editable=False, verbose_name='content')),
+                ('sekizai', models.TextField(editable=False, verbose_name='sekizai data')),
+                ('expires', models.DateTimeField(editable=False, verbose_name='expires')),
+                ('placeholder', models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='cms.placeholder')),
+                ('site', models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='sites.site')),
+            ],
+            options={
+                'verbose_name': 'placeholder snapshot',
+                'verbose_name_plural': 'placeholder snapshots',
+                'default_permissions': [],
+                'unique_together': {('placeholder', 'language', 'site', 'timezone')},
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations, models
+
+
+def forwards(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    CMSPlugin = apps.get_model('cms', 'CMSPlugin')
+    plugins = CMSPlugin.objects.using(db_alias)
+    parent_ids = dict(plugins.exclude(parent=None).values_list('pk', 'parent_id').iterator())
+    # The tree_path of the children of each plugin
+    children_paths = {}
+
+    def get_children_path(plugin_id):
+        if plugin_id not in children_paths:
+            parent_id = parent_ids.get(plugin_id)
+            path = get_children_path(parent_id) if parent_id else ''
+            children_paths[plugin_id] = f'{path}{plugin_id:010d}'
+        return children_paths[plugin_id]
+
+    for parent_id in set(parent_ids.values()):
+        plugins.filter(parent=parent_id).update(tree_path=get_children_path(parent_id))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0039_placeholdersnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cmsplugin',
+            name='tree_path',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='cmsplugin',
+            index=models.Index(fields=['tree_path'], name='cms_cmsplug_tree_pa_9734a4_idx'),
+        ),
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -185,8 +185,9 @@ class PageContent(models.Model):
         self.update(in_navigation=new)
 
         # If there was a change, invalidate the cms page cache
+        # and the menus listing the page
         if new != old:
-            self.page.clear_cache()
+            self.page.clear_cache(menu=True)
         return new
 
     def has_placeholder_change_permission(self, user):
@@ -645,11 +645,13 @@ class Page(MP_Node):
         return self.pagecontent_set.filter(language=language).exists()
 
     def clear_cache(self, language=None, menu=False, placeholder=False):
-        from cms.cache import invalidate_cms_page_cache
+        from cms.cache import get_page_cache_tag, invalidate_cms_page_cache_tags
 
-        if get_cms_setting('PAGE_CACHE'):
-            # Clears all the page caches
-            invalidate_cms_page_cache()
+        if get_cms_setting('PAGE_CACHE') and not menu:
+            # Clears the page caches of this page. With «menu», the menus
+            # rendered on every page of this page's site might have changed,
+            # menu_pool.clear() below clears all of the site's page caches.
+            invalidate_cms_page_cache_tags([get_page_cache_tag('page', self.pk)])
 
         if placeholder and get_cms_setting('PLACEHOLDER_CACHE'):
             assert language, 'language is required when clearing placeholder cache'
@@ -1,15 +1,22 @@
+import uuid
 import warnings
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
-from django.db import connection, models
+from django.db import connection, models, transaction
 from django.template.defaultfilters import title
 from django.utils.encoding import force_str
+from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
 
-from cms.cache import invalidate_cms_page_cache
+from cms import operations
+from cms.cache import get_page_cache_tag, invalidate_cms_page_cache_tags
+from cms.cache.holes import is_cache_hole, is_hole_punching_enabled
+from cms.cache.materialized import clear_materialized_placeholder
 from cms.cache.placeholder import clear_placeholder_cache
+from cms.cache.plugin import get_plugin_cache_ttl
 from cms.constants import EXPIRE_NOW, MAX_EXPIRATION_TTL
 from cms.exceptions import LanguageError
 from cms.models.managers import PlaceholderManager
@@ -39,6 +46,8 @@ class Placeholder(models.Model):
     cache_placeholder = True  #: Flag caching the palceholder's content
     is_static = False  #: Set to "True" for static placeholders (by the template tag)
     is_editable = True  #: If False the content of the placeholder is not editable in the frontend
+    # The plugin operations done in the current batch(), or None
+    _plugin_operations = None
 
     objects = PlaceholderManager()
 
@@ -344,13 +353,23 @@ class Placeholder(models.Model):
         :type response_timestamp: datetime
         :rtype: int
         """
-        min_ttl = MAX_EXPIRATION_TTL
+        return self.get_cache_metadata(request, response_timestamp)[0]
+
+    def get_cache_metadata(self, request, response_timestamp):
+        """
+        Returns the ``(ttl, vary_on_list)`` tuple of this placeholder, the
+        values of get_cache_expiration() and get_vary_cache_on(), with a single
+        pass over its plugins.
 
+        :type request: HTTPRequest
+        :type response_timestamp: datetime
+        :rtype: tuple
+        """
         if not self.cache_placeholder or not get_cms_setting('PLUGIN_CACHE'):
             # This placeholder has a plugin with an effective
             # `cache = False` setting or the developer has explicitly
             # disabled the PLUGIN_CACHE, so, no point in continuing.
-            return EXPIRE_NOW
+            return EXPIRE_NOW, []
 
         def inner_plugin_iterator(lang):
             """
@@ -369,70 +388,62 @@ class Placeholder(models.Model):
                 for plugin_item in self.get_plugins(lang):
                     yield plugin_item.get_plugin_instance()
 
+        min_ttl = MAX_EXPIRATION_TTL
+        vary_list = set()
+        hole_punching = is_hole_punching_enabled()
         language = get_language_from_request(request, self.page)
         for instance, plugin in inner_plugin_iterator(language):
+            if not instance:
+                continue
+
             plugin_expiration = plugin.get_cache_expiration(
                 request, instance, self)
 
-            # The plugin_expiration should only ever be either: None, a TZ-
-            # aware datetime, a timedelta, or an integer.
-            if plugin_expiration is None:
-                # Do not consider plugins that return None
+            if hole_punching and is_cache_hole(plugin, plugin_expiration):
+                # The plugin is rendered for each request
+                continue
+
+            ttl = get_plugin_cache_ttl(plugin, instance, plugin_expiration, response_timestamp)
+
+            if ttl is not None:
+                min_ttl = min(ttl, min_ttl)
+
+            vary_on = plugin.get_vary_cache_on(request, instance, self)
+            if not vary_on:
+                # None, or an empty iterable
                 continue
-            if isinstance(plugin_expiration, (datetime, timedelta)):
-                if isinstance(plugin_expiration, datetime):
-                    # We need to convert this to a TTL against the
-                    # response timestamp.
-                    try:
-                        delta = plugin_expiration - response_timestamp
-                    except TypeError:
-                        # Attempting to take the difference of a naive datetime
-                        # and a TZ-aware one results in a TypeError. Ignore
-                        # this plugin.
-                        warnings.warn(
-                            'Plugin %(plugin_class)s (%(pk)d) returned a naive '
-                            'datetime : %(value)s for get_cache_expiration(), '
-                            'ignoring.' % {
-                                'plugin_class': plugin.__class__.__name__,
-                                'pk': instance.pk,
-                                'value': force_str(plugin_expiration),
-                            })
-                        continue
-                else:
-                    # Its already a timedelta instance...
-                    delta = plugin_expiration
-                ttl = int(delta.total_seconds() + 0.5)
-            else:  # must be an int-like value
+            if isinstance(vary_on, str):
+                vary_list.add(vary_on.lower())
+            else:
                 try:
-                    ttl = int(plugin_expiration)
-                except ValueError:
-                    # Looks like it was not very int-ish. Ignore this plugin.
+                    vary_list.update(vary_on_item.lower() for vary_on_item in iter(vary_on))
+                except TypeError:
                     warnings.warn(
                         'Plugin %(plugin_class)s (%(pk)d) returned '
                         'unexpected value %(value)s for '
-                        'get_cache_expiration(), ignoring.' % {
+                        'get_vary_cache_on(), ignoring.' % {
                             'plugin_class': plugin.__class__.__name__,
                             'pk': instance.pk,
-                            'value': force_str(plugin_expiration),
+                            'value': force_str(vary_on),
                         })
-                    continue
 
-            min_ttl = min(ttl, min_ttl)
-            if min_ttl <= 0:
-                # No point in continuing, we've already hit the minimum
-                # possible expiration TTL
-                return EXPIRE_NOW
-
-        return min_ttl
+        # No point in caching for less, we've already hit the minimum
+        # possible expiration TTL
+        return max(min_ttl, EXPIRE_NOW), sorted(vary_list)
 
     def clear_cache(self, language, site_id=None):
         if get_cms_setting('PAGE_CACHE'):
-            # Clears all the page caches
-            invalidate_cms_page_cache()
+            # Clears the page caches this placeholder was rendered in
+            invalidate_cms_page_cache_tags([get_page_cache_tag('placeholder', self.pk)])
 
         if not site_id and self.page:
             site_id = self.page.site_id
-        clear_placeholder_cache(self, language, get_site_id(site_id))
+        site_id = get_site_id(site_id)
+        clear_placeholder_cache(self, language, site_id)
+
+        if get_cms_setting('PLACEHOLDER_CACHE_MATERIALIZED'):
+            # The snapshot is replaced once the changes are committed
+            clear_materialized_placeholder(self, language, site_id)
 
     def get_plugin_tree_order(self, language, parent_id=None):
         """
@@ -452,47 +463,7 @@ class Placeholder(models.Model):
         """
         Returns a list of VARY headers.
         """
-        def inner_plugin_iterator(lang):
-            """See note in get_cache_expiration.inner_plugin_iterator()."""
-            if hasattr(self, '_all_plugins_cache'):
-                for instance in self._all_plugins_cache:
-                    plugin = instance.get_plugin_class_instance()
-                    yield instance, plugin
-            else:
-                for plugin_item in self.get_plugins(lang):
-                    yield plugin_item.get_plugin_instance()
-
-        if not self.cache_placeholder or not get_cms_setting('PLUGIN_CACHE'):
-            return []
-
-        vary_list = set()
-        language = get_language_from_request(request, self.page)
-        for instance, plugin in inner_plugin_iterator(language):
-            if not instance:
-                continue
-            vary_on = plugin.get_vary_cache_on(request, instance, self)
-            if not vary_on:
-                # None, or an empty iterable
-                continue
-            if isinstance(vary_on, str):
-                if vary_on.lower() not in vary_list:
-                    vary_list.add(vary_on.lower())
-            else:
-                try:
-                    for vary_on_item in iter(vary_on):
-                        if vary_on_item.lower() not in vary_list:
-                            vary_list.add(vary_on_item.lower())
-                except TypeError:
-                    warnings.warn(
-                        'Plugin %(plugin_class)s (%(pk)d) returned '
-                        'unexpected value %(value)s for '
-                        'get_vary_cache_on(), ignoring.' % {
-                            'plugin_class': plugin.__class__.__name__,
-                            'pk': instance.pk,
-                            'value': force_str(vary_on),
-                        })
-
-        return sorted(list(vary_list))
+        return self.get_cache_metadata(request, now())[1]
 
     def copy_plugins(self, target_placeholder, language=None, root_plugin=None):
         from cms.utils.plugins import copy_plugins_to_placeholder
@@ -511,7 +482,8 @@ class Placeholder(models.Model):
 
         Adds a plugin to the placeholder. The plugin's position field must be set to the target
         position. Positions are enumerated from the start of the palceholder's plugin tree (1) to
-        the last plugin (*n*, where *n* is the number of plugins in the placeholder).
+        the last plugin (*n*, where *n* is the number of plugins in the placeholder). The plugins
+        from the target position on are shifted one position to the right.
 
         :param instance: Plugin to add. It's position parameter needs to be set.
         :type instance: :class:`cms.models.pluginmodel.CMSPlugin` instance
@@ -533,19 +505,12 @@ class Placeholder(models.Model):
         needs_shift = (instance.position - last_position) < 1
 
         if needs_shift:
-            # shift to the right
-            self._shift_plugin_positions(
-                instance.language,
-                start=instance.position,
-                offset=last_position - instance.position + 2,  # behind last_position plus one to shift back
-            )
+            # Make space by shifting the plugins from the new plugin's
+            # position on one position to the right
+            self._move_plugin_ranges(instance.language, [(instance.position, None, 1)])
 
         instance.save()
-
-        if needs_shift:
-            # The plugin tree was shifted to the right to make space,
-            # now squash all plugins in the tree to close any holes.
-            self._recalculate_plugin_positions(instance.language)
+        self._record_plugin_operation(operations.ADD_PLUGIN, instance)
         return instance
 
     def move_plugin(self, plugin, target_position, target_placeholder=None, target_plugin=None):
@@ -564,9 +529,13 @@ class Placeholder(models.Model):
         :type target_plugin: :class:`cms.models.pluginmodel.CMSPlugin` instance
 
         The ``target_position`` is enumerated from the start of the palceholder's plugin tree (1) to
-        the last plugin (*n*, where *n* is the number of plugins in the placeholder).
+        the last plugin (*n*, where *n* is the number of plugins in the placeholder). Within the
+        placeholder, only the plugins between the old and the new position are shifted. Moving to
+        another placeholder shifts the plugins behind the plugin in both placeholders.
         """
 
+        self._record_plugin_operation(operations.MOVE_PLUGIN, plugin, target_placeholder)
+
         if target_placeholder:
             return self._move_plugin_to_placeholder(
                 plugin=plugin,
@@ -575,126 +544,159 @@ class Placeholder(models.Model):
                 target_plugin=target_plugin,
             )
 
-        target_tree = self.get_plugins(plugin.language)
-        last_plugin = self.get_last_plugin(plugin.language)
+        language = plugin.language
+        # Only the plugins between the source and the target position
+        # are moved, so the position must be up to date
+        plugin.refresh_from_db(fields=['position', 'tree_path'])
+        last_position = self.get_last_plugin_position(language) or 0
         source_plugin_desc_count = plugin._get_descendants_count()
-        # Attn: The following line assumes that all children and grand-children have consecutive positions!
-        source_plugin_range = (plugin.position, plugin.position + source_plugin_desc_count)
+        # Attn: The following lines assume that all children and grand-children have consecutive positions!
+        start, end = plugin.position, plugin.position + source_plugin_desc_count
+        # The plugin and its descendants stay within the placeholder's positions
+        target_position = max(1, min(target_position, last_position - source_plugin_desc_count))
+        plugin_count = source_plugin_desc_count + 1
 
-        if target_position < plugin.position:
+        if target_position < start:
             # Moving left
-            # Make a big hole on the right side of the current plugin's position
-            # by shifting all right nodes further to the right, excluding the current plugin
-            # but including the target plugin and its descendants.
-            (target_tree
-             .filter(position__gte=target_position)
-             .exclude(position__range=source_plugin_range)
-             ).update(position=(models.F('position') + last_plugin.position))
-
-            # Make a big hole on the left side of the current plugin's position
-            # by shifting all right nodes further the right, including the current plugin
-            # and its descendants.
-            target_tree.filter(
-                position__lte=source_plugin_range[1]
-            ).update(position=models.F('position') - last_plugin.position)
-        else:
+            # Shift the plugins between the target position and the current
+            # plugin's position to the right to make space.
+            self._move_plugin_ranges(language, [
+                (start, end, target_position - start),
+                (target_position, start - 1, plugin_count),
+            ])
+        elif target_position > start:
             # Moving right
-            # Make a big hole on the left side of the target position,
-            # by shifting all left nodes further to the left, excluding the current plugin
-            # but including the target plugin and its descendants.
-            # Left node in the common case is target_position but if the current plugin
-            # has descendants then left node is the closest node to the right side of the
-            # last descendant.
-            (target_tree
-             .filter(position__lte=target_position + source_plugin_desc_count)
-             .exclude(position__range=source_plugin_range)
-             ).update(position=(models.F('position') - last_plugin.position))
-
-            # Make a big hole on the right side of the current plugin's position
-            # by shifting all right nodes further the right, including the current plugin
-            # and its descendants.
-            target_tree.filter(
-                position__gte=plugin.position
-            ).update(position=models.F('position') + last_plugin.position)
+            # Shift the plugins between the current plugin's descendants and the
+            # target position (including its descendants) to the left into the
+            # space left behind.
+            self._move_plugin_ranges(language, [
+                (start, end, target_position - start),
+                (end + 1, target_position + source_plugin_desc_count, -plugin_count),
+            ])
 
         if plugin.parent != target_plugin:
             # Plugin is being moved to another tree (under another parent)
             # OR plugin is being moved to the root (no parent)
-            plugin.update(parent=target_plugin)
-        # The plugin tree was shifted to the right to make space,
-        # Squash all plugin positions in the tree to close any holes.
-        self._recalculate_plugin_positions(plugin.language)
+            plugin._set_parent(target_plugin)
 
     def _move_plugin_to_placeholder(self, plugin, target_position, target_placeholder, target_plugin=None):
-        source_last_plugin = self.get_last_plugin(plugin.language)
-        target_last_plugin = target_placeholder.get_last_plugin(plugin.language)
-
-        plugin_descendants = plugin.get_descendants()
-        if target_last_plugin:
-            source_length = source_last_plugin.position
-            target_length = target_last_plugin.position
-            plugins_to_move_count = 1 + len(plugin_descendants)  # parent plus descendants
-
-            source_offset = max(
-                # far enough to shift behind current last source position
-                source_length,
-                # far enough to be shifted behind last target position plus no. of moved plugins
-                target_length + plugins_to_move_count
-            ) - plugin.position + 1
-
-            # move target position counter to at least behind
-            target_offset = max(
-                # far enough to shift behind current last target position
-                target_length - target_position + 1,
-                # far enough to leave enough space to move back
-                plugin.position + source_offset - target_position + plugins_to_move_count
-            )
-            target_placeholder._shift_plugin_positions(
-                plugin.language,
-                start=target_position,
-                offset=target_offset,
-            )
-        else:
-            # moving to empty placeholder:
-            # Move out (remaining) plugins right behind last source position to be able to recalculate
-            source_offset = source_last_plugin.position
-
-        # Shift all plugins whose position is greater than or equal to
-        # the plugin being moved. This includes the plugin itself.
-        # This is to create enough space in-between for the squashing
-        # to work without conflicts.
-        self._shift_plugin_positions(
-            plugin.language,
-            start=plugin.position,
-            offset=source_offset,
-        )
+        from cms.models.pluginmodel import CMSPlugin
+
+        language = plugin.language
+        plugin.refresh_from_db(fields=['position', 'tree_path'])
+        target_last_position = target_placeholder.get_last_plugin_position(language) or 0
+        # Positions behind the last plugin are closed up
+        target_position = max(1, min(target_position, target_last_position + 1))
+        plugin_ids = [plugin.pk, *plugin._get_descendants_ids()]
 
-        plugin.update(parent=target_plugin, placeholder=target_placeholder)
-        # TODO: More efficient is to do raw sql update
-        plugin_descendants.update(placeholder=target_placeholder)
-        self._recalculate_plugin_positions(plugin.language)
-        target_placeholder._recalculate_plugin_positions(plugin.language)
+        if target_position <= target_last_position:
+            # Make space in the target placeholder by shifting the plugins from
+            # the target position on to the right
+            target_placeholder._move_plugin_ranges(language, [(target_position, None, len(plugin_ids))])
+
+        # Attn: The following line assumes that all children and grand-children have consecutive positions!
+        CMSPlugin.objects.filter(pk__in=plugin_ids).update(
+            placeholder=target_placeholder,
+            position=models.F('position') + (target_position - plugin.position),
+        )
+        plugin._set_parent(target_plugin)
+        # Close the hole left behind in the source placeholder
+        self._close_plugin_gap(language, plugin.position)
 
     def delete_plugin(self, instance):
         """
         .. versionadded:: 4.0
 
-        Removes a plugin and its descendants from the placeholder and database.
+        Removes a plugin and its descendants from the placeholder and database. The plugins
+        behind them are shifted to the left to close the gap.
 
         :param instance: Plugin to add. It's position parameter needs to be set.
         :type instance: :class:`cms.models.pluginmodel.CMSPlugin` instance
         """
+        # Only the plugins behind the deleted ones are moved,
+        # so the position must be up to date
+        instance.refresh_from_db(fields=['position', 'tree_path'])
         instance.get_descendants().delete()
         instance.delete()
-        last_plugin = self.get_last_plugin(instance.language)
+        self._close_plugin_gap(instance.language, instance.position)
+        self._record_plugin_operation(operations.DELETE_PLUGIN, instance)
 
-        if last_plugin:
-            self._shift_plugin_positions(
-                instance.language,
-                start=instance.position,
-                offset=last_plugin.position,
-            )
-            self._recalculate_plugin_positions(instance.language)
+    @contextmanager
+    def batch(self, request=None):
+        """
+        Context manager to apply many plugin operations on the placeholder at once. The
+        :meth:`add_plugin`, :meth:`move_plugin` and :meth:`delete_plugin` calls (including
+        the ones by :func:`cms.api.add_plugin`) on this placeholder instance within the
+        block are done in one transaction. Once the block is done, the cache of each
+        affected placeholder and language is cleared once (after the transaction is
+        committed).
+
+        If a ``request`` is given, a single ``pre_placeholder_operation`` and
+        ``post_placeholder_operation`` signal is sent for the whole batch, with the
+        operation ``batch_plugin_operations`` and the list of
+        ``(operation, plugin, placeholder)`` tuples as ``plugin_operations``.
+
+        Example::
+
+            with placeholder.batch():
+                for body in texts:
+                    add_plugin(placeholder, 'TextPlugin', 'en', body=body)
+        """
+        from cms.signals import (
+            post_placeholder_operation,
+            pre_placeholder_operation,
+        )
+
+        if self._plugin_operations is not None:
+            # Already in a batch, which this one is part of
+            yield self
+            return
+
+        token = str(uuid.uuid4())
+        self._plugin_operations = []
+
+        try:
+            with transaction.atomic():
+                if request:
+                    pre_placeholder_operation.send(
+                        sender=self.__class__,
+                        operation=operations.BATCH_PLUGIN_OPERATIONS,
+                        request=request,
+                        token=token,
+                        placeholder=self,
+                    )
+
+                yield self
+
+                plugin_operations = self._plugin_operations
+                # The placeholder and language of each affected placeholder
+                affected = {}
+
+                for _operation, plugin, placeholder in plugin_operations:
+                    affected[(self.pk, plugin.language)] = (self, plugin.language)
+                    affected[(placeholder.pk, plugin.language)] = (placeholder, plugin.language)
+
+                def clear_caches():
+                    for placeholder, language in affected.values():
+                        placeholder.clear_cache(language)
+
+                transaction.on_commit(clear_caches)
+
+                if request:
+                    post_placeholder_operation.send(
+                        sender=self.__class__,
+                        operation=operations.BATCH_PLUGIN_OPERATIONS,
+                        request=request,
+                        token=token,
+                        placeholder=self,
+                        plugin_operations=plugin_operations,
+                    )
+        finally:
+            self._plugin_operations = None
+
+    def _record_plugin_operation(self, operation, plugin, placeholder=None):
+        if self._plugin_operations is not None:
+            self._plugin_operations.append((operation, plugin, placeholder or self))
 
     def get_last_plugin(self, language):
         return self.get_plugins(language).last()
@@ -746,17 +748,82 @@ class Placeholder(models.Model):
             position__gte=start
         ).update(position=models.F('position') + offset)
 
+    def _move_plugin_ranges(self, language, ranges):
+        """
+        Moves the plugins in each of the disjoint position «ranges», given as
+        ``(start, end, offset)`` tuples (``end`` is inclusive, ``None`` for
+        the last plugin), by ``offset`` positions. Only the plugins in the
+        ranges are updated.
+
+        The moved positions are negated first, so that they do not collide
+        with any other plugin before all ranges have been moved.
+        """
+        plugins = self.get_plugins(language)
+
+        for start, end, offset in ranges:
+            if end is not None and end < start:
+                continue
+
+            if end is None:
+                plugin_range = plugins.filter(position__gte=start)
+            else:
+                plugin_range = plugins.filter(position__range=(start, end))
+            plugin_range.update(position=(models.F('position') + offset) * -1)
+        plugins.filter(position__lt=0).update(position=models.F('position') * -1)
+
+    def _close_plugin_gap(self, language, position):
+        """
+        Moves the plugins behind the gap at «position» (left by removing
+        plugins) to the left, so that the positions are consecutive again.
+        """
+        next_position = (
+            self
+            .get_plugins(language)
+            .filter(position__gt=position)
+            .values_list('position', flat=True)
+            .first()
+        )
+
+        if next_position:
+            self._move_plugin_ranges(language, [(next_position, None, position - next_position)])
+
     def _recalculate_plugin_positions(self, language):
         from cms.models.pluginmodel import (
             CMSPlugin,
             _get_database_cursor,
             _get_database_vendor,
+            plugin_supports_window_functions,
         )
 
         cursor = _get_database_cursor('write')
         db_vendor = _get_database_vendor('write')
+        supports_window_functions = plugin_supports_window_functions()
 
-        if db_vendor == 'sqlite':
+        if db_vendor == 'sqlite' and supports_window_functions:
+            # The temporary table is keyed by id, so looking up the new
+            # position of each plugin does not scan it.
+            sql = 'CREATE TEMPORARY TABLE temp (id integer PRIMARY KEY, new_position integer)'
+            cursor.execute(sql)
+
+            sql = (
+                'INSERT INTO temp (id, new_position) '
+                'SELECT id, ROW_NUMBER() OVER (ORDER BY position) '
+                'FROM {0} WHERE placeholder_id=%s AND language=%s'
+            )
+            sql = sql.format(connection.ops.quote_name(CMSPlugin._meta.db_table))
+            cursor.execute(sql, [self.pk, language])
+
+            sql = (
+                'UPDATE {0} '
+                'SET position = (SELECT new_position FROM temp WHERE id={0}.id) '
+                'WHERE placeholder_id=%s AND language=%s'
+            )
+            sql = sql.format(connection.ops.quote_name(CMSPlugin._meta.db_table))
+            cursor.execute(sql, [self.pk, language])
+
+            sql = 'DROP TABLE temp'
+            cursor.execute(sql)
+        elif db_vendor == 'sqlite':
             sql = (
                 'CREATE TEMPORARY TABLE temp AS '
                 'SELECT ID, ('
@@ -792,6 +859,17 @@ class Placeholder(models.Model):
             )
             sql = sql.format(connection.ops.quote_name(CMSPlugin._meta.db_table))
             cursor.execute(sql, [self.pk, language])
+        elif db_vendor == 'mysql' and supports_window_functions:
+            sql = (
+                'UPDATE {0} '
+                'INNER JOIN ('
+                'SELECT id, ROW_NUMBER() OVER (ORDER BY position) AS RowNbr '
+                'FROM {0} WHERE placeholder_id=%s AND language=%s '
+                ') RowNbrs ON {0}.id=RowNbrs.id '
+                'SET {0}.position = RowNbrs.RowNbr'
+            )
+            sql = sql.format(connection.ops.quote_name(CMSPlugin._meta.db_table))
+            cursor.execute(sql, [self.pk, language])
         elif db_vendor == 'mysql':
             sql = (
                 'UPDATE {0} '
@@ -818,3 +896,29 @@ class Placeholder(models.Model):
             raise RuntimeError(
                 f'{connection.vendor} is not supported by django-cms'
             )
+
+
+class PlaceholderSnapshot(models.Model):
+    """
+    The rendered content of a placeholder, stored if
+    :setting:`CMS_PLACEHOLDER_CACHE_MATERIALIZED` is enabled
+    (see cms.cache.materialized).
+    """
+    placeholder = models.ForeignKey(Placeholder, on_delete=models.CASCADE, related_name='+', editable=False)
+    language = models.CharField(_("language"), max_length=15, editable=False)
+    site = models.ForeignKey('sites.Site', on_delete=models.CASCADE, related_name='+', editable=False)
+    timezone = models.CharField(_("time zone"), max_length=64, editable=False)
+    content = models.TextField(_("content"), editable=False)
+    #: The sekizai data added by the plugins, JSON encoded
+    sekizai = models.TextField(_("sekizai data"), editable=False)
+    expires = models.DateTimeField(_("expires"), editable=False)
+
+    class Meta:
+        app_label = 'cms'
+        default_permissions = []
+        unique_together = ('placeholder', 'language', 'site', 'timezone')
+        verbose_name = _('placeholder snapshot')
+        verbose_name_plural = _('placeholder snapshots')
+
+    def __str__(self):
+        return f'{self.placeholder_id} ({self.language})'
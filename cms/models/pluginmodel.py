@@ -5,44 +5,58 @@ from datetime import date
 from functools import lru_cache
 
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import connection, connections, models, router
+from django.db import connections, models, router
+from django.db.models import Max, Value
 from django.db.models.base import ModelBase
+from django.db.models.functions import Concat, Length, Substr
 from django.urls import NoReverseMatch
 from django.utils import timezone
 from django.utils.encoding import force_str
 from django.utils.safestring import mark_safe
 from django.utils.translation import gettext_lazy as _
 
-from cms.exceptions import DontUsePageAttributeWarning
+from cms.exceptions import DontUsePageAttributeWarning, PluginTreePathOverflow
 from cms.models.placeholdermodel import Placeholder
 from cms.utils.conf import get_cms_setting
 from cms.utils.urlutils import admin_reverse
 
+# The number of digits of each ancestor's id in CMSPlugin.tree_path
+TREE_PATH_STEP = 10
+# The max_length of CMSPlugin.tree_path, plugins can be nested
+# TREE_PATH_MAX_LENGTH // TREE_PATH_STEP levels deep.
+TREE_PATH_MAX_LENGTH = 255
 
-@lru_cache(maxsize=None)
-def _get_descendants_cte():
-    db_vendor = _get_database_vendor('read')
-    if db_vendor == 'oracle':
-        sql = (
-            "WITH descendants (id, cms_plugin_position, cms_plugin_parent_id) as ("
-            "SELECT {0}.id, {0}.position, {0}.parent_id  "
-            "FROM {0} WHERE {0}.parent_id = %s "
-            "UNION ALL "
-            "SELECT {0}.id, {0}.position, {0}.parent_id "
-            "FROM descendants, {0} WHERE {0}.parent_id = descendants.id"
-            ")"
+
+def _check_tree_path_length(length):
+    if length > TREE_PATH_MAX_LENGTH:
+        raise PluginTreePathOverflow(
+            f'Plugins cannot be nested more than {TREE_PATH_MAX_LENGTH // TREE_PATH_STEP} levels deep.'
         )
-    else:
-        sql = (
-            "WITH RECURSIVE descendants as ("
-            "SELECT {0}.id, {0}.position, {0}.parent_id  "
-            "FROM {0} WHERE {0}.parent_id = %s "
-            "UNION ALL "
-            "SELECT {0}.id, {0}.position, {0}.parent_id "
-            "FROM descendants, {0} WHERE {0}.parent_id = descendants.id"
-            ")"
+
+
+def get_tree_path(parent):
+    """
+    Returns the ``tree_path`` of the children of the plugin «parent» (or of
+    the plugins at root level if «parent» is ``None``). Raises
+    PluginTreePathOverflow if the path does not fit into the field.
+    """
+    if parent is None:
+        return ''
+
+    if parent.pk >= 10 ** TREE_PATH_STEP:
+        raise PluginTreePathOverflow(
+            f'Plugin {parent.pk} cannot have children, its id has more than {TREE_PATH_STEP} digits.'
         )
-    return sql.format(connection.ops.quote_name(CMSPlugin._meta.db_table))
+    tree_path = f'{parent.tree_path}{parent.pk:0{TREE_PATH_STEP}d}'
+    _check_tree_path_length(len(tree_path))
+    return tree_path
+
+
+def _get_tree_path_range(tree_path):
+    # The tree paths of the descendants start with «tree_path». As all
+    # paths consist of digits only, these are the paths from «tree_path» to
+    # the next number with as many digits.
+    return tree_path, str(int(tree_path) + 1).zfill(len(tree_path))
 
 
 def _get_database_connection(action):
@@ -61,17 +75,18 @@ def _get_database_cursor(action):
 
 
 @lru_cache(maxsize=None)
-def plugin_supports_cte():
+def plugin_supports_window_functions():
     # This has to be as function because when it's a var it evaluates before
     # db is connected and we get OperationalError. MySQL version is retrieved
-    # from db, and it's cached_property.
+    # from db, and it's cached_property. Window functions (ROW_NUMBER() OVER)
+    # are supported by SQLite 3.25 and MySQL 8.0 onwards.
     connection = _get_database_connection('write')
     db_vendor = _get_database_vendor('write')
-    sqlite_no_cte = (
-        db_vendor == 'sqlite' and connection.Database.sqlite_version_info < (3, 8, 3)
+    sqlite_no_window = (
+        db_vendor == 'sqlite' and connection.Database.sqlite_version_info < (3, 25, 0)
     )
 
-    if sqlite_no_cte:
+    if sqlite_no_window:
         return False
     return not (db_vendor == 'mysql' and connection.mysql_version < (8, 0))
 
@@ -167,6 +182,14 @@ class CMSPlugin(models.Model, metaclass=PluginModelBase):
     creation_date = models.DateTimeField(_("creation date"), editable=False, default=timezone.now)
     #: `django:django.db.models.DateTimeField`: Datetime the plugin was last changed
     changed_date = models.DateTimeField(auto_now=True)
+    #: :class:`django:django.db.models.CharField`: The ids of the plugin's ancestors, starting with the
+    #: plugin at root level, each padded to 10 digits (empty for plugins at root level). Kept up to date
+    #: by :meth:`save`, parents changed otherwise must be fixed with :meth:`fix_tree_paths`.
+    tree_path = models.CharField(max_length=TREE_PATH_MAX_LENGTH, blank=True, default='', editable=False)
+    #: Whether copies of a subclass can be inserted in bulk, i.e. without calling ``save()`` (see
+    #: :meth:`copy_relations_bulk`). ``None`` (the default) bulk copies subclasses which override neither
+    #: :meth:`save` nor :meth:`copy_relations`, set to ``True`` or ``False`` to decide explicitly
+    bulk_copy = None
     child_plugin_instances = None
 
     class Meta:
@@ -174,6 +197,7 @@ class CMSPlugin(models.Model, metaclass=PluginModelBase):
         ordering = ('position',)
         indexes = [
             models.Index(fields=['placeholder', 'language', 'position']),
+            models.Index(fields=['tree_path']),
         ]
         unique_together = ('placeholder', 'language', 'position')
 
@@ -308,6 +332,82 @@ class CMSPlugin(models.Model, metaclass=PluginModelBase):
         instance, plugin = self.get_plugin_instance()
         return force_str(plugin.icon_alt(instance)) if instance else ''
 
+    def save(self, *args, **kwargs):
+        if self.pk is None or self._state.adding:
+            self.tree_path = self._get_parent_tree_path()
+        elif not self._has_valid_tree_path():
+            # The plugin has been moved to another parent. Its path is rebuilt
+            # from the stored paths, which might have changed since it was loaded.
+            tree_paths = dict(
+                CMSPlugin.objects.filter(pk__in=[self.pk, self.parent_id]).values_list('pk', 'tree_path')
+            )
+            self.tree_path = tree_paths[self.pk]
+            parent = CMSPlugin(pk=self.parent_id, tree_path=tree_paths[self.parent_id]) if self.parent_id else None
+            self._set_tree_path(get_tree_path(parent))
+        else:
+            # The tree_path is only written by _set_tree_path() and update(). A path
+            # loaded before an ancestor has been moved must not be written back.
+            update_fields = kwargs.get('update_fields')
+
+            if update_fields is None and not args and not kwargs.get('force_insert'):
+                deferred_fields = self.get_deferred_fields()
+                update_fields = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key and field.attname not in deferred_fields
+                ]
+
+            if update_fields is not None:
+                kwargs['update_fields'] = [name for name in update_fields if name != 'tree_path']
+        super().save(*args, **kwargs)
+
+    def _has_valid_tree_path(self):
+        # The tree path ends with the id of the plugin's parent
+        if self.parent_id is None:
+            return not self.tree_path
+        return self.tree_path.endswith(f'{self.parent_id:0{TREE_PATH_STEP}d}')
+
+    def _get_parent_tree_path(self):
+        """
+        Returns the ``tree_path`` of the plugin given its parent, using the
+        cached parent or loading the parent's ``tree_path`` only.
+        """
+        if self.parent_id is None or CMSPlugin.parent.is_cached(self):
+            return get_tree_path(self.parent)
+
+        parent = CMSPlugin(pk=self.parent_id)
+        parent.tree_path = CMSPlugin.objects.values_list('tree_path', flat=True).get(pk=self.parent_id)
+        return get_tree_path(parent)
+
+    def _set_tree_path(self, tree_path):
+        """
+        Sets the ``tree_path`` of the plugin to «tree_path» and updates the
+        paths of its descendants in the database.
+        """
+        if self.pk and not self._state.adding and tree_path != self.tree_path:
+            old_prefix = self._get_descendants_tree_path()
+            new_prefix = f'{tree_path}{self.pk:0{TREE_PATH_STEP}d}'
+            descendants = self.get_descendants()
+
+            if len(new_prefix) > len(old_prefix):
+                # The descendants are moved deeper
+                longest = descendants.aggregate(length=Max(Length('tree_path')))['length']
+
+                if longest:
+                    _check_tree_path_length(longest + len(new_prefix) - len(old_prefix))
+            descendants.update(
+                tree_path=Concat(Value(new_prefix), Substr('tree_path', len(old_prefix) + 1)),
+            )
+        self.tree_path = tree_path
+
+    def _set_parent(self, parent):
+        """
+        Sets «parent» as the parent of the plugin in the database, and updates
+        the paths of the plugin and its descendants.
+        """
+        self._set_tree_path(get_tree_path(parent))
+        self.update(parent=parent, tree_path=self.tree_path)
+        self.parent = parent
+
     def update(self, refresh=False, **fields):
         CMSPlugin.objects.filter(pk=self.pk).update(**fields)
         if refresh:
@@ -317,42 +417,81 @@ class CMSPlugin(models.Model, metaclass=PluginModelBase):
     def reload(self):
         return CMSPlugin.objects.get(pk=self.pk)
 
+    @classmethod
+    def _get_wrong_tree_paths(cls):
+        """
+        Returns a dictionary mapping the ids of the plugins whose ``tree_path``
+        does not match their ancestors to the correct path.
+        """
+        plugins = cls.objects.values_list('pk', 'parent_id', 'tree_path')
+        parent_ids = {}
+        tree_paths = {}
+
+        for pk, parent_id, tree_path in plugins.iterator():
+            parent_ids[pk] = parent_id
+            tree_paths[pk] = tree_path
+
+        # The tree_path of the children of each plugin
+        children_paths = {}
+
+        def get_children_path(plugin_id, depth=0):
+            if depth > TREE_PATH_MAX_LENGTH // TREE_PATH_STEP:
+                # Also catches parents referencing each other
+                _check_tree_path_length(depth * TREE_PATH_STEP)
+
+            if plugin_id not in children_paths:
+                parent_id = parent_ids[plugin_id]
+                path = get_children_path(parent_id, depth + 1) if parent_id else ''
+                children_paths[plugin_id] = f'{path}{plugin_id:0{TREE_PATH_STEP}d}'
+            return children_paths[plugin_id]
+
+        wrong_paths = {}
+
+        for pk, parent_id in parent_ids.items():
+            tree_path = get_children_path(parent_id) if parent_id else ''
+
+            if tree_path != tree_paths[pk]:
+                wrong_paths[pk] = tree_path
+        return wrong_paths
+
+    @classmethod
+    def fix_tree_paths(cls):
+        """
+        Rebuilds the ``tree_path`` of all plugins from their parents, e.g. after
+        loading fixtures or changing parents with ``QuerySet.update()``. Returns
+        the number of fixed plugins.
+        """
+        ids_by_path = {}
+
+        for pk, tree_path in cls._get_wrong_tree_paths().items():
+            ids_by_path.setdefault(tree_path, []).append(pk)
+
+        for tree_path, ids in ids_by_path.items():
+            _check_tree_path_length(len(tree_path))
+
+            for start in range(0, len(ids), 500):
+                cls.objects.filter(pk__in=ids[start:start + 500]).update(tree_path=tree_path)
+        return sum(len(ids) for ids in ids_by_path.values())
+
+    def _get_descendants_tree_path(self):
+        return f'{self.tree_path}{self.pk:0{TREE_PATH_STEP}d}'
+
     def _get_descendants_count(self):
-        if plugin_supports_cte():
-            cursor = _get_database_cursor('write')
-            sql = _get_descendants_cte() + '\n'
-            sql += 'SELECT COUNT(*) FROM descendants;'
-            sql = sql.format(connection.ops.quote_name(CMSPlugin._meta.db_table))
-            cursor.execute(sql, [self.pk])
-            return cursor.fetchall()[0][0]
         return self.get_descendants().count()
 
     def _get_descendants_ids(self):
-        if plugin_supports_cte():
-            cursor = _get_database_cursor('write')
-            sql = _get_descendants_cte() + '\n'
-            sql += 'SELECT id FROM descendants;'
-            sql = sql.format(connection.ops.quote_name(CMSPlugin._meta.db_table))
-            cursor.execute(sql, [self.pk])
-            descendants = [item[0] for item in cursor.fetchall()]
-        else:
-            children = self.get_children().values_list('pk', flat=True)
-            descendants = list(children)
-            while children:
-                children = CMSPlugin.objects.filter(
-                    parent__in=children,
-                ).values_list('pk', flat=True)
-                descendants.extend(children)
-        return descendants
+        return list(self.get_descendants().values_list('pk', flat=True))
 
     def get_children(self):
         return self.cmsplugin_set.all()
 
     def get_descendants(self):
-        return CMSPlugin.objects.filter(pk__in=self._get_descendants_ids())
+        start, end = _get_tree_path_range(self._get_descendants_tree_path())
+        return CMSPlugin.objects.filter(tree_path__gte=start, tree_path__lt=end)
 
     def set_base_attr(self, plugin):
-        for attr in ['parent_id', 'placeholder', 'language', 'plugin_type', 'creation_date', 'pk', 'position']:
+        for attr in ['parent_id', 'placeholder', 'language', 'plugin_type', 'creation_date', 'pk', 'position',
+                     'tree_path']:
             setattr(plugin, attr, getattr(self, attr))
 
     def post_copy(self, old_instance, new_old_ziplist):
@@ -377,6 +516,19 @@ class CMSPlugin(models.Model, metaclass=PluginModelBase):
         """
         pass
 
+    @classmethod
+    def copy_relations_bulk(cls, plugin_pairs):
+        """
+        Handle copying of the relations of several plugins of this model at once,
+        e.g. with ``bulk_create()``. Called instead of :meth:`copy_relations` if
+        plugins are copied in bulk (see :attr:`bulk_copy`). By default calls
+        :meth:`copy_relations` for each of the plugins.
+
+        :param plugin_pairs: List of ``(new_instance, old_instance)`` tuples
+        """
+        for new_instance, old_instance in plugin_pairs:
+            new_instance.copy_relations(old_instance)
+
     @classmethod
     def _get_related_objects(cls):
         fields = cls._meta._get_fields(
@@ -8,6 +8,7 @@ PASTE_PLUGIN = 'paste_plugin'
 PASTE_PLACEHOLDER = 'paste_placeholder'
 ADD_PLUGINS_FROM_PLACEHOLDER = 'add_plugins_from_placeholder'
 CLEAR_PLACEHOLDER = 'clear_placeholder'
+BATCH_PLUGIN_OPERATIONS = 'batch_plugin_operations'
 
 # Page operations
 CHANGE_PAGE = 'change_page'
@@ -4,6 +4,7 @@ from django.template.response import TemplateResponse
 from django.urls import Resolver404, resolve, reverse
 
 from cms import __version__, constants
+from cms.cache.holes import defer_cache_holes, fill_response_cache_holes, is_hole_punching_enabled
 from cms.cache.page import set_page_cache
 from cms.models import EmptyPageContent
 from cms.utils.page_permissions import user_can_change_page, user_can_view_page
@@ -38,6 +39,12 @@ def render_page(request, page, current_language, slug=None):
     response = TemplateResponse(request, template, context)
     response.add_post_render_callback(set_page_cache)
 
+    if is_hole_punching_enabled():
+        # The page is cached with the markers of the plugins which
+        # cannot be cached, they are filled once it has been cached.
+        defer_cache_holes(request)
+        response.add_post_render_callback(fill_response_cache_holes)
+
     # Add headers for X Frame Options - this really should be changed upon moving to class based views
     xframe_options = page.get_xframe_options()
     # xframe_options can be None if there's no xframe information on the page
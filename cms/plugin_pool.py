@@ -37,7 +37,9 @@ class PluginPool:
         from cms.cache import invalidate_cms_page_cache
 
         if get_cms_setting("PAGE_CACHE"):
-            invalidate_cms_page_cache()
+            # Each process starts with new page cache entries, the pages
+            # at the CDN are not affected by a deployment.
+            invalidate_cms_page_cache(purge=False)
 
         autodiscover_modules('cms_plugins')
         self.discovered = True
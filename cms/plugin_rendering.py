@@ -5,23 +5,59 @@ from collections import OrderedDict
 from functools import partial
 
 from classytags.utils import flatten_context
+from django.contrib.contenttypes.models import ContentType
 from django.contrib.sites.models import Site
+from django.core.signals import setting_changed
+from django.db.models import Q
+from django.dispatch import receiver
 from django.template import Context
+from django.template.context import BaseContext
 from django.utils.functional import cached_property
 from django.utils.module_loading import import_string
 from django.utils.safestring import mark_safe
+from django.utils.timezone import now
 from django.utils.translation import override
 
-from cms.cache.placeholder import get_placeholder_cache, set_placeholder_cache
+from cms.cache.holes import (
+    allow_cache_holes,
+    cache_holes_are_deferred,
+    fill_cache_holes,
+    get_cache_hole_pks,
+    get_cache_holes,
+    is_cache_hole,
+    is_hole_punching_enabled,
+    punch_cache_hole,
+    strip_cache_hole_markers,
+)
+from cms.cache.materialized import (
+    get_materialized_placeholders,
+    is_materialization_enabled,
+)
+from cms.cache.placeholder import (
+    get_placeholder_cache,
+    get_placeholder_caches,
+    set_placeholder_cache,
+)
+from cms.cache.plugin import (
+    get_plugin_cache,
+    get_plugin_cache_policy,
+    set_plugin_cache,
+)
 from cms.exceptions import PlaceholderNotFound
-from cms.models import PageContent, Placeholder
+from cms.models import PageContent, Placeholder, StaticPlaceholder
 from cms.toolbar.utils import (
     get_placeholder_toolbar_js,
     get_plugin_toolbar_js,
     get_toolbar_from_request,
 )
-from cms.utils import get_language_from_request
+from cms.utils import get_current_site, get_language_from_request
 from cms.utils.conf import get_cms_setting
+from cms.utils.instrumentation import (
+    CACHE_HIT,
+    CACHE_MISS,
+    instrument_render,
+    set_cache_outcome,
+)
 from cms.utils.permissions import has_plugin_permission
 from cms.utils.placeholder import (
     get_toolbar_plugin_struct,
@@ -32,6 +68,25 @@ from cms.utils.plugins import get_plugin_restrictions
 
 logger = logging.getLogger(__name__)
 
+# The processors of CMS_PLUGIN_PROCESSORS and CMS_PLUGIN_CONTEXT_PROCESSORS,
+# imported once and reset whenever these settings change.
+_standard_processors = {}
+
+
+def get_standard_processors(setting):
+    """
+    Returns a tuple of the callables listed in the CMS «setting».
+    """
+    if setting not in _standard_processors:
+        _standard_processors[setting] = tuple(import_string(path) for path in get_cms_setting(setting))
+    return _standard_processors[setting]
+
+
+@receiver(setting_changed)
+def reset_standard_processors(*, setting, **kwargs):
+    if setting in ('CMS_PLUGIN_PROCESSORS', 'CMS_PLUGIN_CONTEXT_PROCESSORS'):
+        _standard_processors.clear()
+
 
 def _unpack_plugins(parent_plugin):
     found_plugins = []
@@ -52,16 +107,23 @@ class RenderedPlaceholder:
         'editable',
         'placeholder',
         'has_content',
+        'cache_expiration',
+        'vary_cache_on',
     )
 
     def __init__(self, placeholder, language, site_id, cached=False,
-                 editable=False, has_content=False):
+                 editable=False, has_content=False, *, cache_expiration=None,
+                 vary_cache_on=None):
         self.language = language
         self.site_id = site_id
         self.cached = cached
         self.editable = editable
         self.placeholder = placeholder
         self.has_content = has_content
+        # The placeholder's cache metadata, computed once while rendering
+        # it for the cache (see BaseRenderer.get_placeholder_cache_metadata)
+        self.cache_expiration = cache_expiration
+        self.vary_cache_on = vary_cache_on
 
     def __eq__(self, other):
         # The same placeholder rendered with different
@@ -88,8 +150,10 @@ class BaseRenderer:
         self._placeholders_content_cache = {}
         self._placeholders_by_page_cache = {}
         self._rendered_placeholders = OrderedDict()
+        self._cached_placeholders = OrderedDict()
         self._rendered_static_placeholders = OrderedDict()
         self._rendered_plugins_by_placeholder = {}
+        self._static_placeholders_cache = {}
 
     @cached_property
     def current_page(self):
@@ -183,6 +247,12 @@ class BaseRenderer:
         rendered = list(self._rendered_placeholders.values())
         return [r.placeholder for r in rendered]
 
+    def get_cached_placeholders(self):
+        """
+        Returns the placeholders whose content was taken from the cache.
+        """
+        return list(self._cached_placeholders.values())
+
     def get_rendered_editable_placeholders(self):
         rendered = list(self._rendered_placeholders.values())
         return [r.placeholder for r in rendered if r.editable]
@@ -190,6 +260,19 @@ class BaseRenderer:
     def get_rendered_static_placeholders(self):
         return list(self._rendered_static_placeholders.values())
 
+    def get_placeholder_cache_metadata(self, placeholder, response_timestamp=None):
+        """
+        Returns the ``(ttl, vary_on_list)`` tuple of «placeholder» (see
+        Placeholder.get_cache_metadata()). The tuple computed when the
+        placeholder was rendered for the cache is reused, so that its
+        plugins are only inspected once per request.
+        """
+        rendered_placeholder = self._rendered_placeholders.get(placeholder.pk)
+
+        if rendered_placeholder is not None and rendered_placeholder.cache_expiration is not None:
+            return rendered_placeholder.cache_expiration, rendered_placeholder.vary_cache_on
+        return placeholder.get_cache_metadata(self.request, response_timestamp or now())
+
 
 class ContentRenderer(BaseRenderer):
 
@@ -207,6 +290,8 @@ class ContentRenderer(BaseRenderer):
     def __init__(self, request):
         super().__init__(request)
         self._placeholders_are_editable = bool(self.toolbar.edit_mode_active)
+        # Number of plugins being rendered without the cache
+        self._uncached_plugin_renders = 0
 
     def placeholder_cache_is_enabled(self):
         if not get_cms_setting('PLACEHOLDER_CACHE'):
@@ -215,12 +300,22 @@ class ContentRenderer(BaseRenderer):
             return False
         return not self._placeholders_are_editable
 
+    def plugin_fragment_cache_is_enabled(self):
+        if not get_cms_setting('PLUGIN_FRAGMENT_CACHE') or not get_cms_setting('PLUGIN_CACHE'):
+            return False
+        if self.request.user.is_staff:
+            return False
+        return not self._placeholders_are_editable
+
+    @instrument_render('placeholder', 'slot')
     def render_placeholder(self, placeholder, context, language=None, page=None,
                            editable=False, use_cache=False, nodelist=None, width=None):
         from sekizai.helpers import Watcher
 
         language = language or self.request_language
         editable = editable and self._placeholders_are_editable
+        # The plugins may be cached even if the placeholder is not
+        use_plugin_cache = use_cache
 
         if use_cache and not editable and placeholder.cache_placeholder:
             use_cache = self.placeholder_cache_is_enabled()
@@ -235,11 +330,18 @@ class ContentRenderer(BaseRenderer):
         else:
             cached_value = None
 
+        if cached_value is not None:
+            set_cache_outcome(self.request, CACHE_HIT)
+        elif use_cache:
+            set_cache_outcome(self.request, CACHE_MISS)
+
         if cached_value is not None:
             # User has opted to use the cache
             # and there is something in the cache
+            self._cached_placeholders[placeholder.pk] = placeholder
             restore_sekizai_context(context, cached_value['sekizai'])
-            return mark_safe(cached_value['content'])
+            allow_cache_holes(self.request, cached_value.get('holes', []))
+            return mark_safe(self._fill_cache_holes(cached_value['content']))
 
         context.push()
 
@@ -266,6 +368,7 @@ class ContentRenderer(BaseRenderer):
             context=context,
             editable=editable,
             template=template,
+            use_cache=use_plugin_cache,
         )
         placeholder_content = ''.join(plugin_content)
 
@@ -274,17 +377,26 @@ class ContentRenderer(BaseRenderer):
             placeholder_content = nodelist.render(context)
 
         if use_cache:
+            cache_expiration, vary_cache_on = self.get_placeholder_cache_metadata(placeholder)
             content = {
                 'content': placeholder_content,
                 'sekizai': watcher.get_changes(),
+                'holes': get_cache_holes(self.request, placeholder_content),
             }
+            duration = min(get_cms_setting('CACHE_DURATIONS')['content'], cache_expiration)
             set_placeholder_cache(
                 placeholder,
                 lang=language,
                 site_id=self.current_site.pk,
                 content=content,
                 request=self.request,
+                duration=duration,
+                vary_on_list=vary_cache_on,
             )
+        else:
+            cache_expiration = vary_cache_on = None
+
+        placeholder_content = self._fill_cache_holes(placeholder_content)
 
         rendered_placeholder = RenderedPlaceholder(
             placeholder=placeholder,
@@ -293,6 +405,8 @@ class ContentRenderer(BaseRenderer):
             cached=use_cache,
             editable=editable,
             has_content=bool(placeholder_content),
+            cache_expiration=cache_expiration,
+            vary_cache_on=vary_cache_on,
         )
 
         if placeholder.pk not in self._rendered_placeholders:
@@ -370,7 +484,11 @@ class ContentRenderer(BaseRenderer):
         if current_page.pk not in placeholder_cache:
             # Instead of loading plugins for this one placeholder
             # try and load them for all placeholders on the page.
-            self._preload_placeholders_for_page(current_page)
+            self._preload_placeholders_for_page(
+                current_page,
+                # The static placeholders are in the current page's template
+                context=context if current_page == self.current_page else None,
+            )
 
         try:
             placeholder = placeholder_cache[current_page.pk][slot]
@@ -425,17 +543,40 @@ class ContentRenderer(BaseRenderer):
             return content + nodelist.render(context)
         return content
 
-    def render_static_placeholder(self, static_placeholder, context, nodelist=None):
+    def get_static_placeholder(self, code, site_bound=False):
+        """
+        Returns the static placeholder with the «code», bound to the current
+        site if «site_bound». Static placeholders prefetched for the current
+        page are reused, missing ones are created.
+        """
+        key = (code, site_bound)
+
+        if key not in self._static_placeholders_cache:
+            kwargs = {
+                'code': code,
+                'defaults': {'creation_method': StaticPlaceholder.CREATION_BY_TEMPLATE}
+            }
+
+            if site_bound:
+                kwargs['site'] = get_current_site()
+            else:
+                kwargs['site_id__isnull'] = True
+            self._static_placeholders_cache[key] = StaticPlaceholder.objects.get_or_create(**kwargs)[0]
+        return self._static_placeholders_cache[key]
+
+    def _get_static_placeholder_options(self, static_placeholder):
+        """
+        Returns the ``(placeholder, editable, use_cache)`` tuple to render
+        «static_placeholder» with.
+        """
         user = self.request.user
 
         if self.toolbar.edit_mode_active and user.has_perm('cms.edit_static_placeholder'):
-            placeholder = static_placeholder.draft
-            editable = True
-            use_cache = False
-        else:
-            placeholder = static_placeholder.public
-            editable = False
-            use_cache = True
+            return static_placeholder.draft, True, False
+        return static_placeholder.public, False, True
+
+    def render_static_placeholder(self, static_placeholder, context, nodelist=None):
+        placeholder, editable, use_cache = self._get_static_placeholder_options(static_placeholder)
 
         # I really don't like these impromptu flags...
         placeholder.is_static = True
@@ -453,7 +594,22 @@ class ContentRenderer(BaseRenderer):
             self._rendered_static_placeholders[static_placeholder.pk] = static_placeholder
         return content
 
-    def render_plugin(self, instance, context, placeholder=None, editable=False):
+    @instrument_render('plugin', 'plugin_type')
+    def render_plugin(self, instance, context, placeholder=None, editable=False, use_cache=True):
+        if use_cache and not self._uncached_plugin_renders:
+            return self._render_plugin(instance, context, placeholder, editable, use_cache=True)
+
+        # The child plugins rendered by the plugin's template skip the cache too
+        self._uncached_plugin_renders += 1
+
+        try:
+            return self._render_plugin(instance, context, placeholder, editable, use_cache=False)
+        finally:
+            self._uncached_plugin_renders -= 1
+
+    def _render_plugin(self, instance, context, placeholder, editable, use_cache):
+        from sekizai.helpers import Watcher
+
         if not placeholder:
             placeholder = instance.placeholder
 
@@ -462,6 +618,25 @@ class ContentRenderer(BaseRenderer):
         if not instance or not plugin.render_plugin:
             return ''
 
+        cache_policy = None
+
+        if use_cache and not editable and self.plugin_fragment_cache_is_enabled():
+            # None if the plugin or one of its children cannot be cached
+            cache_policy = get_plugin_cache_policy(instance, placeholder, self.request, now())
+
+        if cache_policy:
+            cached_value = get_plugin_cache(instance, self.current_site.pk, self.request, vary_on_list=cache_policy[1])
+
+            if cached_value is not None:
+                set_cache_outcome(self.request, CACHE_HIT)
+                restore_sekizai_context(context, cached_value['sekizai'])
+                return mark_safe(cached_value['content'])
+            set_cache_outcome(self.request, CACHE_MISS)
+            watcher = Watcher(context)
+
+        # Holes punched while rendering the plugin (i.e. by its children)
+        holes_start = len(get_cache_hole_pks(self.request))
+
         # we'd better pass a flat dict to template.render
         # as plugin.render can return pretty much any kind of context / dictionary
         # we'd better flatten it and force to a Context object
@@ -475,6 +650,7 @@ class ContentRenderer(BaseRenderer):
         except Exception:  # catch errors when executing a plugin's render method
             context['exc_info'] = sys.exc_info()
             content = self.render_exception('executing plugin.render', instance, context, placeholder, editable)
+            cache_policy = None
             logger.error(
                 f"{instance.__class__.__name__}.render for plugin pk={instance.id} raised an exception",
                 exc_info=context['exc_info']
@@ -488,22 +664,49 @@ class ContentRenderer(BaseRenderer):
             except Exception:  # catch errors when rendering a plugin's template
                 context['exc_info'] = sys.exc_info()
                 content = self.render_exception('rendering template', instance, context, placeholder, editable)
+                cache_policy = None
                 logger.error(
                     f'Rendering "{template_name}" for plugin {instance.__class__.__name__} '
                     f'(pk={instance.id}) raised an exception',
                     exc_info=context['exc_info']
                 )
 
-        for path in get_cms_setting('PLUGIN_PROCESSORS'):
-            processor = import_string(path)
+        for processor in get_standard_processors('PLUGIN_PROCESSORS'):
             content = processor(instance, placeholder, content, context)
 
+        if is_hole_punching_enabled():
+            content = strip_cache_hole_markers(content, get_cache_hole_pks(self.request)[holes_start:])
+
+        if cache_policy:
+            ttl, vary_on_list = cache_policy
+            set_plugin_cache(
+                instance,
+                self.current_site.pk,
+                self.request,
+                {'content': content, 'sekizai': watcher.get_changes()},
+                ttl=ttl,
+                vary_on_list=vary_on_list,
+            )
+
+        if not editable and is_hole_punching_enabled():
+            expiration = plugin.get_cache_expiration(self.request, instance, placeholder)
+
+            if is_cache_hole(plugin, expiration):
+                # Keep the plugin out of the cached content
+                content = punch_cache_hole(self.request, instance, content)
+
         if editable:
             content = self.plugin_edit_template.format(pk=instance.pk, content=content)
             placeholder_cache = self._rendered_plugins_by_placeholder.setdefault(placeholder.pk, {})
             placeholder_cache.setdefault('plugins', []).append(instance)
         return mark_safe(content)
 
+    def _fill_cache_holes(self, content):
+        if not is_hole_punching_enabled() or cache_holes_are_deferred(self.request):
+            # The holes are filled once the page has been cached
+            return content
+        return fill_cache_holes(self.request, content)
+
     def render_exception(self, action, instance, context, placeholder, editable):
         if editable:
             exc, value, traceback = context['exc_info']
@@ -518,7 +721,7 @@ class ContentRenderer(BaseRenderer):
                 </div>'''
         return ''
 
-    def render_plugins(self, placeholder, language, context, editable=False, template=None):
+    def render_plugins(self, placeholder, language, context, editable=False, template=None, *, use_cache=True):
         plugins = self.get_plugins_to_render(
             placeholder=placeholder,
             template=template,
@@ -527,7 +730,7 @@ class ContentRenderer(BaseRenderer):
 
         for plugin in plugins:
             plugin._placeholder_cache = placeholder
-            yield self.render_plugin(plugin, context, placeholder, editable)
+            yield self.render_plugin(plugin, context, placeholder, editable, use_cache=use_cache)
 
     def _get_cached_placeholder_content(self, placeholder, language):
         """
@@ -543,19 +746,70 @@ class ContentRenderer(BaseRenderer):
         language_cache = site_cache.setdefault(language, {})
 
         if placeholder.pk not in language_cache:
-            cached_value = get_placeholder_cache(
+            # None means nothing in the cache
+            # Anything else is a valid value
+            language_cache[placeholder.pk] = get_placeholder_cache(
                 placeholder,
                 lang=language,
                 site_id=site_id,
                 request=self.request,
             )
 
-            if cached_value is not None:
-                # None means nothing in the cache
-                # Anything else is a valid value
-                language_cache[placeholder.pk] = cached_value
-        return language_cache.get(placeholder.pk)
+            if language_cache[placeholder.pk] is None and is_materialization_enabled():
+                materialized = self._get_materialized_placeholder_content([placeholder], language)
+                language_cache[placeholder.pk] = materialized.get(placeholder.pk)
+        return language_cache[placeholder.pk]
+
+    def _preload_cached_placeholder_content(self, placeholders, language):
+        """
+        Fetches the cached content of all «placeholders» at once, instead of
+        one by one in _get_cached_placeholder_content().
+        """
+        site_id = self.current_site.pk
+        language_cache = self._placeholders_content_cache.setdefault(site_id, {}).setdefault(language, {})
+        placeholders = [placeholder for placeholder in placeholders if placeholder.pk not in language_cache]
+
+        if placeholders:
+            cached_values = get_placeholder_caches(
+                placeholders,
+                lang=language,
+                site_id=site_id,
+                request=self.request,
+            )
+            missing = [placeholder for placeholder in placeholders if cached_values.get(placeholder.pk) is None]
+
+            if missing and is_materialization_enabled():
+                cached_values.update(self._get_materialized_placeholder_content(missing, language))
+
+            for placeholder in placeholders:
+                language_cache[placeholder.pk] = cached_values.get(placeholder.pk)
+
+    def _get_materialized_placeholder_content(self, placeholders, language):
+        """
+        Returns a dictionary mapping the primary keys of «placeholders» to the
+        content of their snapshots (see cms.cache.materialized), and puts the
+        content back into the placeholder cache.
+        """
+        site_id = self.current_site.pk
+        snapshots = get_materialized_placeholders(placeholders, lang=language, site_id=site_id)
+        contents = {}
+
+        for placeholder in placeholders:
+            if placeholder.pk not in snapshots:
+                continue
 
+            content, duration = snapshots[placeholder.pk]
+            set_placeholder_cache(
+                placeholder,
+                lang=language,
+                site_id=site_id,
+                content=content,
+                request=self.request,
+                duration=min(get_cms_setting('CACHE_DURATIONS')['content'], duration),
+                vary_on_list=[],
+            )
+            contents[placeholder.pk] = content
+        return contents
 
     def _get_content_object(self, page, slots=None):
         if self.toolbar.get_object() == page:
@@ -578,72 +832,167 @@ class ContentRenderer(BaseRenderer):
             placeholders = page_content.rescan_placeholders().values()
         return placeholders
 
-    def _preload_placeholders_for_page(self, page, slots=None, inherit=False):
+    def _get_placeholders_to_fetch(self, placeholders):
         """
-        Populates the internal plugin cache of each placeholder
-        in the given page if the placeholder has not been
-        previously cached.
+        Returns the «placeholders» whose plugins are needed, which are all
+        placeholders without cached content.
         """
-        from cms.utils.plugins import assign_plugins
-
-        placeholders = self._get_content_object(page, slots=slots)
-
-        if inherit:
-            # When the inherit flag is True,
-            # assume all placeholders found are inherited and thus prefetch them.
-            slots_w_inheritance = [pl.slot for pl in placeholders]
-        elif not self.toolbar.edit_mode_active:
-            # Scan through the page template to find all placeholders
-            # that have inheritance turned on.
-            slots_w_inheritance = [pl.slot for pl in page.get_declared_placeholders() if pl.inherit]
-        else:
-            # Inheritance is turned off on edit-mode
-            slots_w_inheritance = []
-
         if self.placeholder_cache_is_enabled():
+            self._preload_cached_placeholder_content(placeholders, self.request_language)
             _cached_content = self._get_cached_placeholder_content
             # Only prefetch plugins if the placeholder
             # has not been cached.
-            placeholders_to_fetch = [
+            return [
                 placeholder for placeholder in placeholders
                 if _cached_content(placeholder, self.request_language) is None]
-        else:
-            # cache is disabled, prefetch plugins for all
-            # placeholders in the page.
-            placeholders_to_fetch = placeholders
+        # cache is disabled, prefetch plugins for all
+        # placeholders.
+        return list(placeholders)
 
-        if placeholders_to_fetch:
-            assign_plugins(
-                request=self.request,
-                placeholders=placeholders_to_fetch,
-                template=page.get_template(),
-                lang=self.request_language,
-            )
+    def _get_static_placeholders_for_page(self, page, context):
+        """
+        Returns the placeholders of the static placeholders declared in the
+        template of «page», for the static placeholders which exist already.
+        The static placeholders are kept for get_static_placeholder().
+        """
+        from cms.utils.placeholder import get_declared_static_placeholders
 
-        # Inherit only placeholders that have no plugins
-        # or are not cached.
-        placeholders_to_inherit = [
-            pl.slot for pl in placeholders
-            if not getattr(pl, '_plugins_cache', None) and pl.slot in slots_w_inheritance
-        ]
+        declarations = get_declared_static_placeholders(page.get_template(), context)
+        keys = {
+            (declaration.slot, declaration.site_bound) for declaration in declarations
+            # Codes can also be StaticPlaceholder instances
+            if declaration.slot and isinstance(declaration.slot, str)
+        }
+        keys.difference_update(self._static_placeholders_cache)
 
-        if page.parent and placeholders_to_inherit:
-            self._preload_placeholders_for_page(
-                page=page.parent,
-                slots=placeholders_to_inherit,
-                inherit=True,
+        if not keys:
+            return []
+
+        site = get_current_site()
+        lookup = Q()
+
+        for code, site_bound in keys:
+            lookup |= Q(code=code, site=site) if site_bound else Q(code=code, site__isnull=True)
+
+        static_placeholders = StaticPlaceholder.objects.filter(lookup).select_related('draft', 'public')
+        placeholders = []
+
+        for static_placeholder in static_placeholders:
+            key = (static_placeholder.code, static_placeholder.site_id is not None)
+            self._static_placeholders_cache[key] = static_placeholder
+            placeholders.append(self._get_static_placeholder_options(static_placeholder)[0])
+        return placeholders
+
+    def _get_inherited_placeholders(self, page, slots):
+        """
+        Returns the ``(page, placeholders)`` tuples of the ancestors of «page»,
+        nearest first, with their placeholders of the «slots».
+        """
+        ancestors = list(page.get_ancestor_pages())[::-1]
+
+        if self.toolbar.preview_mode_active or self.toolbar.edit_mode_active:
+            page_contents = PageContent.admin_manager.current_content(
+                page__in=ancestors,
+                language=self.request_language,
             )
+        else:
+            page_contents = PageContent.objects.filter(page__in=ancestors, language=self.request_language)
+
+        page_content_pks = {}
 
-        # Internal cache mapping placeholder slots
-        # to placeholder instances.
-        page_placeholder_cache = {}
+        for page_id, page_content_pk in page_contents.order_by('pk').values_list('page', 'pk'):
+            page_content_pks.setdefault(page_id, page_content_pk)
+
+        placeholders_by_page_content = {}
+        placeholders = Placeholder.objects.filter(
+            content_type=ContentType.objects.get_for_model(PageContent),
+            object_id__in=page_content_pks.values(),
+            slot__in=slots,
+        )
 
         for placeholder in placeholders:
-            # Save a query when the placeholder toolbar is rendered.
-            placeholder.page = page
-            page_placeholder_cache[placeholder.slot] = placeholder
+            placeholders_by_page_content.setdefault(placeholder.object_id, []).append(placeholder)
+        return [
+            (ancestor, placeholders_by_page_content.get(page_content_pks.get(ancestor.pk), []))
+            for ancestor in ancestors
+        ]
 
-        self._placeholders_by_page_cache[page.pk] = page_placeholder_cache
+    def _preload_placeholders_for_page(self, page, context=None):
+        """
+        Populates the internal plugin cache of each placeholder
+        in the given page, of the placeholders it inherits from its
+        ancestors and of the static placeholders declared in its
+        template (if «context» is given), if the placeholder has not
+        been previously cached.
+
+        The plugins of all these placeholders are fetched with one query
+        and cast down at once.
+        """
+        from cms.utils.plugins import assign_plugins, fetch_plugins
+
+        if context is not None:
+            static_placeholders = self._get_static_placeholders_for_page(page, context)
+        else:
+            static_placeholders = []
+
+        placeholders = list(self._get_content_object(page))
+
+        if self.toolbar.edit_mode_active:
+            # Inheritance is turned off on edit-mode
+            slots = set()
+        else:
+            # Scan through the page template to find all placeholders
+            # that have inheritance turned on.
+            slots = {pl.slot for pl in page.get_declared_placeholders() if pl.inherit}
+
+        levels = [(page, placeholders)]
+
+        if slots and page.parent_id:
+            # The ancestors' placeholders are fetched up front,
+            # even though they might not be needed.
+            levels.extend(self._get_inherited_placeholders(page, slots))
+
+        placeholder_groups = [
+            (self._get_placeholders_to_fetch(level_placeholders), level_page.get_template())
+            for level_page, level_placeholders in levels
+        ]
+        # Static placeholders get their default plugins one by one
+        static_groups = [([placeholder], None) for placeholder in self._get_placeholders_to_fetch(static_placeholders)]
+        plugins = fetch_plugins(self.request, placeholder_groups + static_groups, lang=self.request_language)
+        filled_placeholders = {plugin.placeholder_id for plugin in plugins}
+        placeholders_to_assign = [placeholder for group, _ in static_groups for placeholder in group]
+
+        for index, (level_page, level_placeholders) in enumerate(levels):
+            placeholders_to_assign.extend(placeholder_groups[index][0])
+
+            # Internal cache mapping placeholder slots
+            # to placeholder instances.
+            page_placeholder_cache = {}
+
+            for placeholder in level_placeholders:
+                # Save a query when the placeholder toolbar is rendered.
+                placeholder.page = level_page
+                page_placeholder_cache[placeholder.slot] = placeholder
+
+            self._placeholders_by_page_cache[level_page.pk] = page_placeholder_cache
+
+            # Inherit only placeholders that have no plugins
+            # or are not cached.
+            slots = {
+                pl.slot for pl in level_placeholders
+                if pl.pk not in filled_placeholders and pl.slot in slots
+            }
+
+            if not slots:
+                break
+
+        assigned_placeholders = {placeholder.pk for placeholder in placeholders_to_assign}
+        assign_plugins(
+            request=self.request,
+            placeholders=placeholders_to_assign,
+            lang=self.request_language,
+            plugins=[plugin for plugin in plugins if plugin.placeholder_id in assigned_placeholders],
+        )
 
 
 class StructureRenderer(BaseRenderer):
@@ -756,17 +1105,22 @@ class PluginContext(Context):
     the processors defined in CMS_PLUGIN_CONTEXT_PROCESSORS.
     Additional processors can be specified as a list of callables
     using the "processors" keyword argument.
+
+    A context given as «dict_» is not copied, the plugin context is layered
+    over it. Variables set on the plugin context do not change it.
     """
 
     def __init__(self, dict_, instance, placeholder, processors=None, current_app=None):
-        dict_ = flatten_context(dict_)
-        super().__init__(dict_)
+        if isinstance(dict_, BaseContext):
+            super().__init__()
+            self.dicts = dict_.dicts + [{}]
+        else:
+            super().__init__(dict_)
 
         if not processors:
             processors = []
 
-        for path in get_cms_setting('PLUGIN_CONTEXT_PROCESSORS'):
-            processor = import_string(path)
+        for processor in get_standard_processors('PLUGIN_CONTEXT_PROCESSORS'):
             self.update(processor(instance, placeholder, self))
         for processor in processors:
             self.update(processor(instance, placeholder, self))
@@ -78,6 +78,11 @@ _placeholder_operations_map = {
         'flag': CHANGE,
         'placeholder_kwarg': 'placeholder'
     },
+    operations.BATCH_PLUGIN_OPERATIONS: {
+        'message': _("Changed Plugins"),
+        'flag': CHANGE,
+        'placeholder_kwarg': 'placeholder'
+    },
 }
 
 
@@ -1,31 +1,91 @@
+from functools import lru_cache
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.template import engines
 from django.template.loader import get_template
+from django.template.loaders.cached import Loader as CachedLoader
+from django.utils.autoreload import file_changed
 from django.utils.functional import cached_property
 
 
+@lru_cache(maxsize=1024)
+def _get_template(template, using=None):
+    # this always return an engine-specific template object
+    return get_template(template, using=using)
+
+
+@lru_cache(maxsize=16)
+def _uses_cached_loader(using=None):
+    """
+    Returns True if the template engine named «using» (or all engines) only
+    load the templates once, with Django's cached template loader. Otherwise
+    the templates must be loaded again, e.g. because they are edited.
+    """
+    backends = [engines[using]] if using else engines.all()
+
+    for backend in backends:
+        # Only Django's template engine has template loaders
+        loaders = getattr(getattr(backend, 'engine', None), 'template_loaders', None)
+
+        if not loaders or not all(isinstance(loader, CachedLoader) for loader in loaders):
+            return False
+    return True
+
+
+def get_cached_template(template, using=None):
+    """
+    Returns the engine-specific template object of the «template» name. The
+    template objects are shared by all requests of the process if the
+    template engine caches them as well.
+    """
+    # we check if template quacks like a Template, as generic Template and engine-specific Template
+    # does not share a common ancestor
+    if hasattr(template, 'render'):
+        return template
+
+    if not _uses_cached_loader(using):
+        return get_template(template, using=using)
+    return _get_template(template, using=using)
+
+
+@receiver(setting_changed)
+def reset_cached_templates_on_setting_change(*, setting, **kwargs):
+    if setting == 'TEMPLATES':
+        _uses_cached_loader.cache_clear()
+        _get_template.cache_clear()
+
+
+@receiver(file_changed)
+def reset_cached_templates_on_file_change(**kwargs):
+    # Like the template loaders, which the development server resets when
+    # a file changes, so that changed templates are loaded again
+    _get_template.cache_clear()
+
+
 class TemplatesCache:
 
     def __init__(self):
         self._cached_templates = {}
 
     def get_cached_template(self, template):
-        # we check if template quacks like a Template, as generic Template and engine-specific Template
-        # does not share a common ancestor
-        if hasattr(template, 'render'):
-            return template
+        if hasattr(template, 'render') or _uses_cached_loader():
+            return get_cached_template(template)
 
+        # Without the cached loader, the templates are still only loaded
+        # once per request
         if template not in self._cached_templates:
-            # this always return an engine-specific template object
             self._cached_templates[template] = get_template(template)
         return self._cached_templates[template]
 
     @cached_property
     def drag_item_template(self):
-        return get_template('cms/toolbar/dragitem.html')
+        return self.get_cached_template('cms/toolbar/dragitem.html')
 
     @cached_property
     def placeholder_plugin_menu_template(self):
-        return get_template('cms/toolbar/dragitem_menu.html')
+        return self.get_cached_template('cms/toolbar/dragitem_menu.html')
 
     @cached_property
     def dragbar_template(self):
-        return get_template('cms/toolbar/dragbar.html')
+        return self.get_cached_template('cms/toolbar/dragbar.html')
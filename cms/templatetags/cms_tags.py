@@ -894,16 +894,7 @@ class StaticPlaceholderNode(Tag):
         if isinstance(code, StaticPlaceholder):
             static_placeholder = code
         else:
-            kwargs = {
-                'code': code,
-                'defaults': {'creation_method': StaticPlaceholder.CREATION_BY_TEMPLATE}
-            }
-
-            if 'site' in extra_bits:
-                kwargs['site'] = get_current_site()
-            else:
-                kwargs['site_id__isnull'] = True
-            static_placeholder = StaticPlaceholder.objects.get_or_create(**kwargs)[0]
+            static_placeholder = renderer.get_static_placeholder(code, site_bound='site' in extra_bits)
 
         content = renderer.render_static_placeholder(
             static_placeholder,
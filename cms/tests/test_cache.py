@@ -1,22 +1,41 @@
+import gzip
+import re
 import time
+from datetime import timedelta
+from unittest.mock import patch
 
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 from django.template import Context
+from django.template.response import TemplateResponse
+from django.test import RequestFactory, override_settings
+from django.utils.timezone import now
 from sekizai.context import SekizaiContext
 
 from cms.api import add_plugin, create_page, create_page_content
-from cms.cache import invalidate_cms_page_cache
+from cms.cache import (
+    CMS_PAGE_CACHE_VERSION_KEY,
+    _get_cache_version,
+    get_cms_page_cache_tag_versions,
+    invalidate_cms_page_cache,
+    invalidate_cms_page_cache_tags,
+)
+from cms.cache.local import clear_local_cache, get_local_cache_stats
+from cms.cache.page import get_page_cache, get_page_cache_stats, set_page_cache
 from cms.cache.placeholder import (
+    _get_placeholder_cache_entry_key,
     _get_placeholder_cache_key,
     _get_placeholder_cache_version,
     _get_placeholder_cache_version_key,
     _set_placeholder_cache_version,
     clear_placeholder_cache,
     get_placeholder_cache,
+    get_placeholder_caches,
     set_placeholder_cache,
 )
 from cms.exceptions import PluginAlreadyRegistered
-from cms.models import Page
+from cms.middleware.cache import PageCacheMiddleware
+from cms.models import Page, Placeholder, PlaceholderSnapshot, StaticPlaceholder
 from cms.plugin_pool import plugin_pool
 from cms.test_utils.project.placeholderapp.models import Example1
 from cms.test_utils.project.pluginapp.plugins.caching.cms_plugins import (
@@ -34,6 +53,7 @@ from cms.toolbar.toolbar import CMSToolbar
 from cms.toolbar.utils import get_object_edit_url
 from cms.utils.conf import get_cms_setting
 from cms.utils.helpers import get_timezone_name
+from menus.menu_pool import menu_pool
 
 
 class CacheTestCase(CMSTestCase):
@@ -42,6 +62,9 @@ class CacheTestCase(CMSTestCase):
 
         super().tearDown()
         cache.clear()
+        # The lists of registered plugins are computed again
+        # once the test's plugins have been unregistered
+        plugin_pool._clear_cached()
 
     def setUp(self):
         from django.core.cache import cache
@@ -49,6 +72,20 @@ class CacheTestCase(CMSTestCase):
         super().setUp()
         cache.clear()
 
+    def page_cache_settings(self, middleware=(), exclude=(), **overrides):
+        """
+        Overrides the settings to serve pages through the CMS page cache only,
+        without django's cache middleware. ``middleware`` is put in front of
+        the remaining middleware and ``exclude`` is removed as well.
+        """
+        exclude = [
+            "django.middleware.cache.UpdateCacheMiddleware",
+            "django.middleware.cache.FetchFromCacheMiddleware",
+            *exclude,
+        ]
+        overrides["MIDDLEWARE"] = [*middleware, *(mw for mw in settings.MIDDLEWARE if mw not in exclude)]
+        return self.settings(**overrides)
+
     def test_cache_placeholder(self):
         template = "{% load cms_tags %}{% placeholder 'body' %}{% placeholder 'right-column' %}"
         page1 = create_page("test page 1", "nav_playground.html", "en")
@@ -452,6 +489,44 @@ class CacheTestCase(CMSTestCase):
                     response = self.client.get(page1_url)
                 self.assertEqual(response.status_code, 200)
 
+    def test_page_cache_middleware(self):
+        with self.page_cache_settings(middleware=["cms.middleware.cache.PageCacheMiddleware"]):
+            page1 = create_page("test page 1", "nav_playground.html", "en")
+            page1_url = page1.get_absolute_url()
+            placeholder = page1.get_placeholders("en").filter(slot="body")[0]
+            add_plugin(placeholder, "TextPlugin", "en", body="English")
+
+            # Populates the page cache
+            response = self.client.get(page1_url)
+            self.assertEqual(response.status_code, 200)
+
+            def get_response(request):
+                raise AssertionError("The request should not reach the view")
+
+            # A hit is served without running any other middleware
+            request = RequestFactory().get(page1_url)
+            response = PageCacheMiddleware(get_response)(request)
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, "English")
+            self.assertFalse(hasattr(request, "session"))
+            self.assertFalse(hasattr(request, "user"))
+
+            # Requests with a session cookie, non-GET requests and
+            # misses are passed on.
+            request = RequestFactory().get(page1_url)
+            request.COOKIES[settings.SESSION_COOKIE_NAME] = "session"
+            self.assertIsNone(PageCacheMiddleware(get_response).process_request(request))
+            request = RequestFactory().post(page1_url)
+            self.assertIsNone(PageCacheMiddleware(get_response).process_request(request))
+            request = RequestFactory().get(page1_url + "?toolbar_on")
+            self.assertIsNone(PageCacheMiddleware(get_response).process_request(request))
+            request = RequestFactory().get("/en/unknown/")
+            self.assertIsNone(PageCacheMiddleware(get_response).process_request(request))
+
+            with self.settings(CMS_PAGE_CACHE=False):
+                request = RequestFactory().get(page1_url)
+                self.assertIsNone(PageCacheMiddleware(get_response).process_request(request))
+
     def test_no_page_cache_on_toolbar_edit(self):
         with self.settings(CMS_PAGE_CACHE=True):
             superuser = self.get_superuser()
@@ -580,6 +655,572 @@ class CacheTestCase(CMSTestCase):
             response = self.client.get(page1_url)
             self.assertContains(response, "A Link")
 
+    def test_targeted_cache_invalidation(self):
+        with self.page_cache_settings():
+            page1 = create_page("test page 1", "nav_playground.html", "en")
+            page2 = create_page("test page 2", "nav_playground.html", "en")
+            placeholder1 = page1.get_placeholders("en").get(slot="body")
+            placeholder2 = page2.get_placeholders("en").get(slot="body")
+            add_plugin(placeholder1, "TextPlugin", "en", body="First content")
+            add_plugin(placeholder2, "TextPlugin", "en", body="Second content")
+
+            for page in (page1, page2):
+                self.client.get(page.get_absolute_url())
+
+            # Only the page rendered from the changed placeholder is invalidated
+            placeholder1.clear_cache("en")
+            with self.assertNumQueries(0):
+                response = self.client.get(page2.get_absolute_url())
+            self.assertContains(response, "Second content")
+            with self.assertNumQueries(FuzzyInt(1, 25)):
+                response = self.client.get(page1.get_absolute_url())
+            self.assertContains(response, "First content")
+
+            # Clearing a page's cache does not affect other pages
+            page2.clear_cache()
+            with self.assertNumQueries(0):
+                self.client.get(page1.get_absolute_url())
+            with self.assertNumQueries(FuzzyInt(1, 25)):
+                self.client.get(page2.get_absolute_url())
+
+            # Menu changes invalidate all pages of the site
+            page1.clear_cache(menu=True)
+            for page in (page1, page2):
+                with self.assertNumQueries(FuzzyInt(1, 25)):
+                    self.client.get(page.get_absolute_url())
+
+            # The global invalidation is still available
+            invalidate_cms_page_cache()
+            with self.assertNumQueries(FuzzyInt(1, 25)):
+                self.client.get(page1.get_absolute_url())
+
+    def test_page_cache_grace_period(self):
+        with self.page_cache_settings(CMS_PAGE_CACHE_GRACE_PERIOD=30):
+            page1 = create_page("test page 1", "nav_playground.html", "en")
+            page1_url = page1.get_absolute_url()
+            placeholder = page1.get_placeholders("en").get(slot="body")
+            add_plugin(placeholder, "TextPlugin", "en", body="First content")
+            self.client.get(page1_url)
+            self.assertEqual(get_page_cache_stats(), {"stale": 0, "revalidations": 0})
+
+            placeholder.clear_cache("en")
+            # The first request after the invalidation re-renders the page...
+            request = self.get_request(page1_url)
+            self.assertIsNone(get_page_cache(request))
+            # ...while all others get the stale content in the meantime.
+            with self.assertNumQueries(0):
+                response = self.client.get(page1_url)
+            self.assertContains(response, "First content")
+            self.assertIn("max-age=0", response["Cache-Control"])
+            self.assertEqual(get_page_cache_stats(), {"stale": 1, "revalidations": 1})
+
+            # Rendering the page stores the fresh content and releases the lock
+            request.current_page = page1
+            request.toolbar = CMSToolbar(request)
+            response = TemplateResponse(request, "nav_playground.html", {})
+            response.render()
+            set_page_cache(response)
+            self.assertFalse(hasattr(request, "_page_cache_lock_key"))
+            with self.assertNumQueries(0):
+                response = self.client.get(page1_url)
+            self.assertNotIn("max-age=0", response["Cache-Control"])
+            self.assertEqual(get_page_cache_stats(), {"stale": 1, "revalidations": 1})
+
+        # Without a grace period, invalidated entries are never served
+        with self.settings(CMS_PAGE_CACHE_GRACE_PERIOD=0):
+            placeholder.clear_cache("en")
+            request = self.get_request(page1_url)
+            self.assertIsNone(get_page_cache(request))
+            self.assertIsNone(get_page_cache(request))
+
+    def test_page_cache_legacy_entries(self):
+        from django.core.cache import cache
+
+        from cms.cache.page import _page_cache_key
+
+        with self.page_cache_settings():
+            page1 = create_page("test page 1", "nav_playground.html", "en")
+            page1_url = page1.get_absolute_url()
+            placeholder = page1.get_placeholders("en").get(slot="body")
+            add_plugin(placeholder, "TextPlugin", "en", body="Current content")
+            cache_key = _page_cache_key(self.get_request(page1_url))
+
+            # Entries in the format of other versions are cache misses
+            for legacy_entry in [(b"Old content", {}, now()), ["Old content"], "Old content"]:
+                cache.set(cache_key, legacy_entry)
+                self.assertIsNone(get_page_cache(self.get_request(page1_url)))
+                self.assertContains(self.client.get(page1_url), "Current content")
+                # The entry has been replaced
+                self.assertIsNotNone(get_page_cache(self.get_request(page1_url)))
+
+    def test_page_cache_compression(self):
+        from django.core.cache import cache
+
+        from cms.cache.page import _page_cache_key
+
+        with self.page_cache_settings(CMS_PAGE_CACHE_COMPRESSION="gzip"):
+            page1 = create_page("test page 1", "nav_playground.html", "en")
+            page1_url = page1.get_absolute_url()
+            placeholder = page1.get_placeholders("en").get(slot="body")
+            add_plugin(placeholder, "TextPlugin", "en", body="First content")
+            content = self.client.get(page1_url).content
+
+            # Clients accepting gzip get the compressed content...
+            with self.assertNumQueries(0):
+                response = self.client.get(page1_url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+            self.assertEqual(response["Content-Encoding"], "gzip")
+            self.assertIn("Accept-Encoding", response["Vary"])
+            self.assertEqual(gzip.decompress(response.content), content)
+
+            # ...all others get it decompressed.
+            with self.assertNumQueries(0):
+                response = self.client.get(page1_url)
+            self.assertFalse(response.has_header("Content-Encoding"))
+            self.assertEqual(response.content, content)
+            self.assertEqual(get_page_cache(self.get_request(page1_url))[0], content)
+
+        with self.settings(CMS_PAGE_CACHE_COMPRESSION="zip"):
+            cache.clear()
+            with self.assertRaises(ImproperlyConfigured):
+                self.client.get(page1_url)
+
+        with self.page_cache_settings(CMS_PAGE_CACHE_COMPRESSION="br"):
+            cache.clear()
+            with patch("cms.cache.page.brotli") as brotli:
+                brotli.compress.side_effect = lambda content: b"br" + content
+                self.client.get(page1_url)
+            self.assertIsNotNone(cache.get(_page_cache_key(self.get_request(page1_url))))
+
+        # Processes without brotli ignore the entries compressed with it
+        with self.page_cache_settings(), patch("cms.cache.page.brotli", None):
+            self.assertIsNone(get_page_cache(self.get_request(page1_url)))
+            response = self.client.get(page1_url, HTTP_ACCEPT_ENCODING="br")
+            self.assertFalse(response.has_header("Content-Encoding"))
+            self.assertEqual(response.content, content)
+
+    def test_page_cache_hole_punching(self):
+        plugin_pool.register_plugin(NoCachePlugin)
+        self.addCleanup(plugin_pool.unregister_plugin, NoCachePlugin)
+
+        with self.page_cache_settings(CMS_PAGE_CACHE_HOLE_PUNCHING=True):
+            page1 = create_page("test page 1", "nav_playground.html", "en")
+            page1_url = page1.get_absolute_url()
+            placeholder = page1.get_placeholders("en").get(slot="body")
+            add_plugin(placeholder, "TextPlugin", "en", body="Cached content")
+            no_cache_plugin = add_plugin(placeholder, "NoCachePlugin", "en")
+            marker = f"<!--cms-cache-hole:{no_cache_plugin.pk}-->"
+
+            response = self.client.get(page1_url)
+            content = response.content.decode("utf8")
+            self.assertNotIn("no-cache", response["Cache-Control"])
+            self.assertIn("Cached content", content)
+            self.assertIn("$$$", content)
+            self.assertNotIn(marker, content)
+            # The cached page keeps the marker of the plugin
+            cached_content, cached_headers, _expires = get_page_cache(self.get_request(page1_url))
+            cached_content = cached_content.decode("utf8")
+            self.assertNotIn("ETag", cached_headers)
+            self.assertIn(marker, cached_content)
+            self.assertNotIn("$$$", cached_content)
+
+            # Only the NoCachePlugin is rendered for the cached page
+            with self.assertNumQueries(FuzzyInt(1, 5)):
+                response = self.client.get(page1_url)
+            content = response.content.decode("utf8")
+            self.assertIn("Cached content", content)
+            self.assertIn("$$$", content)
+            self.assertNotIn(marker, content)
+
+            # The middleware leaves pages with holes to the details view
+            middleware = PageCacheMiddleware(lambda request: None)
+            self.assertIsNone(middleware.process_request(RequestFactory().get(page1_url)))
+
+            # Placeholders rendered outside of pages are filled right away
+            template = "{% load cms_tags %}{% placeholder 'body' %}"
+            for _i in range(2):
+                request = self.get_request(page1_url)
+                request.current_page = Page.objects.get(pk=page1.pk)
+                request.toolbar = CMSToolbar(request)
+                output = self.render_template_obj(template, {}, request)
+                self.assertIn("Cached content", output)
+                self.assertIn("$$$", output)
+                self.assertNotIn(marker, output)
+
+    def test_page_cache_without_hole_punching(self):
+        with self.page_cache_settings():
+            page1 = create_page("test page 1", "nav_playground.html", "en")
+            # The content is not scanned for markers
+            with patch("cms.cache.page.get_cache_holes") as get_cache_holes:
+                self.client.get(page1.get_absolute_url())
+            get_cache_holes.assert_not_called()
+            self.assertIsNotNone(get_page_cache(self.get_request(page1.get_absolute_url())))
+
+    def test_page_cache_hole_punching_foreign_markers(self):
+        plugin_pool.register_plugin(NoCachePlugin)
+        self.addCleanup(plugin_pool.unregister_plugin, NoCachePlugin)
+
+        with self.page_cache_settings(CMS_PAGE_CACHE_HOLE_PUNCHING=True):
+            page1 = create_page("test page 1", "nav_playground.html", "en")
+            page2 = create_page("test page 2", "nav_playground.html", "en")
+            placeholder = page1.get_placeholders("en").get(slot="body")
+            other_plugin = add_plugin(page2.get_placeholders("en").get(slot="body"), "NoCachePlugin", "en")
+            no_cache_plugin = add_plugin(placeholder, "NoCachePlugin", "en")
+            # Markers in the content of plugins are not filled
+            text = add_plugin(
+                placeholder,
+                "TextPlugin",
+                "en",
+                body=f"Cached content<!--cms-cache-hole:{other_plugin.pk}-->"
+                     f"<!--cms-cache-hole:{no_cache_plugin.pk}-->",
+            )
+            marker = f"<!--cms-cache-hole:{text.pk}-->"
+
+            for _i in range(2):
+                content = self.client.get(page1.get_absolute_url()).content.decode("utf8")
+                self.assertIn("Cached content", content)
+                self.assertEqual(len(re.findall(r"\$\$\$[0-9]+\$\$\$", content)), 1)
+                self.assertNotIn("<!--cms-cache-hole:", content)
+
+            cached_content = get_page_cache(self.get_request(page1.get_absolute_url()))[0].decode("utf8")
+            self.assertEqual(re.findall("<!--cms-cache-hole:[0-9]+-->", cached_content), [
+                f"<!--cms-cache-hole:{no_cache_plugin.pk}-->"
+            ])
+            self.assertNotIn(marker, cached_content)
+
+    def test_fill_cache_holes_cycle(self):
+        from cms.cache.holes import allow_cache_holes, fill_cache_holes, get_hole_marker
+
+        request = self.get_request("/")
+        # Holes with each other's markers are filled once
+        request._cms_cache_holes = {1: f"one{get_hole_marker(2)}", 2: f"two{get_hole_marker(1)}"}
+        allow_cache_holes(request, [1, 2])
+        self.assertEqual(fill_cache_holes(request, f"{get_hole_marker(1)}{get_hole_marker(3)}"), "onetwo")
+
+    def test_plugin_fragment_cache(self):
+        plugin_pool.register_plugin(NoCachePlugin)
+        plugin_pool.register_plugin(TTLCacheExpirationPlugin)
+        self.addCleanup(plugin_pool.unregister_plugin, NoCachePlugin)
+        self.addCleanup(plugin_pool.unregister_plugin, TTLCacheExpirationPlugin)
+
+        with self.page_cache_settings(CMS_PLUGIN_FRAGMENT_CACHE=True):
+            page1 = create_page("test page 1", "nav_playground.html", "en")
+            page1_url = page1.get_absolute_url()
+            placeholder = page1.get_placeholders("en").get(slot="body")
+            ttl_plugin = add_plugin(placeholder, "TTLCacheExpirationPlugin", "en")
+            add_plugin(placeholder, "NoCachePlugin", "en")
+
+            # The NoCachePlugin disables the placeholder and page caches
+            response = self.client.get(page1_url)
+            self.assertIn("no-cache", response["Cache-Control"])
+            cached_now, live_now = re.findall(r"\$\$\$(\d+)\$\$\$", response.content.decode("utf8"))
+            # ...but the TTLCacheExpirationPlugin is served from its fragment cache
+            response = self.client.get(page1_url)
+            nows = re.findall(r"\$\$\$(\d+)\$\$\$", response.content.decode("utf8"))
+            self.assertEqual(nows[0], cached_now)
+            self.assertNotEqual(nows[1], live_now)
+
+            # Changing the plugin changes its cache key
+            ttl_plugin.save()
+            response = self.client.get(page1_url)
+            nows = re.findall(r"\$\$\$(\d+)\$\$\$", response.content.decode("utf8"))
+            self.assertNotEqual(nows[0], cached_now)
+
+    def test_plugin_fragment_cache_use_cache(self):
+        plugin_pool.register_plugin(TTLCacheExpirationPlugin)
+        self.addCleanup(plugin_pool.unregister_plugin, TTLCacheExpirationPlugin)
+
+        with self.page_cache_settings(CMS_PLUGIN_FRAGMENT_CACHE=True):
+            page1 = create_page("test page 1", "nav_playground.html", "en")
+            placeholder = page1.get_placeholders("en").get(slot="body")
+            add_plugin(placeholder, "TTLCacheExpirationPlugin", "en")
+            # Only the plugins are cached
+            placeholder.cache_placeholder = False
+            request = self.get_request(page1.get_absolute_url(), page=page1)
+            request.toolbar = CMSToolbar(request)
+            renderer = self.get_content_renderer(request)
+
+            def render(**kwargs):
+                context = SekizaiContext({"request": request})
+                return renderer.render_placeholder(placeholder, context, **kwargs)
+
+            cached_content = render(use_cache=True)
+            self.assertEqual(render(use_cache=True), cached_content)
+            # The plugins are not cached if the caller doesn't want a cached render
+            uncached_content = render(use_cache=False)
+            self.assertNotEqual(uncached_content, cached_content)
+            self.assertNotEqual(render(use_cache=False), uncached_content)
+            self.assertEqual(render(use_cache=True), cached_content)
+
+            template = "{% load cms_tags %}{% show_uncached_placeholder 'body' page %}"
+            content = self.render_template_obj(template, {"page": page1}, request)
+            self.assertNotEqual(content, cached_content)
+
+    def test_materialized_placeholder_cache(self):
+        from django.core.cache import cache
+
+        with self.page_cache_settings(CMS_PAGE_CACHE=False, CMS_PLACEHOLDER_CACHE_MATERIALIZED=True):
+            page1 = create_page("test page 1", "nav_playground.html", "en")
+            page1_url = page1.get_absolute_url()
+            placeholder = page1.get_placeholders("en").get(slot="body")
+            add_plugin(placeholder, "TextPlugin", "en", body="First content")
+            # The snapshots are written once the changes are committed
+            with self.captureOnCommitCallbacks(execute=True):
+                page1.clear_cache("en", placeholder=True)
+                self.assertFalse(PlaceholderSnapshot.objects.exists())
+            snapshot = PlaceholderSnapshot.objects.get(placeholder=placeholder)
+            self.assertIn("First content", snapshot.content)
+            # Snapshots do not expire with the placeholder cache
+            self.assertGreater(
+                snapshot.expires,
+                now() + timedelta(seconds=get_cms_setting("CACHE_DURATIONS")["content"]),
+            )
+
+            # The plugins are not rendered for an empty cache
+            cache.clear()
+            with patch("cms.plugin_rendering.ContentRenderer.render_plugins") as render_plugins:
+                self.assertContains(self.client.get(page1_url), "First content")
+            render_plugins.assert_not_called()
+            # The snapshot is put back into the placeholder cache
+            request = self.get_request(page1_url)
+            self.assertEqual(get_placeholder_cache(placeholder, "en", 1, request)["content"], snapshot.content)
+
+            add_plugin(placeholder, "TextPlugin", "en", body="Second content")
+            with self.captureOnCommitCallbacks(execute=True):
+                placeholder.clear_cache("en")
+                self.assertFalse(PlaceholderSnapshot.objects.filter(placeholder=placeholder).exists())
+            self.assertIn("Second content", PlaceholderSnapshot.objects.get(placeholder=placeholder).content)
+
+            # Snapshots are not written while serving requests
+            PlaceholderSnapshot.objects.all().delete()
+            cache.clear()
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertContains(self.client.get(page1_url), "Second content")
+            self.assertFalse(PlaceholderSnapshot.objects.exists())
+
+    def test_materialized_placeholder_duration(self):
+        with self.page_cache_settings(
+            CMS_PAGE_CACHE=False,
+            CMS_PLACEHOLDER_CACHE_MATERIALIZED=True,
+            CMS_PLACEHOLDER_CACHE_MATERIALIZED_DURATION=30,
+        ):
+            page1 = create_page("test page 1", "nav_playground.html", "en")
+            placeholder = page1.get_placeholders("en").get(slot="body")
+            add_plugin(placeholder, "TextPlugin", "en", body="First content")
+            with self.captureOnCommitCallbacks(execute=True):
+                page1.clear_cache("en", placeholder=True)
+            snapshot = PlaceholderSnapshot.objects.get(placeholder=placeholder)
+            self.assertLessEqual(snapshot.expires, now() + timedelta(seconds=30))
+
+            # Placeholders which cannot be cached are not stored
+            plugin_pool.register_plugin(NoCachePlugin)
+            self.addCleanup(plugin_pool.unregister_plugin, NoCachePlugin)
+            add_plugin(placeholder, "NoCachePlugin", "en")
+            with self.captureOnCommitCallbacks(execute=True):
+                placeholder.clear_cache("en")
+            self.assertFalse(PlaceholderSnapshot.objects.filter(placeholder=placeholder).exists())
+
+    def test_page_cache_query_parameters(self):
+        with self.page_cache_settings():
+            page1 = create_page("test page 1", "nav_playground.html", "en")
+            page1_url = page1.get_absolute_url()
+            self.client.get(f"{page1_url}?b=2&a=1&a=0")
+
+            # Tracking parameters and the parameters' order are ignored
+            with self.assertNumQueries(0):
+                self.client.get(f"{page1_url}?a=1&utm_source=newsletter&a=0&b=2&fbclid=123")
+            # The order of the values of a parameter is not
+            with self.assertNumQueries(FuzzyInt(1, 30)):
+                self.client.get(f"{page1_url}?a=0&a=1&b=2")
+
+            with self.settings(CMS_PAGE_CACHE_ALLOWED_QUERY_PARAMETERS=["page"]):
+                self.client.get(f"{page1_url}?page=2")
+                with self.assertNumQueries(0):
+                    self.client.get(f"{page1_url}?page=2&q=search")
+                with self.assertNumQueries(FuzzyInt(1, 30)):
+                    self.client.get(f"{page1_url}?page=3")
+
+            with self.settings(CMS_PAGE_CACHE_IGNORED_QUERY_PARAMETERS=[]):
+                with self.assertNumQueries(FuzzyInt(1, 30)):
+                    self.client.get(f"{page1_url}?b=2&a=1&a=0&utm_source=newsletter")
+
+    def test_page_cache_surrogate_keys(self):
+        with self.page_cache_settings(CMS_PAGE_CACHE_SURROGATE_KEY_HEADERS=["Surrogate-Key", "Cache-Tag"], CMS_PAGE_CACHE_PURGE_BACKEND="cms.cache.purge.LoggingPurgeBackend"):
+            page1 = create_page("test page 1", "nav_playground.html", "en")
+            page1_url = page1.get_absolute_url()
+            placeholder = page1.get_placeholders("en").get(slot="body")
+            add_plugin(placeholder, "TextPlugin", "en", body="First content")
+            response = self.client.get(page1_url)
+            surrogate_keys = response["Surrogate-Key"].split(" ")
+            self.assertIn("site:1", surrogate_keys)
+            self.assertIn(f"page:{page1.pk}", surrogate_keys)
+            self.assertIn(f"placeholder:{placeholder.pk}", surrogate_keys)
+            self.assertEqual(response["Cache-Tag"].split(","), surrogate_keys)
+            # The headers are cached with the page
+            with self.assertNumQueries(0):
+                response = self.client.get(page1_url)
+            self.assertEqual(response["Surrogate-Key"].split(" "), surrogate_keys)
+
+            with self.assertLogs("cms.cache.purge", level="INFO") as logs:
+                # The purges are sent once the changes are committed
+                with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                    placeholder.clear_cache("en")
+                    page1.clear_cache(menu=True)
+                    menu_pool.clear(all=True)
+                    invalidate_cms_page_cache()
+                    # The version bump on process start is not purged
+                    invalidate_cms_page_cache(purge=False)
+                self.assertEqual(len(callbacks), 4)
+            self.assertEqual(logs.output, [
+                f"INFO:cms.cache.purge:Purging page cache tags: placeholder:{placeholder.pk}",
+                "INFO:cms.cache.purge:Purging page cache tags: site:1",
+                "INFO:cms.cache.purge:Purging all pages",
+                "INFO:cms.cache.purge:Purging all pages",
+            ])
+
+    def test_page_cache_purge_permission_change(self):
+        from cms.models import PagePermission
+
+        with self.page_cache_settings(CMS_PAGE_CACHE_PURGE_BACKEND="cms.cache.purge.LoggingPurgeBackend"):
+            page1 = create_page("test page 1", "nav_playground.html", "en")
+            user = self.get_staff_user_with_no_permissions()
+
+            # Restricting the view of a page purges the public copies
+            with self.assertLogs("cms.cache.purge", level="INFO") as logs:
+                with self.captureOnCommitCallbacks(execute=True):
+                    PagePermission.objects.create(page=page1, user=user, can_view=True)
+            self.assertIn("INFO:cms.cache.purge:Purging all pages", logs.output)
+
+    def test_page_cache_toggle_in_navigation(self):
+        with self.page_cache_settings():
+            page1 = create_page("test page 1", "nav_playground.html", "en")
+            page2 = create_page("test page 2", "nav_playground.html", "en", in_navigation=True)
+            page1_url = page1.get_absolute_url()
+            self.client.get(page1_url)
+            self.assertIsNotNone(get_page_cache(self.get_request(page1_url)))
+
+            # The menus of the other pages list the page
+            page2.get_content_obj("en").toggle_in_navigation()
+            self.assertIsNone(get_page_cache(self.get_request(page1_url)))
+
+    def test_page_cache_static_placeholder_tags(self):
+        with self.page_cache_settings(CMS_TEMPLATES=[("static.html", "static")], CMS_PAGE_CACHE_SURROGATE_KEY_HEADERS=["Surrogate-Key"]):
+            page1 = create_page("test page 1", "static.html", "en")
+            page1_url = page1.get_absolute_url()
+            response = self.client.get(page1_url)
+            static_placeholder = StaticPlaceholder.objects.get(code="footer")
+            placeholder = static_placeholder.public
+            # The static placeholders are tagged by their placeholders
+            surrogate_keys = response["Surrogate-Key"].split(" ")
+            self.assertIn(f"placeholder:{placeholder.pk}", surrogate_keys)
+            self.assertFalse([key for key in surrogate_keys if key.startswith("static_placeholder:")])
+            # Placeholders taken from the placeholder cache are tagged too
+            page2 = create_page("test page 2", "static.html", "en")
+            page2_url = page2.get_absolute_url()
+            response = self.client.get(page2_url)
+            self.assertIn(f"placeholder:{placeholder.pk}", response["Surrogate-Key"].split(" "))
+
+            add_plugin(placeholder, "TextPlugin", "en", body="Footer content")
+            placeholder.clear_cache("en")
+            self.assertContains(self.client.get(page1_url), "Footer content")
+            self.assertContains(self.client.get(page2_url), "Footer content")
+
+    def test_local_cache(self):
+        from django.core.cache import cache
+
+        self.addCleanup(clear_local_cache)
+
+        with self.page_cache_settings(CMS_CACHE_LOCAL_TTL=60):
+            clear_local_cache()
+            version = _get_cache_version()
+            self.assertEqual(_get_cache_version(), version)
+            self.assertEqual(get_local_cache_stats(), {"hits": 1, "misses": 1, "entries": 1})
+            # Changes made by other processes show up after the ttl,
+            # unless the local cache is bypassed.
+            cache.set(CMS_PAGE_CACHE_VERSION_KEY, version + 10)
+            self.assertEqual(_get_cache_version(), version)
+            self.assertEqual(_get_cache_version(bypass=True), version + 10)
+            # Changes made by this process show up immediately
+            invalidate_cms_page_cache()
+            self.assertEqual(_get_cache_version(), version + 11)
+            invalidate_cms_page_cache_tags(["page:1"])
+            self.assertEqual(
+                get_cms_page_cache_tag_versions(["page:1"]),
+                get_cms_page_cache_tag_versions(["page:1"], bypass=True),
+            )
+
+            page1 = create_page("test page 1", "nav_playground.html", "en")
+            page1_url = page1.get_absolute_url()
+            placeholder = page1.get_placeholders("en").get(slot="body")
+            add_plugin(placeholder, "TextPlugin", "en", body="First content")
+            self.assertContains(self.client.get(page1_url), "First content")
+            # Served from the page cache
+            with self.assertNumQueries(0):
+                self.client.get(page1_url)
+            add_plugin(placeholder, "TextPlugin", "en", body="Second content")
+            placeholder.clear_cache("en")
+            self.assertContains(self.client.get(page1_url), "Second content")
+
+        with self.settings(CMS_CACHE_LOCAL_TTL=60, CMS_CACHE_LOCAL_MAX_ENTRIES=2):
+            invalidate_cms_page_cache_tags(["page:1", "page:2", "page:3"])
+            self.assertEqual(get_local_cache_stats()["entries"], 2)
+
+    def test_page_cache_conditional_get(self):
+        with self.page_cache_settings(exclude=["django.middleware.http.ConditionalGetMiddleware"]):
+            page1 = create_page("test page 1", "nav_playground.html", "en")
+            page1_url = page1.get_absolute_url()
+            placeholder = page1.get_placeholders("en").get(slot="body")
+            add_plugin(placeholder, "TextPlugin", "en", body="First content")
+            response = self.client.get(page1_url)
+            etag = response["ETag"]
+            last_modified = response["Last-Modified"]
+            self.assertFalse(etag.startswith("W/"))
+
+            with self.assertNumQueries(0):
+                response = self.client.get(page1_url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.content, b"")
+            self.assertEqual(response["ETag"], etag)
+            self.assertIn("max-age", response["Cache-Control"])
+
+            with self.assertNumQueries(0):
+                response = self.client.get(page1_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+            self.assertEqual(response.status_code, 304)
+
+            response = self.client.get(page1_url, HTTP_IF_NONE_MATCH='"outdated"')
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, "First content")
+
+            # The compressed representation has a weak ETag
+            with self.settings(CMS_PAGE_CACHE_COMPRESSION="gzip"):
+                placeholder.clear_cache("en")
+                self.client.get(page1_url)
+                response = self.client.get(page1_url, HTTP_ACCEPT_ENCODING="gzip")
+                self.assertEqual(response["ETag"], "W/" + etag)
+                response = self.client.get(
+                    page1_url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"],
+                )
+                self.assertEqual(response.status_code, 304)
+
+    def test_cache_metadata_computed_once_per_placeholder(self):
+        page1 = create_page("test page 1", "nav_playground.html", "en")
+        placeholder = page1.get_placeholders("en").filter(slot="body")[0]
+        plugin_pool.register_plugin(TTLCacheExpirationPlugin)
+        self.addCleanup(plugin_pool.unregister_plugin, TTLCacheExpirationPlugin)
+        add_plugin(placeholder, "TextPlugin", "en", body="English")
+        add_plugin(placeholder, "TTLCacheExpirationPlugin", "en")
+
+        with self.page_cache_settings(), \
+                patch.object(Placeholder, "get_cache_metadata", autospec=True,
+                             side_effect=Placeholder.get_cache_metadata) as get_cache_metadata:
+            response = self.client.get(page1.get_absolute_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("max-age=50", response["Cache-Control"])
+        # Both the placeholder cache and the page cache use the values
+        # computed while rendering
+        rendered = [call.args[0].pk for call in get_cache_metadata.call_args_list]
+        self.assertIn(placeholder.pk, rendered)
+        self.assertEqual(len(rendered), len(set(rendered)))
+
     def test_render_placeholder_cache(self):
         """
         Regression test for #4223
@@ -792,6 +1433,76 @@ class PlaceholderCacheTestCase(CMSTestCase):
         )
         self.assertNotEqual(cached_en_us_content, cached_en_uk_content)
 
+    def test_get_placeholder_caches(self):
+        from django.core.cache import cache
+
+        placeholder_sidebar = self.page.get_placeholders("en").exclude(slot="body")[0]
+        en_content = self.get_content_renderer(self.en_request).render_placeholder(
+            self.placeholder_en, Context({"request": self.en_request}), "en", width=350
+        )
+        set_placeholder_cache(self.placeholder_en, "en", 1, en_content, self.en_request)
+        placeholders = [self.placeholder_en, placeholder_sidebar]
+
+        with patch.object(cache, "get_many", wraps=cache.get_many) as get_many:
+            cached = get_placeholder_caches(placeholders, "en", 1, self.en_request)
+        # Placeholders without cached content are left out
+        self.assertEqual(cached, {self.placeholder_en.pk: en_content})
+        # One lookup for the versions, one for the content
+        self.assertEqual(get_many.call_count, 2)
+        # The content varies the same way as in get_placeholder_cache()
+        self.assertEqual(get_placeholder_caches(placeholders, "en", 1, self.en_us_request), {})
+        self.assertEqual(get_placeholder_caches(placeholders, "de", 1, self.en_request), {})
+
+    def test_page_placeholder_caches_are_fetched_at_once(self):
+        renderer = self.get_content_renderer(self.en_request)
+        context = Context({"request": self.en_request})
+
+        with patch("cms.plugin_rendering.get_placeholder_caches", wraps=get_placeholder_caches) as get_many, \
+                patch("cms.plugin_rendering.get_placeholder_cache") as get_one:
+            renderer.render_page_placeholder("body", context, inherit=False, page=self.en_request.current_page)
+            renderer.render_page_placeholder("right-column", context, inherit=False, page=self.en_request.current_page)
+        get_many.assert_called_once()
+        get_one.assert_not_called()
+
+    @override_settings(CMS_PLACEHOLDER_CACHE_SELF_VALIDATING=True)
+    def test_self_validating_placeholder_cache(self):
+        from django.core.cache import cache
+
+        en_content = self.get_content_renderer(self.en_request).render_placeholder(
+            self.placeholder_en, Context({"request": self.en_request}), "en", width=350
+        )
+        set_placeholder_cache(self.placeholder_en, "en", 1, en_content, self.en_request)
+        self.assertEqual(get_placeholder_cache(self.placeholder_en, "en", 1, self.en_request), en_content)
+        # The content varies, the entry only has the vary-on header-names
+        entry = cache.get(_get_placeholder_cache_entry_key(self.placeholder_en, "en", 1))
+        self.assertEqual(entry[1:], (["country-code"], None))
+        self.assertIsNone(get_placeholder_cache(self.placeholder_en, "en", 1, self.en_us_request))
+
+        placeholder_sidebar = self.page.get_placeholders("en").exclude(slot="body")[0]
+        add_plugin(placeholder_sidebar, "TextPlugin", "en", body="Sidebar")
+        sidebar_content = self.get_content_renderer(self.en_request).render_placeholder(
+            placeholder_sidebar, Context({"request": self.en_request}), "en", width=350
+        )
+
+        self.assertIsNone(get_placeholder_cache(placeholder_sidebar, "en", 1, self.en_request))
+
+        with patch.object(cache, "set", wraps=cache.set) as cache_set:
+            set_placeholder_cache(placeholder_sidebar, "en", 1, sidebar_content, self.en_request)
+        # The version is not touched
+        cache_set.assert_called_once()
+
+        with patch.object(cache, "get_many", wraps=cache.get_many) as get_many:
+            cached = get_placeholder_cache(placeholder_sidebar, "en", 1, self.en_request)
+        self.assertEqual(cached, sidebar_content)
+        get_many.assert_called_once()
+
+        clear_placeholder_cache(placeholder_sidebar, "en", 1)
+        self.assertIsNone(get_placeholder_cache(placeholder_sidebar, "en", 1, self.en_request))
+        self.assertEqual(
+            get_placeholder_caches([self.placeholder_en, placeholder_sidebar], "en", 1, self.en_request),
+            {self.placeholder_en.pk: en_content},
+        )
+
     def test_set_get_placeholder_cache_with_long_prefix(self):
         """
         This is for testing that everything continues to work even when the
@@ -159,3 +159,12 @@ class CheckWithDatabaseTests(CheckAssertMixin, TestCase):
         bogus_plugin.save()
 
         self.assertCheck(False, warnings=0, errors=3)
+
+    def test_check_plugin_tree_paths(self):
+        placeholder = Placeholder.objects.create(slot="test")
+        parent = add_plugin(placeholder, "MultiColumnPlugin", "en")
+        text = add_plugin(placeholder, TextPlugin, "en", body="en body")
+        self.assertCheck(True, warnings=0, errors=0)
+
+        CMSPlugin.objects.filter(pk=text.pk).update(parent=parent)
+        self.assertCheck(False, warnings=0, errors=2)
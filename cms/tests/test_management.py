@@ -1,3 +1,5 @@
+import os
+import tempfile
 import uuid
 from io import StringIO
 
@@ -73,12 +75,143 @@ class ManagementTestCase(CMSTestCase):
         page1.save()
         out = StringIO()
         management.call_command('cms', 'fix-tree', interactive=False, stdout=out)
-        self.assertEqual(out.getvalue(), 'fixing page tree\nall done\n')
+        self.assertEqual(
+            out.getvalue(),
+            'fixing page tree\nfixing plugin tree paths\nfixed the tree paths of 0 plugins\nall done\n',
+        )
         page1 = page1.reload()
         self.assertEqual(page1.path, "0002")
         self.assertEqual(page1.depth, 1)
         self.assertEqual(page1.numchild, 0)
 
+    def test_fix_tree_plugin_tree_paths(self):
+        placeholder = Placeholder.objects.create(slot="test")
+        parent = add_plugin(placeholder, "MultiColumnPlugin", "en")
+        column = add_plugin(placeholder, "ColumnPlugin", "en", target=parent)
+        text = add_plugin(placeholder, "TextPlugin", "en", body="text")
+        # Changing the parent with a queryset update leaves the paths behind
+        CMSPlugin.objects.filter(pk=text.pk).update(parent=column)
+        out = StringIO()
+        management.call_command('cms', 'fix-tree', interactive=False, stdout=out)
+        self.assertIn('fixed the tree paths of 1 plugins\n', out.getvalue())
+        self.assertEqual(CMSPlugin.objects.get(pk=text.pk).tree_path, f'{parent.pk:010d}{column.pk:010d}')
+        self.assertEqual(list(parent.get_descendants().order_by('pk').values_list('pk', flat=True)), [column.pk, text.pk])
+
+    @override_settings(ALLOWED_HOSTS=['example.com'])
+    def test_warm_cache(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        page = create_page("home", "nav_playground.html", "en")
+        create_page_content("de", "home", page)
+        create_page("hidden", "nav_playground.html", "en", login_required=True)
+        out = StringIO()
+        management.call_command('cms', 'warm-cache', interactive=False, stdout=out)
+        self.assertIn('warming 2 pages\n', out.getvalue())
+        self.assertIn('warmed 2 pages in', out.getvalue())
+
+        page_url = page.get_absolute_url('en')
+        with self.assertNumQueries(0):
+            response = self.client.get(page_url, HTTP_HOST='example.com')
+        self.assertEqual(response.status_code, 200)
+
+        out = StringIO()
+        management.call_command(
+            'cms', 'warm-cache', '--language=de', '--verbosity=2', interactive=False, stdout=out
+        )
+        self.assertIn('warming 1 pages\n', out.getvalue())
+        self.assertIn(f"[1/1] {page.get_absolute_url('de')} 200", out.getvalue())
+
+    @override_settings(ALLOWED_HOSTS=['localhost'])
+    def test_warm_cache_failures(self):
+        page = create_page("home", "nav_playground.html", "en")
+        out = StringIO()
+        err = StringIO()
+        with self.assertRaises(CommandError) as command_error:
+            management.call_command('cms', 'warm-cache', interactive=False, stdout=out, stderr=err)
+        self.assertEqual(str(command_error.exception), '1 of 1 pages failed to render')
+        self.assertIn(f"failed: {page.get_absolute_url('en')} (400)", err.getvalue())
+
+    @override_settings(ALLOWED_HOSTS=['example.com'])
+    def test_bake(self):
+        page1 = create_page("home", "nav_playground.html", "en")
+        page2 = create_page("page2", "nav_playground.html", "en")
+        placeholder = page2.get_placeholders("en").get(slot="body")
+        plugin = add_plugin(placeholder, "TextPlugin", "en", body="First content")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_dir = os.path.join(temp_dir, 'site')
+            out = StringIO()
+            management.call_command('cms', 'bake', output_dir, interactive=False, stdout=out)
+            self.assertEqual(out.getvalue(), 'baked 2 pages, 0 unchanged\n')
+            # The manifest is kept out of the output directory
+            self.assertEqual(sorted(os.listdir(temp_dir)), ['site', 'site.cms-bake.json'])
+            page1_file = os.path.join(output_dir, page1.get_absolute_url('en').strip('/'), 'index.html')
+            page2_file = os.path.join(output_dir, page2.get_absolute_url('en').strip('/'), 'index.html')
+            with open(page2_file) as html_file:
+                self.assertIn('First content', html_file.read())
+
+            out = StringIO()
+            management.call_command('cms', 'bake', output_dir, '--incremental', interactive=False, stdout=out)
+            self.assertEqual(out.getvalue(), 'baked 0 pages, 2 unchanged\n')
+
+            plugin.body = "Second content"
+            plugin.save()
+            placeholder.clear_cache("en")
+            out = StringIO()
+            management.call_command('cms', 'bake', output_dir, '--incremental', interactive=False, stdout=out)
+            self.assertEqual(out.getvalue(), 'baked 1 pages, 1 unchanged\n')
+            with open(page2_file) as html_file:
+                self.assertIn('Second content', html_file.read())
+
+            # Moving plugins with queryset updates does not change their changed date
+            plugin2 = add_plugin(placeholder, "TextPlugin", "en", body="Third content")
+            management.call_command('cms', 'bake', output_dir, '--incremental', interactive=False, stdout=StringIO())
+            CMSPlugin.objects.filter(pk=plugin.pk).update(position=3)
+            CMSPlugin.objects.filter(pk=plugin2.pk).update(position=1)
+            placeholder.clear_cache("en")
+            out = StringIO()
+            management.call_command('cms', 'bake', output_dir, '--incremental', interactive=False, stdout=out)
+            self.assertEqual(out.getvalue(), 'baked 1 pages, 1 unchanged\n')
+
+            # Pages which are no longer public are removed
+            page2.login_required = True
+            page2.save()
+            out = StringIO()
+            management.call_command('cms', 'bake', output_dir, '--incremental', interactive=False, stdout=out)
+            self.assertEqual(out.getvalue(), 'baked 1 pages, 0 unchanged\n')
+            self.assertTrue(os.path.exists(page1_file))
+            self.assertFalse(os.path.exists(page2_file))
+
+    @override_settings(
+        ALLOWED_HOSTS=['example.com'],
+        CMS_TEMPLATES=[('tests/rendering/inherit.html', 'inherit')],
+        # Only the CMS caches know about the change of the parent's plugins
+        MIDDLEWARE=[mw for mw in settings.MIDDLEWARE if not mw.startswith('django.middleware.cache.')],
+    )
+    def test_bake_inherited_placeholder(self):
+        parent = create_page("parent", "tests/rendering/inherit.html", "en")
+        child = create_page("child", "tests/rendering/inherit.html", "en", parent=parent)
+        placeholder = parent.get_placeholders("en").get(slot="main")
+        plugin = add_plugin(placeholder, "TextPlugin", "en", body="First content")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_dir = os.path.join(temp_dir, 'site')
+            management.call_command('cms', 'bake', output_dir, interactive=False, stdout=StringIO())
+            child_file = os.path.join(output_dir, child.get_absolute_url('en').strip('/'), 'index.html')
+            with open(child_file) as html_file:
+                self.assertIn('First content', html_file.read())
+
+            # The child shows the parent's plugins, so both are baked again
+            plugin.body = "Second content"
+            plugin.save()
+            placeholder.clear_cache("en")
+            out = StringIO()
+            management.call_command('cms', 'bake', output_dir, '--incremental', interactive=False, stdout=out)
+            self.assertEqual(out.getvalue(), 'baked 2 pages, 0 unchanged\n')
+            with open(child_file) as html_file:
+                self.assertIn('Second content', html_file.read())
+
     def test_fix_tree_regression_5641(self):
         # ref: https://github.com/divio/django-cms/issues/5641
         alpha = create_page("Alpha", "nav_playground.html", "en")
@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ImproperlyConfigured
@@ -11,10 +13,10 @@ from sekizai.context import SekizaiContext
 
 from cms import constants
 from cms.api import add_plugin, create_page, create_page_content
-from cms.exceptions import DuplicatePlaceholderWarning, PlaceholderNotFound
+from cms.exceptions import DuplicatePlaceholderWarning, PlaceholderNotFound, PluginTreePathOverflow
 from cms.models.fields import PlaceholderField
 from cms.models.placeholdermodel import Placeholder
-from cms.models.pluginmodel import CMSPlugin
+from cms.models.pluginmodel import CMSPlugin, get_tree_path
 from cms.models.settingmodels import UserSettings
 from cms.plugin_pool import plugin_pool
 from cms.test_utils.fixtures.fakemlng import FakemlngFixtures
@@ -1360,6 +1362,21 @@ class PlaceholderPluginTestsBase(CMSTestCase):
         expected = [(pk, pos) for pos, pk in enumerate(plugins, 1)]
         self.assertSequenceEqual(new_tree, expected)
 
+    def assertTreePathsValid(self, placeholder=None):
+        """
+        The tree paths consist of the ids of the plugins' ancestors
+        """
+        parent_ids = dict(self.get_plugins(placeholder).values_list('pk', 'parent_id'))
+
+        for plugin in self.get_plugins(placeholder):
+            ancestor_ids = []
+            parent_id = plugin.parent_id
+
+            while parent_id:
+                ancestor_ids.insert(0, parent_id)
+                parent_id = parent_ids[parent_id]
+            self.assertEqual(plugin.tree_path, ''.join(f'{pk:010d}' for pk in ancestor_ids))
+
 
 class PlaceholderFlatPluginTests(PlaceholderPluginTestsBase):
 
@@ -1608,6 +1625,75 @@ class PlaceholderFlatPluginTests(PlaceholderPluginTestsBase):
             self.assertPluginTreeEquals(source_plugin_tree_all)
             self.assertPluginTreeEquals(target_plugin_tree_all, placeholder=target)
 
+    def test_changes_do_not_recalculate_all_positions(self):
+        """
+        Adding, moving and deleting plugins only shifts the positions of the
+        affected plugins, the positions are not recalculated for the whole
+        placeholder.
+        """
+        plugin_tree_all = list(self.get_plugins().values_list('pk', flat=True))
+
+        with patch.object(Placeholder, '_recalculate_plugin_positions') as recalculate:
+            plugin = add_plugin(self.placeholder, 'StylePlugin', 'en', position='first-child')
+            plugin_tree_all.insert(0, plugin.pk)
+            self.assertPluginTreeEquals(plugin_tree_all)
+
+            # move it behind the subtree of the next root plugin
+            root_plugin = self.get_plugins().filter(parent__isnull=True)[1]
+            target_position = root_plugin.position + root_plugin._get_descendants_count()
+            self.placeholder.move_plugin(plugin, target_position)
+            plugin_tree_all.remove(plugin.pk)
+            plugin_tree_all.insert(target_position - 1, plugin.pk)
+            self.assertPluginTreeEquals(plugin_tree_all)
+
+            plugin_tree_all.remove(plugin.pk)
+            self.placeholder.delete_plugin(plugin)
+            self.assertPluginTreeEquals(plugin_tree_all)
+        recalculate.assert_not_called()
+
+    def test_batch(self):
+        plugin_tree_all = list(self.get_plugins().values_list('pk', flat=True))
+
+        with patch.object(Placeholder, 'clear_cache') as clear_cache:
+            with self.captureOnCommitCallbacks(execute=True):
+                with self.placeholder.batch():
+                    plugin = add_plugin(self.placeholder, 'StylePlugin', 'en')
+                    plugin_2 = add_plugin(self.placeholder, 'StylePlugin', 'en', position='first-child')
+                    self.placeholder.move_plugin(plugin, 2)
+                    self.placeholder.delete_plugin(plugin_2)
+                    clear_cache.assert_not_called()
+        clear_cache.assert_called_once_with('en')
+        plugin_tree_all.insert(0, plugin.pk)
+        self.assertPluginTreeEquals(plugin_tree_all)
+
+    def test_batch_rollback(self):
+        plugin_tree_all = list(self.get_plugins().values_list('pk', flat=True))
+
+        with patch.object(Placeholder, 'clear_cache') as clear_cache:
+            with self.assertRaises(ValueError):
+                with self.placeholder.batch():
+                    add_plugin(self.placeholder, 'StylePlugin', 'en', position='first-child')
+                    raise ValueError
+        clear_cache.assert_not_called()
+        self.assertPluginTreeEquals(plugin_tree_all)
+
+    def test_recalculate_plugin_positions(self):
+        plugin_tree_all = list(self.get_plugins().values_list('pk', flat=True))
+
+        for supports_window_functions in (True, False):
+            with self.subTest(supports_window_functions=supports_window_functions):
+                # leave gaps between the positions, in reverse to avoid
+                # clashing with the positions of the following plugins
+                for plugin in self.get_plugins().order_by('-position'):
+                    plugin.update(position=plugin.position * 3)
+
+                with patch(
+                    'cms.models.pluginmodel.plugin_supports_window_functions',
+                    return_value=supports_window_functions,
+                ):
+                    self.placeholder._recalculate_plugin_positions('en')
+                self.assertPluginTreeEquals(plugin_tree_all)
+
 
 class PlaceholderNestedPluginTests(PlaceholderFlatPluginTests):
 
@@ -1642,6 +1728,89 @@ class PlaceholderNestedPluginTests(PlaceholderFlatPluginTests):
             target_plugin_tree_all.insert(1 + edge, plugin_id)
         self.assertPluginTreeEquals(source_plugin_tree_all)
         self.assertPluginTreeEquals(target_plugin_tree_all, placeholder=target)
+        self.assertTreePathsValid(target)
+
+    def test_move_under_parent(self):
+        plugin = self.get_first_root_plugin()
+        plugin_tree = [plugin.pk] + self.get_plugin_descendants(plugin)
+        target_plugin = self.get_plugins().filter(parent__isnull=False).last()
+        self.placeholder.move_plugin(plugin, target_plugin.position, target_plugin=target_plugin)
+
+        self.assertTreePathsValid()
+        target_plugin.refresh_from_db()
+        self.assertEqual(list(target_plugin.get_descendants().values_list('pk', flat=True)), plugin_tree)
+        self.assertEqual(target_plugin.parent.get_descendants().count(), len(plugin_tree) + 1)
+
+        self.placeholder.move_plugin(plugin, 1)
+        self.assertTreePathsValid()
+        self.assertEqual(target_plugin.get_descendants().count(), 0)
+
+    def test_save_with_new_parent(self):
+        # Setting another parent moves the descendants along
+        plugin = self.get_first_root_plugin()
+        plugin.parent = self.get_last_root_plugin()
+        plugin.save()
+        self.assertTreePathsValid()
+        self.assertEqual(plugin.parent.get_descendants().count(), 5)
+
+        # Only the parent's tree path is loaded for a new parent id, then
+        # the descendants and the plugin are updated.
+        plugin = self.get_plugins().get(pk=plugin.pk)
+        plugin.parent_id = self.get_first_root_plugin().pk
+
+        with self.assertNumQueries(3):
+            plugin.save()
+        self.assertTreePathsValid()
+
+    def test_save_with_stale_tree_path(self):
+        # Saving a plugin loaded before its grandparent has been moved
+        # keeps the stored tree path
+        first_root, grandparent = self.get_plugins().filter(parent__isnull=True)[:2]
+        child = self.get_plugins().filter(parent__parent=grandparent).get()
+        # The grandparent is moved below the last descendant of the first
+        # root plugin, so that the positions do not change
+        target_plugin = first_root.get_descendants().last()
+        self.placeholder.move_plugin(grandparent, grandparent.position, target_plugin=target_plugin)
+
+        child.save()
+        self.assertTreePathsValid()
+        child.refresh_from_db()
+        self.assertEqual(child.tree_path, get_tree_path(child.parent))
+
+        # A stale plugin moved to another parent starts from the stored path
+        stale_child = self.get_plugins().get(pk=child.pk)
+        self.placeholder.move_plugin(grandparent, grandparent.position)
+        stale_child.parent = first_root
+        stale_child.save()
+        self.assertTreePathsValid()
+
+    def test_tree_path_overflow(self):
+        plugin = self.get_first_root_plugin()
+        parent = CMSPlugin(pk=10 ** 10, tree_path='')
+
+        with self.assertRaises(PluginTreePathOverflow):
+            get_tree_path(parent)
+
+        # Plugins cannot be nested deeper than the path allows
+        parent = CMSPlugin(pk=1, tree_path='0' * 250)
+
+        with self.assertRaises(PluginTreePathOverflow):
+            get_tree_path(parent)
+
+        # Moving a plugin deeper must leave room for its descendants,
+        # which are nested two levels below it.
+        with self.assertRaises(PluginTreePathOverflow):
+            plugin._set_tree_path('0' * 240)
+        self.assertTreePathsValid()
+
+    def test_fix_tree_paths(self):
+        plugin = self.get_first_root_plugin()
+        # Changing the parent with a queryset update leaves the paths behind
+        self.get_plugins().filter(pk=plugin.pk).update(parent=self.get_last_root_plugin())
+        self.assertEqual(len(CMSPlugin._get_wrong_tree_paths()), 3)
+        self.assertEqual(CMSPlugin.fix_tree_paths(), 3)
+        self.assertTreePathsValid()
+        self.assertEqual(CMSPlugin._get_wrong_tree_paths(), {})
 
     def test_delete_single(self):
         tree = self.get_plugin_tree()
@@ -3,6 +3,7 @@ from cms.models import Placeholder, UserSettings
 from cms.operations import (
     ADD_PLUGIN,
     ADD_PLUGINS_FROM_PLACEHOLDER,
+    BATCH_PLUGIN_OPERATIONS,
     CHANGE_PLUGIN,
     CLEAR_PLACEHOLDER,
     CUT_PLUGIN,
@@ -638,6 +639,40 @@ class PagePlaceholderTestCase(CMSTestCase):
             self.assertEqual(del_plugin.pk, plugin.pk)
             self.assertEqual(post_call_kwargs['placeholder'], self._placeholder_1)
 
+    def test_batch_plugin_operations(self):
+        request = self.get_request('/en/')
+        request.user = self._admin_user
+
+        with signal_tester(pre_placeholder_operation, post_placeholder_operation) as env:
+            with self._placeholder_1.batch(request=request):
+                plugin = self._add_plugin()
+                plugin_2 = self._add_plugin()
+                self._placeholder_1.move_plugin(plugin, 1, target_placeholder=self._placeholder_2)
+                self._placeholder_1.delete_plugin(plugin_2)
+
+            self.assertEqual(env.call_count, 2)
+
+            pre_call_kwargs = env.calls[0][1]
+            post_call_kwargs = env.calls[1][1]
+
+            self.assertEqual(pre_call_kwargs['operation'], BATCH_PLUGIN_OPERATIONS)
+            self.assertEqual(post_call_kwargs['operation'], BATCH_PLUGIN_OPERATIONS)
+            self.assertTrue(pre_call_kwargs['token'] == post_call_kwargs['token'])
+            self.assertEqual(post_call_kwargs['placeholder'], self._placeholder_1)
+            plugin_operations = post_call_kwargs['plugin_operations']
+            self.assertEqual(
+                [(operation, placeholder) for operation, _plugin, placeholder in plugin_operations],
+                [
+                    (ADD_PLUGIN, self._placeholder_1),
+                    (ADD_PLUGIN, self._placeholder_1),
+                    (MOVE_PLUGIN, self._placeholder_2),
+                    (DELETE_PLUGIN, self._placeholder_1),
+                ],
+            )
+            self.assertEqual(plugin_operations[0][1].pk, plugin.pk)
+            self.assertEqual(plugin_operations[2][1].pk, plugin.pk)
+            self.assertIs(plugin_operations[3][1], plugin_2)
+
 
 class AppPlaceholderTestCase(PagePlaceholderTestCase):
 
@@ -1,16 +1,19 @@
 from collections import deque
+from unittest.mock import patch
 
+from django.conf import settings
 from django.template import Context
 from django.test.utils import override_settings
 
 from cms.api import add_plugin, create_page
-from cms.models import CMSPlugin
+from cms.models import CMSPlugin, StaticPlaceholder
 from cms.plugin_rendering import (
     ContentRenderer,
     LegacyRenderer,
     StructureRenderer,
 )
 from cms.test_utils.testcases import CMSTestCase
+from cms.utils.plugins import downcast_plugins, fetch_plugins
 
 
 class TestStructureRenderer(CMSTestCase):
@@ -141,6 +144,61 @@ class TestContentRenderer(TestStructureRenderer):
         self.assertEqual(cache[placeholder_2.slot], placeholder_2)
         self.assertEqual(cache[placeholder_2.slot]._plugins_cache, deque([placeholder_2_plugin_1]))
 
+    @override_settings(CMS_TEMPLATES=[('tests/rendering/inherit.html', 'inherit')])
+    def test_preload_placeholders_for_page_with_inheritance(self):
+        parent_page = create_page("parent", 'tests/rendering/inherit.html', "en")
+        page = create_page("page", 'tests/rendering/inherit.html', "en", parent=parent_page)
+        grandchild_page = create_page("grandchild", 'tests/rendering/inherit.html', "en", parent=page)
+        parent_placeholder = parent_page.get_placeholders("en").get(slot='main')
+        parent_plugin = add_plugin(parent_placeholder, 'TextPlugin', 'en', body='Parent')
+        add_plugin(page.get_placeholders("en").get(slot='sub'), 'TextPlugin', 'en', body='Sub')
+        renderer = self.get_renderer(page=grandchild_page)
+
+        with patch('cms.utils.plugins.downcast_plugins', wraps=downcast_plugins) as downcast, \
+                patch('cms.utils.plugins.fetch_plugins', wraps=fetch_plugins) as fetch:
+            renderer._preload_placeholders_for_page(grandchild_page)
+        # The plugins of all three pages are fetched and cast down at once
+        fetch.assert_called_once()
+        downcast.assert_called_once()
+        self.assertIn(page.pk, renderer._placeholders_by_page_cache)
+        cache = renderer._placeholders_by_page_cache[parent_page.pk]
+        self.assertEqual(cache['main']._plugins_cache, deque([parent_plugin]))
+
+    @override_settings(CMS_TEMPLATES=[('static.html', 'static')])
+    def test_preload_static_placeholders_for_page(self):
+        cms_page = create_page("page", 'static.html', "en")
+        static_placeholder = StaticPlaceholder(code='footer')
+        static_placeholder.save()
+        plugin = add_plugin(static_placeholder.public, 'TextPlugin', 'en', body='Footer')
+        renderer = self.get_renderer(page=cms_page)
+        renderer._preload_placeholders_for_page(cms_page, context=Context({'request': renderer.request}))
+
+        with self.assertNumQueries(0):
+            footer = renderer.get_static_placeholder('footer')
+        self.assertEqual(footer, static_placeholder)
+        self.assertEqual(footer.public._plugins_cache, deque([plugin]))
+        # Missing static placeholders are created
+        self.assertEqual(renderer.get_static_placeholder('logo').code, 'logo')
+
+    @override_settings(CMS_TEMPLATES=[('static.html', 'static')])
+    def test_preload_static_placeholders_template_scan(self):
+        cms_page = create_page("page", 'static.html', "en")
+        cached_templates = [{
+            **settings.TEMPLATES[0],
+            'OPTIONS': {
+                **settings.TEMPLATES[0]['OPTIONS'],
+                'loaders': [('django.template.loaders.cached.Loader', settings.TEMPLATES[0]['OPTIONS']['loaders'])],
+            },
+        }]
+
+        with override_settings(TEMPLATES=cached_templates):
+            with patch('cms.utils.placeholder._scan_static_placeholders', return_value=[]) as scan:
+                for _i in range(2):
+                    renderer = self.get_renderer(page=cms_page)
+                    renderer._preload_placeholders_for_page(cms_page, context=Context({'request': renderer.request}))
+            # The template is scanned once for all requests
+            scan.assert_called_once()
+
     def test_plugin_exception_catchers(self):
         """Tests if failing plugins do not break template rendering and report errors to the logger"""
         cms_page = create_page("page", 'nav_playground.html', "en")
@@ -2,6 +2,7 @@ import datetime
 import pickle
 import warnings
 from contextlib import contextmanager
+from unittest.mock import patch
 
 from django import http
 from django.conf import settings
@@ -11,8 +12,11 @@ from django.contrib.admin.widgets import (
     RelatedFieldWidgetWrapper,
 )
 from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.models.signals import post_save
 from django.forms.widgets import Media
 from django.test.testcases import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import re_path, reverse
 from django.utils import timezone
 from django.utils.encoding import force_str
@@ -31,6 +35,7 @@ from cms.models.pluginmodel import CMSPlugin
 from cms.plugin_base import CMSPluginBase
 from cms.plugin_pool import plugin_pool
 from cms.sitemaps.cms_sitemap import CMSSitemap
+from cms.test_utils.project.pluginapp.plugins.link.models import Link
 from cms.test_utils.project.pluginapp.plugins.manytomany_rel.models import (
     Article,
     ArticlePluginModel,
@@ -460,6 +465,99 @@ class PluginsTestCase(PluginsTestBaseCase):
         for old_plugin, new_plugin in zip(old_plugins, new_plugins):
             self.assertEqual(old_plugin.get_children().count(), new_plugin.get_children().count())
 
+    def test_deep_copy_plugins_without_bulk_insert(self):
+        # Databases which do not return the primary keys of bulk inserted
+        # rows copy the plugins one by one
+        with patch('cms.utils.plugins._can_bulk_copy_plugins', return_value=False):
+            self.test_deep_copy_plugins()
+
+    def test_copy_plugins_in_bulk(self):
+        """
+        The copies are inserted in bulk, the number of queries does not
+        depend on the number of copied plugins.
+        """
+        page = api.create_page("CopyPluginTestPage", "nav_playground.html", "en")
+        source = page.get_placeholders("en").get(slot="body")
+
+        def add_columns(count):
+            for i in range(count):
+                column = api.add_plugin(source, "ColumnPlugin", "en")
+                api.add_plugin(source, "LinkPlugin", "en", target=column, name=f"Link {i}",
+                               external_link="https://www.django-cms.org")
+            return source.get_plugins_list("en")
+
+        target = page.get_placeholders("en").get(slot="right-column")
+        api.add_plugin(target, "LinkPlugin", "en", name="Existing", external_link="https://www.django-cms.org")
+
+        plugins = add_columns(2)
+
+        with CaptureQueriesContext(connection) as small_copy:
+            copy_plugins_to_placeholder(plugins, target, language="de")
+
+        plugins = add_columns(8)
+
+        with patch.object(Link, "copy_relations_bulk") as copy_relations_bulk:
+            with CaptureQueriesContext(connection) as large_copy:
+                new_plugins = copy_plugins_to_placeholder(plugins, target, language="de")
+
+        self.assertEqual(len(large_copy.captured_queries), len(small_copy.captured_queries))
+        copy_relations_bulk.assert_called_once()
+        self.assertEqual(len(copy_relations_bulk.call_args[0][0]), 10)
+
+        # The tree is copied with consecutive positions
+        self.assertEqual(len(new_plugins), len(plugins))
+        copies = list(target.get_plugins("de"))
+        self.assertEqual([plugin.position for plugin in copies], list(range(1, len(copies) + 1)))
+
+        for index, old_plugin in enumerate(plugins):
+            new_plugin = new_plugins[index]
+            self.assertEqual(new_plugin.plugin_type, old_plugin.plugin_type)
+            self.assertEqual(new_plugin.get_bound_plugin().__class__, old_plugin.get_bound_plugin().__class__)
+
+            if old_plugin.parent_id:
+                self.assertEqual(new_plugin.parent.plugin_type, old_plugin.parent.plugin_type)
+                self.assertEqual(new_plugin.parent._get_descendants_ids(), [new_plugin.pk])
+        self.assertEqual(new_plugins[1].get_bound_plugin().name, "Link 0")
+        self.assertEqual(target.get_plugins("en").count(), 1)
+
+    def test_copy_plugins_in_bulk_opt_in(self):
+        """
+        Plugins are bulk copied unless their model overrides save() or
+        copy_relations() without opting in, opts out or has save receivers.
+        """
+        page = api.create_page("CopyPluginTestPage", "nav_playground.html", "en")
+        source = page.get_placeholders("en").get(slot="body")
+        target = page.get_placeholders("en").get(slot="right-column")
+        api.add_plugin(source, "LinkPlugin", "en", name="Link", external_link="https://www.django-cms.org")
+        plugins = source.get_plugins_list("en")
+
+        def receiver(**kwargs):
+            pass
+
+        def copy_relations(self, old_instance):
+            pass
+
+        with patch("cms.utils.plugins._bulk_copy_plugins_to_placeholder") as bulk_copy_plugins:
+            with patch.object(Link, "bulk_copy", False):
+                copy_plugins_to_placeholder(plugins, target, language="en")
+
+            with patch.object(Link, "copy_relations", copy_relations):
+                copy_plugins_to_placeholder(plugins, target, language="de")
+
+            post_save.connect(receiver, sender=Link)
+            copy_plugins_to_placeholder(plugins, target, language="fr")
+            post_save.disconnect(receiver, sender=Link)
+            bulk_copy_plugins.assert_not_called()
+
+            if connection.features.can_return_rows_from_bulk_insert:
+                with patch.object(Link, "copy_relations", copy_relations), patch.object(Link, "bulk_copy", True):
+                    copy_plugins_to_placeholder(plugins, target, language="it")
+                copy_plugins_to_placeholder(plugins, target, language="es")
+                self.assertEqual(bulk_copy_plugins.call_count, 2)
+        self.assertEqual(target.get_plugins("en").count(), 1)
+        self.assertEqual(target.get_plugins("de").count(), 1)
+        self.assertEqual(target.get_plugins("fr").count(), 1)
+
     def test_copy_plugin_without_custom_model(self):
         page_en = api.create_page("CopyPluginTestPage (EN)", "nav_playground.html", "en")
         page_de = api.create_page("CopyPluginTestPage (DE)", "nav_playground.html", "de")
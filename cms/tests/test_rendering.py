@@ -1,10 +1,14 @@
+from unittest.mock import patch
+
+from django.conf import settings
 from django.core.cache import cache
 from django.http.response import Http404
+from django.template import Context
 from django.test.utils import override_settings
 from django.urls import reverse
 from sekizai.context import SekizaiContext
 
-from cms import plugin_rendering
+from cms import plugin_rendering, templates
 from cms.api import add_plugin, create_page
 from cms.cache.placeholder import get_placeholder_cache
 from cms.models import EmptyPageContent, Page, Placeholder
@@ -341,6 +345,69 @@ class RenderingTestCase(CMSTestCase):
         self.assertEqual(r, expected)
         plugin_rendering._standard_processors = {}
 
+    def test_processors_are_imported_once(self):
+        with override_settings(CMS_PLUGIN_PROCESSORS=('cms.tests.test_rendering.sample_plugin_processor',)):
+            processors = plugin_rendering.get_standard_processors('PLUGIN_PROCESSORS')
+            self.assertEqual(processors, (sample_plugin_processor,))
+
+            with patch('cms.plugin_rendering.import_string') as import_string:
+                self.assertIs(plugin_rendering.get_standard_processors('PLUGIN_PROCESSORS'), processors)
+            import_string.assert_not_called()
+        # Changing the setting resets the processors
+        self.assertEqual(plugin_rendering.get_standard_processors('PLUGIN_PROCESSORS'), ())
+
+    def test_plugin_templates_are_shared_by_requests(self):
+        instance = self.test_placeholders['main'].get_plugins('en').first().get_bound_plugin()
+        cached_templates = [{
+            **settings.TEMPLATES[0],
+            'OPTIONS': {
+                **settings.TEMPLATES[0]['OPTIONS'],
+                'loaders': [('django.template.loaders.cached.Loader', settings.TEMPLATES[0]['OPTIONS']['loaders'])],
+            },
+        }]
+
+        with override_settings(TEMPLATES=cached_templates):
+            renderer = self.get_content_renderer()
+            renderer.render_plugin(instance, Context({'request': renderer.request}), self.test_placeholders['main'])
+
+            with patch('cms.templates.get_template') as get_template:
+                renderer = self.get_content_renderer()
+                content = renderer.render_plugin(
+                    instance, Context({'request': renderer.request}), self.test_placeholders['main'],
+                )
+            self.assertEqual(content, self.test_data['text_main'])
+            get_template.assert_not_called()
+
+            template = templates.get_cached_template('cms/toolbar/dragitem.html')
+            self.assertIs(templates.get_cached_template('cms/toolbar/dragitem.html'), template)
+
+        # Templates are loaded again if the engine does not cache them
+        self.assertIsNot(templates.get_cached_template('cms/toolbar/dragitem.html'), template)
+
+        with patch('cms.templates.get_template') as get_template:
+            templates.get_cached_template('cms/toolbar/dragitem.html')
+        get_template.assert_called_once()
+
+        # ...but only once per request
+        templates_cache = templates.TemplatesCache()
+        template = templates_cache.get_cached_template('cms/toolbar/dragitem.html')
+        with patch('cms.templates.get_template') as get_template:
+            self.assertIs(templates_cache.get_cached_template('cms/toolbar/dragitem.html'), template)
+            self.assertIs(templates_cache.drag_item_template, template)
+            self.assertIs(templates_cache.drag_item_template, template)
+        get_template.assert_not_called()
+
+    def test_plugin_context_is_layered_over_parent_context(self):
+        instance = self.test_placeholders['main'].get_plugins('en').first().get_bound_plugin()
+        parent = Context({'original_context_var': 'original_context_var_ok'})
+        context = PluginContext(parent, instance, self.test_placeholders['main'])
+        context['original_context_var'] = 'changed'
+        context['plugin_var'] = 'plugin_var_ok'
+
+        self.assertEqual(context['original_context_var'], 'changed')
+        self.assertEqual(parent['original_context_var'], 'original_context_var_ok')
+        self.assertNotIn('plugin_var', parent)
+
     def test_placeholder(self):
         """
         Tests the {% placeholder %} templatetag.
@@ -785,3 +852,81 @@ class RenderingTestCase(CMSTestCase):
         for plugin in plugins:
             start_tag = tag_format.format(plugin.pk)
             self.assertIn(start_tag, output)
+
+
+@override_settings(CMS_RENDER_INSTRUMENTATION=True, CMS_PAGE_CACHE=False)
+class RenderInstrumentationTestCase(CMSTestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.page = create_page("page", "nav_playground.html", "en")
+        self.placeholder = self.page.get_placeholders("en").get(slot="body")
+        add_plugin(self.placeholder, "TextPlugin", "en", body="Instrumented")
+
+    def test_server_timing(self):
+        page_url = self.page.get_absolute_url()
+
+        # Only staff users get the header
+        with self.assertLogs("cms.utils.instrumentation", level="DEBUG") as logs:
+            response = self.client.get(page_url)
+        self.assertFalse(response.has_header("Server-Timing"))
+        output = "\n".join(logs.output)
+        self.assertIn(f"DEBUG:cms.utils.instrumentation:Rendered {page_url}: placeholder body: 1x", output)
+        self.assertIn("cache miss 1", output)
+
+        # The placeholder cache is used this time
+        with self.assertLogs("cms.utils.instrumentation", level="DEBUG") as logs:
+            self.client.get(page_url)
+        output = "\n".join(logs.output)
+        self.assertRegex(output, r"placeholder body: 1x, [\d.]+ ms, 0 queries, cache hit 1")
+        self.assertNotIn("plugin TextPlugin", output)
+
+        with self.login_user_context(self.get_staff_user_with_no_permissions()):
+            server_timing = self.client.get(page_url)["Server-Timing"]
+            self.assertIn("cms-placeholder-body;dur=", server_timing)
+            self.assertIn("cms-plugin-TextPlugin;dur=", server_timing)
+            self.assertIn("cms-menu-menu;dur=", server_timing)
+            self.assertIn("placeholder body: 1x", server_timing)
+
+            with self.settings(CMS_RENDER_INSTRUMENTATION=False):
+                self.assertFalse(self.client.get(page_url).has_header("Server-Timing"))
+
+    def test_render_metrics_toolbar(self):
+        with self.login_user_context(self.get_superuser()):
+            response = self.client.get(self.page.get_absolute_url())
+        self.assertContains(response, "Render metrics")
+        self.assertContains(response, "plugin TextPlugin: 1x")
+
+    def test_template_tags_with_keyword_arguments(self):
+        import warnings
+
+        from cms.models import AliasPluginModel
+        from cms.utils.instrumentation import get_render_metrics
+
+        plugin = self.placeholder.get_plugins("en")[0]
+        request = self.get_request(page=self.page)
+        request.toolbar = CMSToolbar(request)
+        template = (
+            '{% load cms_tags cms_alias_tags %}'
+            '{% show_placeholder "body" page %}'
+            '{% render_placeholder placeholder %}'
+            '{% render_plugin plugin %}'
+            '{% render_alias_plugin alias_plugin %}'
+            '{% render_alias_plugin alias_placeholder %}'
+        )
+        context = {
+            'page': self.page,
+            'placeholder': self.placeholder,
+            'plugin': plugin,
+            'alias_plugin': AliasPluginModel(plugin=plugin),
+            'alias_placeholder': AliasPluginModel(alias_placeholder=self.placeholder),
+        }
+
+        with warnings.catch_warnings():
+            # The alias plugin is deprecated
+            warnings.simplefilter("ignore")
+            output = self.render_template_obj(template, context, request)
+        self.assertEqual(output.count("Instrumented"), 5)
+        names = {(entry["kind"], entry["name"]) for entry in get_render_metrics(request).get_summary()}
+        self.assertEqual(names, {("placeholder", "body"), ("plugin", "TextPlugin")})
@@ -279,6 +279,22 @@ def check_plugin_instances(output):
                                  "database; read the documentation before using it.")
 
 
+@define_check
+def check_plugin_tree_paths(output):
+    from cms.models import CMSPlugin
+
+    with output.section("Plugin tree paths") as section:
+        wrong_paths = CMSPlugin._get_wrong_tree_paths()
+
+        if wrong_paths:
+            section.error("%s plugins have a wrong tree path" % len(wrong_paths))
+            section.finish_error("Plugins were moved to other parents without updating their tree paths, e.g. "
+                                 "by loading fixtures \nor with QuerySet.update(). Run the 'manage.py cms fix-tree' "
+                                 "command to rebuild them.")
+        else:
+            section.finish_success("The tree paths of all plugins are in good order")
+
+
 @define_check
 def check_copy_relations(output):
     from cms.extensions import extension_pool
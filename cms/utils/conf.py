@@ -60,9 +60,27 @@ DEFAULTS = {
     'PAGE_MEDIA_PATH': 'cms_page_media/',
     'TITLE_CHARACTER': '+',
     'PAGE_CACHE': True,
+    'PAGE_CACHE_GRACE_PERIOD': 0,
+    'PAGE_CACHE_LOCK_TIMEOUT': 10,
+    'PAGE_CACHE_COMPRESSION': None,
+    'PAGE_CACHE_HOLE_PUNCHING': False,
+    'PAGE_CACHE_ALLOWED_QUERY_PARAMETERS': None,
+    'PAGE_CACHE_SURROGATE_KEY_HEADERS': [],
+    'PAGE_CACHE_PURGE_BACKEND': None,
+    'PAGE_CACHE_IGNORED_QUERY_PARAMETERS': [
+        'utm_*', 'fbclid', 'gclid', 'dclid', 'gbraid', 'wbraid', 'msclkid', 'mc_cid', 'mc_eid', '_ga', '_gl',
+    ],
     'PLACEHOLDER_CACHE': True,
+    'PLACEHOLDER_CACHE_SELF_VALIDATING': False,
+    'PLACEHOLDER_CACHE_MATERIALIZED': False,
+    'PLACEHOLDER_CACHE_MATERIALIZED_DURATION': 60 * 60 * 24,
     'PLUGIN_CACHE': True,
+    'PLUGIN_FRAGMENT_CACHE': False,
+    'RENDER_INSTRUMENTATION': False,
+    'RENDER_METRICS_SINK': 'cms.utils.instrumentation.LoggingMetricsSink',
     'CACHE_PREFIX': f'cms_{__version__}_',
+    'CACHE_LOCAL_TTL': 0,
+    'CACHE_LOCAL_MAX_ENTRIES': 1000,
     'PLUGIN_PROCESSORS': [],
     'PLUGIN_CONTEXT_PROCESSORS': [],
     'UNIHANDECODE_VERSION': None,
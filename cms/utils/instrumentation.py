@@ -0,0 +1,254 @@
+"""
+Render instrumentation, enabled by :setting:`CMS_RENDER_INSTRUMENTATION`.
+
+The wall time, number of database queries and cache outcome (``hit``,
+``miss`` or ``skip``) of each rendered placeholder, plugin and menu are
+recorded for the request. The numbers of placeholders and plugins include the
+plugins rendered within them. Once the response is ready, the numbers are
+summed up per placeholder slot, plugin type and menu, and
+
+* added to the responses of staff users as ``Server-Timing`` header,
+* shown to staff users in the toolbar,
+* passed to the sink configured in :setting:`CMS_RENDER_METRICS_SINK`.
+"""
+import inspect
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.utils.module_loading import import_string
+
+from cms.utils.conf import get_cms_setting
+
+logger = logging.getLogger(__name__)
+
+CACHE_HIT = 'hit'
+CACHE_MISS = 'miss'
+CACHE_SKIP = 'skip'
+
+_server_timing_name_re = re.compile(r'[^a-zA-Z0-9_.-]')
+
+
+class RenderMetric:
+    __slots__ = ('kind', 'name', 'duration', 'queries', 'cache')
+
+    def __init__(self, kind, name):
+        self.kind = kind
+        self.name = name
+        self.duration = 0.0
+        self.queries = 0
+        self.cache = CACHE_SKIP
+
+
+class RenderMetrics:
+    """
+    The metrics recorded while rendering a request.
+    """
+
+    def __init__(self):
+        self.metrics = []
+        self._stack = []
+
+    @contextmanager
+    def measure(self, kind, name):
+        """
+        Measures the rendering of the «kind» of object named «name» done
+        within the block.
+        """
+        metric = RenderMetric(kind, name)
+
+        def count_queries(execute, sql, params, many, context):
+            metric.queries += 1
+            return execute(sql, params, many, context)
+
+        self._stack.append(metric)
+        start = time.perf_counter()
+
+        try:
+            with connection.execute_wrapper(count_queries):
+                yield metric
+        finally:
+            metric.duration = (time.perf_counter() - start) * 1000
+            self._stack.pop()
+            self.metrics.append(metric)
+
+    def set_cache_outcome(self, outcome):
+        """
+        Sets the cache outcome of the innermost measured rendering.
+        """
+        if self._stack:
+            self._stack[-1].cache = outcome
+
+    def get_summary(self):
+        """
+        Returns a list of dictionaries with the ``kind``, ``name``, number of
+        renderings (``count``), ``duration`` in milliseconds, ``queries`` and
+        ``cache`` outcome counts, per kind and name, slowest first.
+        """
+        summary = {}
+
+        for metric in self.metrics:
+            entry = summary.setdefault((metric.kind, metric.name), {
+                'kind': metric.kind,
+                'name': metric.name,
+                'count': 0,
+                'duration': 0.0,
+                'queries': 0,
+                'cache': Counter(),
+            })
+            entry['count'] += 1
+            entry['duration'] += metric.duration
+            entry['queries'] += metric.queries
+            entry['cache'][metric.cache] += 1
+        return sorted(summary.values(), key=lambda entry: entry['duration'], reverse=True)
+
+
+def is_instrumentation_enabled():
+    return get_cms_setting('RENDER_INSTRUMENTATION')
+
+
+def get_render_metrics(request, create=True):
+    """
+    Returns the RenderMetrics of «request», or ``None`` if the instrumentation
+    is disabled. Unless «create», ``None`` is also returned if nothing has
+    been measured for the request.
+    """
+    if request is None or not is_instrumentation_enabled():
+        return None
+
+    metrics = getattr(request, '_cms_render_metrics', None)
+
+    if metrics is None and create:
+        metrics = request._cms_render_metrics = RenderMetrics()
+    return metrics
+
+
+def set_cache_outcome(request, outcome):
+    metrics = get_render_metrics(request, create=False)
+
+    if metrics:
+        metrics.set_cache_outcome(outcome)
+
+
+def instrument_render(kind, name_attribute=None):
+    """
+    Decorates a method of a renderer (an object with a ``request`` attribute)
+    to measure it as rendering a «kind» of object. The object's name is the
+    «name_attribute» of the method's first argument, or «kind».
+    """
+    def decorator(method):
+        if name_attribute:
+            # The first argument after the renderer, which may be passed by keyword
+            argument_name = list(inspect.signature(method).parameters)[1]
+
+        @wraps(method)
+        def inner(renderer, *args, **kwargs):
+            metrics = get_render_metrics(renderer.request)
+
+            if metrics is None:
+                return method(renderer, *args, **kwargs)
+
+            if name_attribute:
+                obj = args[0] if args else kwargs[argument_name]
+                name = getattr(obj, name_attribute)
+            else:
+                name = kind
+
+            with metrics.measure(kind, name):
+                return method(renderer, *args, **kwargs)
+        return inner
+    return decorator
+
+
+def format_summary_entry(entry):
+    cache = ', '.join(f'{outcome} {count}' for outcome, count in sorted(entry['cache'].items()))
+    return (
+        f"{entry['kind']} {entry['name']}: {entry['count']}x, {entry['duration']:.1f} ms, "
+        f"{entry['queries']} queries, cache {cache}"
+    )
+
+
+def get_server_timing_header_value(metrics):
+    values = []
+
+    for entry in metrics.get_summary():
+        name = _server_timing_name_re.sub('-', f"cms-{entry['kind']}-{entry['name']}")
+        description = format_summary_entry(entry).replace('"', "'")
+        values.append(f'{name};dur={entry["duration"]:.1f};desc="{description}"')
+    return ', '.join(values)
+
+
+class BaseMetricsSink:
+    """
+    Base class of the metrics sinks. Subclasses implement ``record()``, e.g.
+    by sending the numbers to a monitoring service.
+    """
+
+    def record(self, request, metrics):
+        """
+        Records the RenderMetrics «metrics» of «request».
+        """
+        raise NotImplementedError
+
+
+class LoggingMetricsSink(BaseMetricsSink):
+    """
+    Logs the summary of the metrics to the ``cms.utils.instrumentation``
+    logger at the ``DEBUG`` level.
+    """
+
+    def record(self, request, metrics):
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+
+        for entry in metrics.get_summary():
+            logger.debug('Rendered %s: %s', request.path, format_summary_entry(entry))
+
+
+@lru_cache
+def _load_metrics_sink(path):
+    try:
+        sink_class = import_string(path)
+    except ImportError as err:
+        raise ImproperlyConfigured(
+            f'Unable to import the CMS_RENDER_METRICS_SINK "{path}".'
+        ) from err
+    return sink_class()
+
+
+def get_metrics_sink():
+    """
+    Returns the configured metrics sink instance or ``None``.
+    """
+    path = get_cms_setting('RENDER_METRICS_SINK')
+    return _load_metrics_sink(path) if path else None
+
+
+def record_render_metrics(request, response):
+    """
+    Adds the ``Server-Timing`` header to «response» for staff users and passes
+    the metrics to the metrics sink, if anything has been measured for «request».
+    """
+    metrics = get_render_metrics(request, create=False)
+
+    if not metrics or not metrics.metrics:
+        return
+
+    user = getattr(request, 'user', None)
+
+    # The timings tell a lot about the site, only staff users get them
+    if user is not None and user.is_staff:
+        value = get_server_timing_header_value(metrics)
+
+        if response.has_header('Server-Timing'):
+            value = f"{response['Server-Timing']}, {value}"
+        response['Server-Timing'] = value
+    sink = get_metrics_sink()
+
+    if sink:
+        sink.record(request, metrics)
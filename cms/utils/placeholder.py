@@ -307,10 +307,27 @@ def get_placeholders(template):
     return placeholders
 
 
+def get_declared_static_placeholders(template, context):
+    """
+    Returns the declarations of the static placeholders in «template», with
+    their codes resolved in «context». Codes which cannot be resolved are
+    empty.
+    """
+    from cms.templates import get_cached_template
+
+    nodelist = _get_nodelist(get_cached_template(template))
+
+    try:
+        # The template is scanned once for as long as its template object
+        # is used, which is the lifetime of the process with the cached loader.
+        nodes = nodelist._cms_static_placeholder_nodes
+    except AttributeError:
+        nodes = nodelist._cms_static_placeholder_nodes = _scan_static_placeholders(nodelist)
+    return [node.get_declaration(context) for node in nodes]
+
+
 def get_static_placeholders(template, context):
-    compiled_template = get_template(template)
-    nodes = _scan_static_placeholders(_get_nodelist(compiled_template))
-    placeholders = [node.get_declaration(context) for node in nodes]
+    placeholders = get_declared_static_placeholders(template, context)
     placeholders_with_code = []
 
     for placeholder in placeholders:
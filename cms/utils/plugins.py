@@ -1,16 +1,22 @@
 import logging
 import sys
-from collections import OrderedDict, defaultdict, deque
+from collections import Counter, OrderedDict, defaultdict, deque
 from copy import deepcopy
 from functools import lru_cache
 from itertools import starmap
 from operator import itemgetter
 
+from django.db.models.signals import post_save, pre_save
 from django.utils.encoding import force_str
 from django.utils.translation import gettext as _
 
+from cms.cache.holes import is_hole_punching_enabled
 from cms.exceptions import PluginLimitReached
-from cms.models.pluginmodel import CMSPlugin
+from cms.models.pluginmodel import (
+    CMSPlugin,
+    _get_database_connection,
+    get_tree_path,
+)
 from cms.plugin_base import CMSPluginBase
 from cms.plugin_pool import plugin_pool
 from cms.utils import get_language_from_request
@@ -62,7 +68,36 @@ def get_plugins(request, placeholder, template, lang=None):
     return placeholder._plugins_cache
 
 
-def assign_plugins(request, placeholders, template=None, lang=None):
+def fetch_plugins(request, placeholder_groups, lang):
+    """
+    Fetch all plugins for the placeholders in ``placeholder_groups`` with one
+    query, without casting them down (see ``assign_plugins``).
+
+    :param request: The current request.
+    :param placeholder_groups: A list of ``(placeholders, template)`` tuples. If
+        none of the placeholders of a group has plugins, the default plugins
+        configured for their template are created.
+    :param lang: The language code.
+    """
+    placeholders = [placeholder for group, _ in placeholder_groups for placeholder in group]
+
+    if not placeholders:
+        return []
+    plugins = list(
+        CMSPlugin
+        .objects
+        .filter(placeholder__in=placeholders, language=lang)
+    )
+    filled_placeholders = {plugin.placeholder_id for plugin in plugins}
+
+    for group, template in placeholder_groups:
+        if group and not any(placeholder.pk in filled_placeholders for placeholder in group):
+            # Create default plugins if enabled
+            plugins.extend(create_default_plugins(request, group, template, lang))
+    return plugins
+
+
+def assign_plugins(request, placeholders, template=None, lang=None, plugins=None):
     """
     Fetch all plugins for the given ``placeholders`` and
     cast them down to the concrete instances in one query
@@ -72,6 +107,8 @@ def assign_plugins(request, placeholders, template=None, lang=None):
     :param placeholders: An iterable of placeholder objects.
     :param template: (optional) The template object.
     :param lang: (optional) The language code.
+    :param plugins: (optional) The plugins of the placeholders as returned by
+        ``fetch_plugins``, if they have been fetched already.
 
     This method assigns plugins to the given placeholders. It retrieves the plugins from the database based on the
     placeholders and the language. The plugins are then downcasted to their specific plugin types.
@@ -89,14 +126,9 @@ def assign_plugins(request, placeholders, template=None, lang=None):
         return
     placeholders = tuple(placeholders)
     lang = lang or get_language_from_request(request)
-    plugins = list(
-        CMSPlugin
-        .objects
-        .filter(placeholder__in=placeholders, language=lang)
-    )
-    if not plugins:
-        # Create default plugins if enabled
-        plugins = create_default_plugins(request, placeholders, template, lang)
+
+    if plugins is None:
+        plugins = fetch_plugins(request, [(placeholders, template)], lang)
     plugins = downcast_plugins(plugins, placeholders, request=request)
 
     # split the plugins up by placeholder
@@ -255,6 +287,17 @@ def copy_plugins_to_placeholder(plugins, placeholder, language=None,
     #. trigger the copy relations
     #. return the plugin ids
     """
+    source_plugins = list(get_bound_plugins(plugins))
+
+    if _can_bulk_copy_plugins(source_plugins):
+        return _bulk_copy_plugins_to_placeholder(
+            source_plugins,
+            placeholder,
+            language=language,
+            root_plugin=root_plugin,
+            start_positions=start_positions,
+        )
+
     plugin_pairs = []
     plugins_by_id = OrderedDict()
     # Keeps track of the next available position per language.
@@ -267,7 +310,7 @@ def copy_plugins_to_placeholder(plugins, placeholder, language=None,
     if root_plugin:
         language = root_plugin.language
 
-    for source_plugin in get_bound_plugins(plugins):
+    for source_plugin in source_plugins:
         parent = plugins_by_id.get(source_plugin.parent_id, root_plugin)
         plugin_model = get_plugin_model(source_plugin.plugin_type)
 
@@ -336,6 +379,193 @@ def copy_plugins_to_placeholder(plugins, placeholder, language=None,
     return list(plugins_by_id.values())
 
 
+def _get_plugin_tables(plugin_model):
+    # The models whose tables hold the fields of «plugin_model» besides the
+    # CMSPlugin table, the parents first
+    concrete_model = plugin_model._meta.concrete_model
+    parents = concrete_model._meta.get_parent_list()
+    return [model for model in [*reversed(parents), concrete_model] if model is not CMSPlugin]
+
+
+def _can_bulk_copy_plugin_model(plugin_model):
+    """
+    Returns ``True`` if the plugins of «plugin_model» can be inserted without
+    calling their ``save()`` method. Unless set explicitly with ``bulk_copy``,
+    this is the case for models which override neither ``save()`` nor
+    ``copy_relations()``. Models with ``pre_save`` or ``post_save`` receivers
+    are saved one by one.
+    """
+    bulk_copy = plugin_model.bulk_copy
+
+    if bulk_copy is None:
+        bulk_copy = (
+            plugin_model.save is CMSPlugin.save
+            and plugin_model.copy_relations is CMSPlugin.copy_relations
+        )
+
+    if not bulk_copy:
+        return False
+    return not pre_save.has_listeners(plugin_model) and not post_save.has_listeners(plugin_model)
+
+
+def _can_bulk_copy_plugins(source_plugins):
+    """
+    Returns ``True`` if the primary keys of bulk inserted plugins are returned
+    by the database and the models of all «source_plugins» can be copied in
+    bulk and are stored in CMSPlugin and its subclasses only.
+    """
+    features = _get_database_connection('write').features
+    # Renamed in Django 3.0
+    can_return_rows = getattr(
+        features,
+        'can_return_rows_from_bulk_insert',
+        getattr(features, 'can_return_ids_from_bulk_insert', False),
+    )
+
+    if not can_return_rows:
+        return False
+
+    plugin_models = {source_plugin.__class__ for source_plugin in source_plugins}
+    return all(
+        _can_bulk_copy_plugin_model(plugin_model)
+        and all(issubclass(model, CMSPlugin) for model in _get_plugin_tables(plugin_model))
+        for plugin_model in plugin_models
+    )
+
+
+def _bulk_copy_plugins_to_placeholder(source_plugins, placeholder, language=None,
+                                      root_plugin=None, start_positions=None):
+    """
+    Copies the bound «source_plugins» like copy_plugins_to_placeholder(), but
+    inserts the copies with a bulk insert per tree level and plugin table
+    instead of saving them one by one. The relations are copied per plugin
+    model with ``copy_relations_bulk()``.
+    """
+    connection = _get_database_connection('write')
+    plugin_pairs = []
+    plugins_by_id = OrderedDict()
+    plugins_by_model = defaultdict(list)
+    # The plugins to insert per tree level, as (new plugin, parent) tuples
+    plugins_by_depth = defaultdict(list)
+    depths = {}
+    orphaned_plugin_list = []
+
+    if root_plugin:
+        language = root_plugin.language
+
+    # Reserve the positions of all copies of a language at once
+    positions_by_language = dict(start_positions or {})
+    counts_by_language = Counter(language or plugin.language for plugin in source_plugins)
+
+    for plugin_language, count in counts_by_language.items():
+        if plugin_language in positions_by_language:
+            continue
+
+        position = placeholder.get_next_plugin_position(
+            language=plugin_language,
+            parent=root_plugin,
+            insert_order='last',
+        )
+        placeholder._move_plugin_ranges(plugin_language, [(position, None, count)])
+        positions_by_language[plugin_language] = position
+
+    for source_plugin in source_plugins:
+        parent = plugins_by_id.get(source_plugin.parent_id, root_plugin)
+        plugin_model = source_plugin.__class__
+
+        if plugin_model != CMSPlugin:
+            new_plugin = deepcopy(source_plugin)
+            new_plugin.pk = None
+            new_plugin.id = None
+        else:
+            new_plugin = CMSPlugin(plugin_type=source_plugin.plugin_type)
+
+        new_plugin.language = language or source_plugin.language
+        new_plugin.placeholder = placeholder
+        new_plugin.position = positions_by_language[new_plugin.language]
+        positions_by_language[new_plugin.language] += 1
+
+        depth = depths.get(source_plugin.parent_id, -1) + 1
+        depths[source_plugin.pk] = depth
+        plugins_by_depth[depth].append((new_plugin, parent))
+        plugins_by_id[source_plugin.pk] = new_plugin
+
+        if plugin_model != CMSPlugin:
+            plugin_pairs.append((new_plugin, source_plugin))
+            plugins_by_model[plugin_model].append(new_plugin)
+
+        # Rescue any orphaned plugins
+        if not parent and source_plugin.parent_id:
+            orphaned_plugin_list.append(
+                (source_plugin.parent_id, new_plugin)
+            )
+
+    base_fields = CMSPlugin._meta.concrete_fields
+
+    # The parents are inserted before their children, so that the
+    # children's parent_id is known
+    for depth in sorted(plugins_by_depth):
+        level = []
+
+        for new_plugin, parent in plugins_by_depth[depth]:
+            new_plugin.parent = parent
+            new_plugin.tree_path = get_tree_path(parent)
+
+            if new_plugin.__class__ is CMSPlugin:
+                base_plugin = new_plugin
+            else:
+                base_plugin = CMSPlugin(**{field.attname: getattr(new_plugin, field.attname) for field in base_fields})
+            level.append((new_plugin, base_plugin))
+
+        CMSPlugin.objects.using(connection.alias).bulk_create([base_plugin for new_plugin, base_plugin in level])
+
+        for new_plugin, base_plugin in level:
+            if new_plugin is base_plugin:
+                continue
+
+            for field in base_fields:
+                setattr(new_plugin, field.attname, getattr(base_plugin, field.attname))
+
+            for model in _get_plugin_tables(new_plugin.__class__):
+                for parent_link in model._meta.parents.values():
+                    setattr(new_plugin, parent_link.attname, base_plugin.pk)
+
+    for plugin_model, new_plugins in plugins_by_model.items():
+        for model in _get_plugin_tables(plugin_model):
+            fields = model._meta.local_concrete_fields
+            batch_size = max(connection.ops.bulk_batch_size(fields, new_plugins), 1)
+
+            for start in range(0, len(new_plugins), batch_size):
+                batch = new_plugins[start:start + batch_size]
+                model._base_manager.using(connection.alias)._insert(batch, fields=fields, using=connection.alias)
+
+        for new_plugin in new_plugins:
+            new_plugin._state.adding = False
+            new_plugin._state.db = connection.alias
+
+    pairs_by_model = defaultdict(list)
+
+    for new_plugin, source_plugin in plugin_pairs:
+        pairs_by_model[new_plugin.__class__].append((new_plugin, source_plugin))
+
+    for plugin_model, model_plugin_pairs in pairs_by_model.items():
+        plugin_model.copy_relations_bulk(model_plugin_pairs)
+
+    # Reunite any orphaned plugins with the parent
+    if orphaned_plugin_list:
+        _reunite_orphaned_placeholder_plugin_children(root_plugin, orphaned_plugin_list, plugins_by_id)
+
+    # See copy_plugins_to_placeholder()
+    for new_plugin, old_plugin in plugin_pairs:
+        new_plugin.post_copy(old_plugin, plugin_pairs)
+
+    # The positions given by the caller may leave gaps
+    for plugin_language in start_positions or {}:
+        placeholder._recalculate_plugin_positions(plugin_language)
+
+    return list(plugins_by_id.values())
+
+
 def get_bound_plugins(plugins):
     """
     Get the bound plugins by downcasting the plugins to their respective classes. Raises a KeyError if the plugin type
@@ -440,7 +670,10 @@ def downcast_plugins(plugins,
                 instance.placeholder = placeholder
 
                 if not cls.cache and not cls().get_cache_expiration(request, instance, placeholder):
-                    placeholder.cache_placeholder = False
+                    # With hole punching, the plugin is rendered
+                    # separately from the cached content.
+                    if not is_hole_punching_enabled():
+                        placeholder.cache_placeholder = False
 
             plugin_lookup[instance.pk] = instance
 
@@ -8,7 +8,6 @@ from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ObjectDoesNotExist
 from django.http import (
     Http404,
-    HttpResponse,
     HttpResponseBadRequest,
     HttpResponseRedirect,
 )
@@ -16,14 +15,12 @@ from django.shortcuts import render
 from django.template.defaultfilters import title
 from django.template.response import TemplateResponse
 from django.urls import Resolver404, resolve, reverse
-from django.utils.cache import patch_cache_control
 from django.utils.http import url_has_allowed_host_and_scheme
-from django.utils.timezone import now
 from django.utils.translation import activate, get_language_from_request
 from django.views.decorators.http import require_POST
 
 from cms.apphook_pool import apphook_pool
-from cms.cache.page import get_page_cache
+from cms.cache.page import get_page_cache_response
 from cms.exceptions import LanguageError
 from cms.forms.login import CMSToolbarLoginForm
 from cms.models import Page, PageContent
@@ -64,22 +61,13 @@ def details(request, slug):
     page.
     """
     is_authenticated = request.user.is_authenticated
-    response_timestamp = now()
     if get_cms_setting("PAGE_CACHE") and (
         not hasattr(request, 'toolbar') or (
             not request.toolbar.edit_mode_active and not request.toolbar.show_toolbar and not is_authenticated
         )
     ):
-        cache_content = get_page_cache(request)
-        if cache_content is not None:
-            content, headers, expires_datetime = cache_content
-            response = HttpResponse(content)
-            response.xframe_options_exempt = True
-            response.headers = headers
-            # Recalculate the max-age header for this cached response
-            max_age = int(
-                (expires_datetime - response_timestamp).total_seconds() + 0.5)
-            patch_cache_control(response, max_age=max_age)
+        response = get_page_cache_response(request)
+        if response is not None:
             return response
 
     # Get a Page model object from the request
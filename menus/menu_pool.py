@@ -13,12 +13,19 @@ from django.utils.translation import (
     gettext_lazy as _,
 )
 
+from cms.cache import get_page_cache_tag, invalidate_cms_page_cache, invalidate_cms_page_cache_tags
 from cms.utils import get_current_site
 from cms.utils.conf import get_cms_setting
 from cms.utils.i18n import (
     get_default_language_for_site,
     is_language_prefix_patterns_used,
 )
+from cms.utils.instrumentation import (
+    CACHE_HIT,
+    CACHE_MISS,
+    instrument_render,
+    set_cache_outcome,
+)
 from menus.base import Menu
 from menus.exceptions import NamespaceAlreadyRegistered
 from menus.models import CacheKey
@@ -165,8 +172,11 @@ class MenuRenderer:
             # Only use the cache if the key is present in the database.
             # This prevents a condition where keys which have been removed
             # from the database due to a change in content, are still used.
+            set_cache_outcome(self.request, CACHE_HIT)
             return cached_nodes
 
+        set_cache_outcome(self.request, CACHE_MISS)
+
         final_nodes = []
         toolbar = getattr(self.request, 'toolbar', None)
 
@@ -250,6 +260,7 @@ class MenuRenderer:
                 self.request, nodes, namespace, root_id, post_cut, breadcrumb)
         return nodes
 
+    @instrument_render('menu')
     def get_nodes(self, namespace=None, root_id=None, breadcrumb=False):
         nodes = self._build_nodes()
         nodes = self.apply_modifiers(
@@ -353,6 +364,13 @@ class MenuPool:
             cache.delete_many(to_be_deleted)
             cache_keys.delete()
 
+        if get_cms_setting('PAGE_CACHE'):
+            # The menus are part of the cached pages
+            if all or not site_id:
+                invalidate_cms_page_cache()
+            else:
+                invalidate_cms_page_cache_tags([get_page_cache_tag('site', site_id)])
+
     def register_menu(self, menu_cls):
         from menus.base import Menu
         assert issubclass(menu_cls, Menu)